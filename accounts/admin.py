@@ -1,8 +1,22 @@
+import io
+
+from django import forms
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.core.exceptions import PermissionDenied
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from .imports import import_accounts
 from .models import User, WorkerProfile, HospitalProfile
 
 
+class AccountImportForm(forms.Form):
+    csv_file = forms.FileField(label='CSV file', help_text='One account per row; see accounts/imports.py for columns')
+    kind = forms.ChoiceField(label='Account type', choices=[('worker', 'Medical Worker'), ('hospital', 'Hospital')])
+    dry_run = forms.BooleanField(required=False, help_text='Validate only; nothing is saved')
+
+
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name', 'user_type', 'is_verified', 'city', 'state')
@@ -29,6 +43,37 @@ class CustomUserAdmin(UserAdmin):
             'classes': ('collapse',)
         }),
     )
+    
+    change_list_template = 'admin/accounts/user/change_list.html'
+    
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_csv), name='accounts_user_import'),
+        ] + super().get_urls()
+    
+    def import_csv(self, request):
+        """Upload a worker or hospital roster and show the per-row error report."""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        form = AccountImportForm(request.POST or None, request.FILES or None)
+        result = None
+        if request.method == 'POST' and form.is_valid():
+            lines = io.TextIOWrapper(form.cleaned_data['csv_file'], encoding='utf-8-sig', newline='')
+            try:
+                # Hashed in this process: forking a pool from a threaded web
+                # worker can deadlock, and would put every CPU on one request.
+                result = import_accounts(lines, form.cleaned_data['kind'], processes=1,
+                                         dry_run=form.cleaned_data['dry_run'])
+            except (ValueError, UnicodeDecodeError) as exc:
+                form.add_error('csv_file', str(exc))
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import accounts from CSV',
+            'form': form,
+            'result': result,
+        }
+        return TemplateResponse(request, 'admin/accounts/user/import_csv.html', context)
 
 
 @admin.register(WorkerProfile)
@@ -36,7 +81,7 @@ class WorkerProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'license_number', 'experience_years', 'rating', 'is_available')
     list_filter = ('is_available', 'experience_years', 'rating')
     search_fields = ('user__username', 'user__email', 'license_number')
-    readonly_fields = ('rating', 'total_reviews')
+    readonly_fields = ('rating', 'total_reviews', 'rating_histogram')
 
 
 @admin.register(HospitalProfile)
@@ -0,0 +1,240 @@
+"""
+JWT authentication that resolves the user from cached claims.
+
+The stock ``JWTAuthentication`` loads the full ``User`` row on every request.
+Here only the claims the permission checks need (``CLAIM_FIELDS``) are kept,
+first in a small per-process LRU and then in the shared Django cache, and the
+request gets a ``User`` instance with just those fields loaded. Any other
+field is fetched from the database on first access.
+
+Each user has a version in the shared cache, bumped by ``invalidate_user``
+(on every save or delete of the user, and on ``update()`` through
+``User.objects``). Cached claims carry the version they were read under,
+and are only used while it is current, so a deactivated user is rejected
+by every gunicorn worker at once rather than when its local copy expires.
+The version is read in the same round trip as the token blacklist.
+
+Revoked refresh tokens are tracked in the same caches so the access tokens
+minted from them stop working after ``logout`` without a blacklist table
+query per request. The caches are only a shortcut: on a miss the
+``token_blacklist`` table is checked and the answer cached, a "not revoked"
+only for ``BLACKLIST_MISS_TTL`` seconds. A revocation in one process thus
+reaches the others within that time even without a shared cache, and an
+evicted entry is never read as "not revoked".
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+
+CLAIM_FIELDS = ('id', 'user_type', 'is_active')
+REFRESH_JTI_CLAIM = 'rjti'
+
+_config = {'LOCAL_SIZE': 1024, 'LOCAL_TTL': 30, 'SHARED_TTL': 300, 'BLACKLIST_MISS_TTL': 30}
+_config.update(getattr(settings, 'JWT_USER_CACHE', {}))
+
+
+class LocalCache:
+    """Thread-safe LRU with a per-entry expiry, local to one process."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local_users = LocalCache(_config['LOCAL_SIZE'], _config['LOCAL_TTL'])
+_local_blacklist = LocalCache(_config['LOCAL_SIZE'], api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+
+
+def _user_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def _version_key(user_id):
+    return f'auth:user-version:{user_id}'
+
+
+def _blacklist_key(jti):
+    return f'auth:blacklist:{jti}'
+
+
+def _bump_version(user_id):
+    _local_users.delete(user_id)
+    # Outlives any entry cached under the old version, so a missing version
+    # never matches claims written before the change.
+    cache.set(_version_key(user_id), time.time_ns(), 2 * _config['SHARED_TTL'])
+    cache.delete(_user_key(user_id))
+
+
+def invalidate_user(user_id):
+    """Make cached claims for ``user_id`` stale in every process."""
+    _bump_version(user_id)
+    # Until the change commits, other requests still read (and cache) the old
+    # row under the new version; bump it again once the change is visible.
+    transaction.on_commit(lambda: _bump_version(user_id))
+
+
+def _remember_blacklisted(jti, blacklisted, ttl=None, shared=True):
+    if ttl is None:
+        ttl = _local_blacklist.ttl if blacklisted else _config['BLACKLIST_MISS_TTL']
+    _local_blacklist.set(jti, blacklisted, ttl)
+    if shared:
+        cache.set(_blacklist_key(jti), blacklisted, ttl)
+
+
+def _blacklisted_in_database(jti):
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+    expires = (BlacklistedToken.objects.filter(token__jti=jti)
+               .values_list('token__expires_at', flat=True).first())
+    if expires is None:
+        _remember_blacklisted(jti, False)
+        return False
+    _remember_blacklisted(jti, True, max(int(expires.timestamp() - time.time()), 1))
+    return True
+
+
+def blacklist_jti(jti, exp):
+    """Record a revoked refresh token until its expiry (epoch seconds)."""
+    _remember_blacklisted(jti, True, max(int(exp - time.time()), 1))
+
+
+def is_blacklisted(jti, shared=None):
+    """
+    Whether the refresh token ``jti`` is revoked. ``shared`` is its entry
+    from the shared cache when the caller already fetched it.
+    """
+    blacklisted = _local_blacklist.get(jti)
+    if blacklisted is not None:
+        return blacklisted
+    if shared is None:
+        shared = cache.get(_blacklist_key(jti))
+    if shared is None:
+        return _blacklisted_in_database(jti)
+    _remember_blacklisted(jti, shared, shared=False)
+    return shared
+
+
+def request_user_id(request):
+    """
+    The id of the user a Django request is from, read from its access token
+    or session without a query (for middleware that runs before DRF
+    authentication); None if anonymous or the token is invalid. Kept on the
+    request, so several middlewares pay for one token check.
+    """
+    try:
+        return request._token_user_id
+    except AttributeError:
+        pass
+    user_id = None
+    jwt = JWTAuthentication()
+    header = jwt.get_header(request)
+    raw_token = jwt.get_raw_token(header) if header else None
+    if raw_token is not None:
+        try:
+            user_id = str(jwt.get_validated_token(raw_token)[api_settings.USER_ID_CLAIM])
+        except (InvalidToken, TokenError, KeyError):
+            pass
+    elif getattr(request, 'session', None) is not None:
+        user_id = request.session.get(SESSION_KEY)
+    request._token_user_id = user_id
+    return user_id
+
+
+def user_from_claims(claims):
+    """Build a ``User`` with only the cached claim fields loaded."""
+    names = [f.attname for f in User._meta.concrete_fields if f.attname in claims]
+    return User.from_db(DEFAULT_DB_ALIAS, names, [claims[name] for name in names])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` without a database hit on warm requests."""
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Needs the password hash, which is deliberately not cached.
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        refresh_jti = validated_token.get(REFRESH_JTI_CLAIM)
+        locally_blacklisted = _local_blacklist.get(refresh_jti) if refresh_jti else None
+        if locally_blacklisted:
+            raise AuthenticationFailed(_("Token is blacklisted"), code="token_not_valid")
+
+        # Entries are (version, claims).
+        entry = _local_users.get(user_id)
+        keys = [_version_key(user_id)]
+        if entry is None:
+            keys.append(_user_key(user_id))
+        check_blacklist = refresh_jti and locally_blacklisted is None
+        if check_blacklist:
+            keys.append(_blacklist_key(refresh_jti))
+        found = cache.get_many(keys)
+
+        if check_blacklist and is_blacklisted(refresh_jti, found.get(_blacklist_key(refresh_jti))):
+            raise AuthenticationFailed(_("Token is blacklisted"), code="token_not_valid")
+
+        version = found.get(_version_key(user_id))
+        if entry is None or entry[0] != version:
+            entry = found.get(_user_key(user_id)) if entry is None else cache.get(_user_key(user_id))
+            if entry is None or entry[0] != version:
+                claims = (
+                    User.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+                    .values(*CLAIM_FIELDS).first()
+                )
+                if claims is None:
+                    raise AuthenticationFailed(_("User not found"), code="user_not_found")
+                entry = (version, claims)
+                cache.set(_user_key(user_id), entry, _config['SHARED_TTL'])
+            _local_users.set(user_id, entry)
+        claims = entry[1]
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not claims['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return user_from_claims(claims)
@@ -0,0 +1,131 @@
+"""
+Weekly availability windows.
+
+``WorkerProfile.availability`` is free-form JSON, e.g.::
+
+    {"monday": ["08:00-20:00"], "friday": ["19:00-07:00"]}
+
+It is normalized into ``WorkerAvailability`` rows holding minute-of-week
+intervals, so "who is free on date D from 07:00 to 19:00" is an indexed
+range query instead of parsing every profile in Python.
+"""
+
+import datetime
+from itertools import chain
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .models import WorkerAvailability
+
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+def _weekday(key):
+    key = str(key).strip().lower()[:3]
+    for index, name in enumerate(WEEKDAYS):
+        if name.startswith(key):
+            return index
+    return None
+
+
+def _minutes(value):
+    if isinstance(value, datetime.time):
+        return value.hour * 60 + value.minute
+    hours, _, minutes = str(value).strip().partition(':')
+    total = int(hours) * 60 + int(minutes or 0)
+    if not 0 <= total <= MINUTES_PER_DAY:
+        raise ValueError(value)
+    return total
+
+
+def _ranges(value):
+    """Yield (start, end) minute pairs from one weekday's entry."""
+    if value is True:
+        yield 0, MINUTES_PER_DAY
+        return
+    if isinstance(value, (str, dict)):
+        value = [value]
+    for item in value or []:
+        try:
+            if isinstance(item, dict):
+                start, end = _minutes(item['start']), _minutes(item['end'])
+            else:
+                start, end = (_minutes(part) for part in str(item).split('-', 1))
+        except (KeyError, TypeError, ValueError):
+            continue
+        yield start, end
+
+
+def _merge(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(interval) for interval in merged]
+
+
+def _split_week(start, end):
+    """Map an interval that may run past Sunday midnight back into the week."""
+    if end <= MINUTES_PER_WEEK:
+        return [(start, end)]
+    return [(start, MINUTES_PER_WEEK), (0, end - MINUTES_PER_WEEK)]
+
+
+def parse_availability(data):
+    """Return merged minute-of-week intervals for an availability dict."""
+    intervals = []
+    if not isinstance(data, dict):
+        return intervals
+    for key, value in data.items():
+        day = _weekday(key)
+        if day is None:
+            continue
+        for start, end in _ranges(value):
+            if end <= start:
+                end += MINUTES_PER_DAY  # overnight
+            offset = day * MINUTES_PER_DAY
+            intervals.extend(_split_week(offset + start, offset + end))
+    return _merge(intervals)
+
+
+def week_parts(date, start_time, end_time):
+    """Minute-of-week pieces covered by a wall-clock slot on ``date``."""
+    start = date.weekday() * MINUTES_PER_DAY + _minutes(start_time)
+    end = date.weekday() * MINUTES_PER_DAY + _minutes(end_time)
+    if end <= start:
+        end += MINUTES_PER_DAY
+    return _split_week(start, end)
+
+
+def _rows(profile):
+    return [
+        WorkerAvailability(user_id=profile.user_id, start_minute=start, end_minute=end)
+        for start, end in parse_availability(profile.availability)
+    ]
+
+
+def sync_availability(profile, using='default'):
+    with transaction.atomic(using=using):
+        WorkerAvailability.objects.using(using).filter(user_id=profile.user_id).delete()
+        WorkerAvailability.objects.using(using).bulk_create(_rows(profile))
+
+
+def add_availability(profiles, batch_size=1000, using='default'):
+    """Write windows for freshly bulk-created profiles."""
+    rows = list(chain.from_iterable(_rows(profile) for profile in profiles))
+    WorkerAvailability.objects.using(using).bulk_create(rows, batch_size=batch_size)
+
+
+def filter_available(queryset, date, start_time, end_time):
+    """Restrict a ``WorkerProfile`` queryset to workers whose windows cover the slot."""
+    for start, end in week_parts(date, start_time, end_time):
+        queryset = queryset.filter(Exists(WorkerAvailability.objects.filter(
+            user_id=OuterRef('user_id'), start_minute__lte=start, end_minute__gte=end,
+        )))
+    return queryset
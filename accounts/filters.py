@@ -0,0 +1,76 @@
+import datetime
+
+import django_filters
+from django import forms
+from django_filters.widgets import QueryArrayWidget
+
+from .models import WorkerProfile, HospitalProfile
+from .availability import filter_available
+from .tags import filter_by_tags
+
+
+class TagListField(forms.Field):
+    """Accepts ``?tag=a&tag=b`` as well as ``?tag=a,b``."""
+    widget = QueryArrayWidget
+
+    def to_python(self, value):
+        if not value:
+            return []
+        # The widget only splits commas for plain dicts, not request QueryDicts.
+        return [v.strip() for item in value if item for v in item.split(',') if v.strip()]
+
+
+class TagFilter(django_filters.Filter):
+    """
+    Filter on the entries of a JSON list field. ``?<match_param>=all``
+    requires every value; the default matches any of them.
+    """
+    field_class = TagListField
+
+    def __init__(self, *args, match_param='match', **kwargs):
+        self.match_param = match_param
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        match = 'all' if self.parent.data.get(self.match_param) == 'all' else 'any'
+        return filter_by_tags(qs, self.field_name, value, match)
+
+
+class WorkerProfileFilter(django_filters.FilterSet):
+    specialty = TagFilter(field_name='specialties', match_param='specialty_match')
+    certification = TagFilter(field_name='certifications', match_param='certification_match')
+    # ?available_on=2025-07-01&available_from=07:00&available_to=19:00
+    available_on = django_filters.DateFilter(method='filter_noop')
+    available_from = django_filters.TimeFilter(method='filter_noop')
+    available_to = django_filters.TimeFilter(method='filter_noop')
+
+    class Meta:
+        model = WorkerProfile
+        fields = ['specialty', 'certification', 'experience_years', 'rating']
+
+    def filter_noop(self, queryset, name, value):
+        # The three availability parameters are applied together below.
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        date = self.form.cleaned_data.get('available_on')
+        if date is None:
+            return queryset
+        from shifts.availability import exclude_busy
+        from shifts.models import slot_bounds
+
+        start = self.form.cleaned_data.get('available_from') or datetime.time(0)
+        end = self.form.cleaned_data.get('available_to') or datetime.time(0)
+        queryset = filter_available(queryset, date, start, end)
+        return exclude_busy(queryset, *slot_bounds(date, start, end))
+
+
+class HospitalProfileFilter(django_filters.FilterSet):
+    department = TagFilter(field_name='departments', match_param='department_match')
+
+    class Meta:
+        model = HospitalProfile
+        fields = ['department', 'city', 'state']
@@ -0,0 +1,192 @@
+"""
+Bulk CSV import of worker and hospital accounts with their profiles.
+
+The CSV is read a row at a time and each row is validated with the model
+field validators. Username and license uniqueness is checked against sets
+of existing values loaded once up front, plus the rows already accepted
+from the file, so validation costs no queries per row. Valid rows are
+inserted in chunks: the chunk's passwords are hashed in a process pool
+(from the management command; the admin upload hashes in-process), then
+users and profiles go in through ``bulk_create``, followed by the
+availability and tag rows that the profile ``post_save`` signals would
+otherwise have written.
+
+Rows that fail validation are skipped and reported as ``{'line',
+'username', 'errors'}`` with ``errors`` mapping field names to messages.
+"""
+
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .availability import add_availability
+from .models import User, WorkerProfile, HospitalProfile
+from .tags import add_tags, uses_tag_table
+
+
+USER_COLUMNS = ['username', 'email', 'password', 'first_name', 'last_name', 'phone_number',
+                'address', 'city', 'state', 'zip_code', 'country']
+
+PROFILE_COLUMNS = {
+    'worker': ['license_number', 'specialties', 'experience_years', 'certifications',
+               'availability', 'hourly_rate', 'country'],
+    'hospital': ['hospital_name', 'license_number', 'address', 'city', 'state', 'zip_code',
+                 'phone', 'website', 'departments', 'bed_count', 'country', 'timezone'],
+}
+
+REQUIRED_COLUMNS = {
+    'worker': ['username', 'license_number'],
+    'hospital': ['username', 'hospital_name', 'license_number', 'address', 'city', 'state',
+                 'zip_code', 'phone'],
+}
+
+PROFILE_MODELS = {'worker': WorkerProfile, 'hospital': HospitalProfile}
+
+# JSON list columns are written as "ICU;ER;Cardiology".
+LIST_COLUMNS = {'specialties', 'certifications', 'departments'}
+LIST_SEPARATOR = ';'
+
+# Below this many passwords a pool costs more to start than it saves.
+MIN_POOL_PASSWORDS = 8
+
+
+def _values(row, columns):
+    """Non-blank cells of ``row`` for ``columns``; blank cells fall back to the model default."""
+    return {column: row[column].strip() for column in columns if (row.get(column) or '').strip()}
+
+
+def _profile_values(row, kind, errors):
+    values = _values(row, PROFILE_COLUMNS[kind])
+    for column in LIST_COLUMNS & values.keys():
+        values[column] = [item.strip() for item in values[column].split(LIST_SEPARATOR) if item.strip()]
+    if 'availability' in values:
+        try:
+            values['availability'] = json.loads(values['availability'])
+        except ValueError:
+            values['availability'] = None
+        if not isinstance(values['availability'], dict):
+            errors['availability'] = ['Must be a JSON object such as {"monday": ["08:00-20:00"]}']
+            del values['availability']
+    return values
+
+
+def stage_row(row, kind):
+    """``(user, profile, password, errors)`` for one CSV row; nothing is saved."""
+    errors = {}
+    values = _values(row, USER_COLUMNS)
+    password = values.pop('password', None)
+    user = User(user_type=kind, **values)
+    try:
+        user.full_clean(exclude=['password'], validate_unique=False)
+    except ValidationError as exc:
+        errors.update(exc.message_dict)
+
+    profile = PROFILE_MODELS[kind](**_profile_values(row, kind, errors))
+    try:
+        # JSON columns are shaped above; empty lists would fail the not-blank check.
+        profile.full_clean(exclude=['user', 'availability', *LIST_COLUMNS],
+                           validate_unique=False, validate_constraints=False)
+    except ValidationError as exc:
+        for field, messages in exc.message_dict.items():
+            errors.setdefault(field, []).extend(messages)
+    return user, profile, password, errors
+
+
+def hash_passwords(passwords, processes=None):
+    """
+    ``make_password`` for each password (``None`` gives an unusable one),
+    spread over ``processes`` worker processes.
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes <= 1 or len(passwords) < MIN_POOL_PASSWORDS:
+        return [make_password(password) for password in passwords]
+    # Forked children inherit the configured settings; they never touch the database.
+    with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('fork')) as pool:
+        return list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (processes * 4))))
+
+
+def _insert(kind, staged, batch_size, processes):
+    hashes = hash_passwords([password for _, _, password, _ in staged], processes)
+    users = []
+    for (user, _, _, _), password in zip(staged, hashes):
+        user.password = password
+        users.append(user)
+    with transaction.atomic():
+        User.objects.bulk_create(users, batch_size=batch_size)
+        profiles = []
+        for user, profile, _, _ in staged:
+            profile.user = user
+            profiles.append(profile)
+        PROFILE_MODELS[kind].objects.bulk_create(profiles, batch_size=batch_size)
+        if kind == 'worker':
+            add_availability(profiles, batch_size)
+        if uses_tag_table():
+            add_tags(profiles, batch_size)
+    return len(users)
+
+
+def import_accounts(lines, kind, batch_size=1000, processes=None, dry_run=False):
+    """
+    Import ``kind`` ('worker' or 'hospital') accounts from CSV ``lines`` (an
+    open text file or any iterable of lines) and return ``{'rows', 'valid',
+    'created', 'errors'}``. ``dry_run`` validates without writing anything.
+    """
+    if kind not in PROFILE_MODELS:
+        raise ValueError(f'Unknown account type {kind!r}')
+    reader = csv.DictReader(lines)
+    missing = [column for column in REQUIRED_COLUMNS[kind] if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f'CSV is missing required columns: {", ".join(missing)}')
+
+    usernames = set(User.objects.values_list('username', flat=True))
+    licenses = set(PROFILE_MODELS[kind].objects.values_list('license_number', flat=True))
+    result = {'rows': 0, 'valid': 0, 'created': 0, 'errors': []}
+    staged = []
+
+    def flush():
+        try:
+            result['created'] += _insert(kind, staged, batch_size, processes)
+        except IntegrityError as exc:
+            # Another writer took a username or license since they were loaded.
+            for _, _, _, line in staged:
+                result['errors'].append({'line': line[0], 'username': line[1], 'errors': {'__all__': [str(exc)]}})
+        staged.clear()
+
+    for row in reader:
+        line = reader.line_num
+        result['rows'] += 1
+        user, profile, password, errors = stage_row(row, kind)
+        if user.username in usernames:
+            errors.setdefault('username', []).append('A user with that username already exists.')
+        if profile.license_number in licenses:
+            errors.setdefault('license_number', []).append('This license number is already registered.')
+        if errors:
+            result['errors'].append({'line': line, 'username': user.username, 'errors': errors})
+            continue
+        usernames.add(user.username)
+        licenses.add(profile.license_number)
+        result['valid'] += 1
+        if dry_run:
+            continue
+        staged.append((user, profile, password, (line, user.username)))
+        if len(staged) >= batch_size:
+            flush()
+    if staged:
+        flush()
+    return result
+
+
+def write_error_report(errors, stream):
+    """Write ``errors`` from ``import_accounts`` as CSV, one message per row."""
+    writer = csv.writer(stream)
+    writer.writerow(['line', 'username', 'field', 'message'])
+    for error in errors:
+        for field, messages in error['errors'].items():
+            for message in messages:
+                writer.writerow([error['line'], error['username'], field, message])
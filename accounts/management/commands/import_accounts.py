@@ -0,0 +1,48 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.imports import import_accounts, write_error_report
+
+
+class Command(BaseCommand):
+    help = 'Import worker or hospital accounts with their profiles from a CSV roster'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file, or '-' for standard input")
+        parser.add_argument('--type', choices=['worker', 'hospital'], required=True, dest='kind',
+                            help='Account type of every row')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows hashed and inserted per chunk')
+        parser.add_argument('--processes', type=int, default=None,
+                            help='Password hashing processes (default: one per CPU)')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only; write nothing')
+        parser.add_argument('--report', help='Write the per-row error report to this CSV file')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            if options['path'] == '-':
+                result = self._import(sys.stdin, options)
+            else:
+                with open(options['path'], newline='', encoding='utf-8-sig') as lines:
+                    result = self._import(lines, options)
+        except (OSError, ValueError) as exc:
+            raise CommandError(exc)
+
+        if options['report']:
+            with open(options['report'], 'w', newline='') as report:
+                write_error_report(result['errors'], report)
+        else:
+            for error in result['errors'][:50]:
+                messages = '; '.join(f'{field}: {" ".join(msgs)}' for field, msgs in error['errors'].items())
+                self.stdout.write(self.style.WARNING(f"  line {error['line']} ({error['username']}): {messages}"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['rows']} rows, {result['valid']} valid, {result['created']} created, "
+            f"{len(result['errors'])} rejected in {time.perf_counter() - started:.1f}s"
+        ))
+
+    def _import(self, lines, options):
+        return import_accounts(lines, options['kind'], batch_size=options['batch_size'],
+                               processes=options['processes'], dry_run=options['dry_run'])
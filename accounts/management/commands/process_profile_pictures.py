@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import User
+from accounts.pictures import is_processed, process_picture
+
+
+class Command(BaseCommand):
+    help = 'Strip and thumbnail profile pictures uploaded before processing existed (or whose job failed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Pictures processed at once')
+
+    def handle(self, *args, **options):
+        pending = [
+            (pk, name) for pk, name, thumbnails in
+            User.objects.exclude(profile_picture='').exclude(profile_picture=None)
+            .values_list('pk', 'profile_picture', 'profile_thumbnails')
+            if not is_processed(name, thumbnails)
+        ]
+        failed = 0
+        with ThreadPoolExecutor(options['workers']) as pool:
+            futures = [(pk, name, pool.submit(process_picture, pk, name)) for pk, name in pending]
+            for pk, name, future in futures:
+                try:
+                    future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f'User {pk}, {name}: {exc}')
+        self.stdout.write(self.style.SUCCESS(f'Processed {len(pending) - failed} profile pictures, {failed} failed'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import WorkerProfile, HospitalProfile
+from accounts.tags import rebuild_tags, uses_tag_table
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the normalized profile tag table used for list filters on SQLite'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='bulk_create batch size')
+
+    def handle(self, *args, **options):
+        if not uses_tag_table():
+            self.stdout.write(self.style.WARNING(
+                'This database filters JSON lists through GIN indexes; no tag table needed'
+            ))
+            return
+
+        for model in (WorkerProfile, HospitalProfile):
+            written = rebuild_tags(model, batch_size=options['batch_size'])
+            self.stdout.write(f'{model.__name__}: {written} tags')
+        self.stdout.write(self.style.SUCCESS('Profile tags rebuilt'))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_user_address_user_city_user_country_user_state_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workerprofile',
+            name='rating_histogram',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
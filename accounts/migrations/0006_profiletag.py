@@ -0,0 +1,75 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+GIN_INDEXES = [
+    ('accounts_workerprofile', 'specialties'),
+    ('accounts_workerprofile', 'certifications'),
+    ('accounts_hospitalprofile', 'departments'),
+]
+
+TAG_FIELDS = {
+    'WorkerProfile': {'specialties': 'specialty', 'certifications': 'certification'},
+    'HospitalProfile': {'departments': 'department'},
+}
+
+
+def create_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, column in GIN_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {table}_{column}_gin '
+            f'ON {table} USING gin ({column} jsonb_path_ops)'
+        )
+
+
+def drop_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, column in GIN_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_{column}_gin')
+
+
+def backfill_tags(apps, schema_editor):
+    if schema_editor.connection.features.supports_json_field_contains:
+        return
+    ProfileTag = apps.get_model('accounts', 'ProfileTag')
+    db = schema_editor.connection.alias
+    rows = []
+    for model_name, fields in TAG_FIELDS.items():
+        model = apps.get_model('accounts', model_name)
+        for profile in model.objects.using(db).iterator():
+            for field, kind in fields.items():
+                for value in set(getattr(profile, field) or []):
+                    if isinstance(value, str) and value:
+                        rows.append(ProfileTag(user_id=profile.user_id, kind=kind, value=value[:100]))
+    ProfileTag.objects.using(db).bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_workerprofile_rating_histogram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('specialty', 'Specialty'), ('certification', 'Certification'), ('department', 'Department')], max_length=20)),
+                ('value', models.CharField(max_length=100)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='profile_tags', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'value', 'user'], name='accounts_pr_kind_feeab1_idx')],
+                'unique_together': {('user', 'kind', 'value')},
+            },
+        ),
+        migrations.RunPython(create_gin_indexes, drop_gin_indexes),
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
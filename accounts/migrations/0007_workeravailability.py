@@ -0,0 +1,106 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Copied from accounts.availability as of this migration, so later changes
+# to the app code cannot change (or break) what it does.
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+def _weekday(key):
+    key = str(key).strip().lower()[:3]
+    for index, name in enumerate(WEEKDAYS):
+        if name.startswith(key):
+            return index
+    return None
+
+
+def _minutes(value):
+    hours, _, minutes = str(value).strip().partition(':')
+    total = int(hours) * 60 + int(minutes or 0)
+    if not 0 <= total <= MINUTES_PER_DAY:
+        raise ValueError(value)
+    return total
+
+
+def _ranges(value):
+    if value is True:
+        yield 0, MINUTES_PER_DAY
+        return
+    if isinstance(value, (str, dict)):
+        value = [value]
+    for item in value or []:
+        try:
+            if isinstance(item, dict):
+                start, end = _minutes(item['start']), _minutes(item['end'])
+            else:
+                start, end = (_minutes(part) for part in str(item).split('-', 1))
+        except (KeyError, TypeError, ValueError):
+            continue
+        yield start, end
+
+
+def parse_availability(data):
+    intervals = []
+    if not isinstance(data, dict):
+        return intervals
+    for key, value in data.items():
+        day = _weekday(key)
+        if day is None:
+            continue
+        for start, end in _ranges(value):
+            if end <= start:
+                end += MINUTES_PER_DAY
+            start += day * MINUTES_PER_DAY
+            end += day * MINUTES_PER_DAY
+            if end <= MINUTES_PER_WEEK:
+                intervals.append((start, end))
+            else:
+                intervals += [(start, MINUTES_PER_WEEK), (0, end - MINUTES_PER_WEEK)]
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(interval) for interval in merged]
+
+
+def backfill_windows(apps, schema_editor):
+    WorkerProfile = apps.get_model('accounts', 'WorkerProfile')
+    WorkerAvailability = apps.get_model('accounts', 'WorkerAvailability')
+    db = schema_editor.connection.alias
+    rows = [
+        WorkerAvailability(user_id=profile.user_id, start_minute=start, end_minute=end)
+        for profile in WorkerProfile.objects.using(db).iterator()
+        for start, end in parse_availability(profile.availability)
+    ]
+    WorkerAvailability.objects.using(db).bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_profiletag'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkerAvailability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_minute', models.PositiveIntegerField()),
+                ('end_minute', models.PositiveIntegerField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_windows', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['start_minute', 'end_minute', 'user'], name='accounts_wo_start_m_99f7a3_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_windows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:42
+
+import accounts.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_workeravailability'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hospitalprofile',
+            name='timezone',
+            field=models.CharField(default='UTC', help_text="IANA time zone the hospital's shift times are given in", max_length=64, validators=[accounts.models.validate_timezone]),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-19 16:51
+
+import accounts.pictures
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_hospitalprofile_timezone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_thumbnails',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='profile_picture',
+            field=models.ImageField(blank=True, null=True, upload_to='profile_pictures/', validators=[accounts.pictures.validate_picture]),
+        ),
+    ]
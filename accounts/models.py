@@ -1,7 +1,39 @@
-from django.contrib.auth.models import AbstractUser
+import zoneinfo
+
+from django.conf import settings
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.core.validators import RegexValidator
 
+from .pictures import validate_picture
+
+
+def validate_timezone(value):
+    try:
+        zoneinfo.ZoneInfo(value)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        raise ValidationError(f'{value!r} is not a known IANA time zone')
+
+
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # update() sends no signals, so cached JWT claims are dropped here.
+        from .authentication import CLAIM_FIELDS, invalidate_user
+
+        if not set(kwargs) & set(CLAIM_FIELDS):
+            return super().update(**kwargs)
+        user_ids = list(self.values_list('pk', flat=True))
+        rows = super().update(**kwargs)
+        for user_id in user_ids:
+            invalidate_user(user_id)
+        return rows
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
+    # Migrations get a plain manager rather than importing this module.
+    use_in_migrations = False
+
 
 class User(AbstractUser):
     USER_TYPE_CHOICES = [
@@ -22,7 +54,11 @@ class User(AbstractUser):
         blank=True,
         null=True
     )
-    profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True)
+    profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True,
+                                        validators=[validate_picture])
+    # Thumbnail file names per size and format, for the picture named in 'source'
+    # (see accounts/pictures.py)
+    profile_thumbnails = models.JSONField(default=dict, blank=True)
     is_verified = models.BooleanField(default=False)
     
     # Address fields
@@ -35,12 +71,23 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = UserManager()
+    
     class Meta:
         db_table = 'auth_user'
     
     def __str__(self):
         return f"{self.username} ({self.get_user_type_display()})"
     
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Users resolved from cached JWT claims only have a few fields loaded;
+        # fetch all deferred fields on first access instead of one per query.
+        if fields is not None:
+            deferred = self.get_deferred_fields()
+            if deferred and set(fields) <= deferred:
+                fields = deferred
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+    
     @property
     def full_address(self):
         """Returns the complete address as a string"""
@@ -68,6 +115,7 @@ class WorkerProfile(models.Model):
     hourly_rate = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
     rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
     total_reviews = models.PositiveIntegerField(default=0)
+    rating_histogram = models.JSONField(default=dict, blank=True)  # Review count per star value
     is_available = models.BooleanField(default=True)
     country = models.CharField(max_length=2, default='US', help_text='ISO 3166-1 alpha-2 country code')
     
@@ -89,6 +137,69 @@ class HospitalProfile(models.Model):
     bed_count = models.PositiveIntegerField(default=0)
     is_verified = models.BooleanField(default=False)
     country = models.CharField(max_length=2, default='US', help_text='ISO 3166-1 alpha-2 country code')
+    timezone = models.CharField(max_length=64, default=settings.TIME_ZONE, validators=[validate_timezone],
+                                help_text='IANA time zone the hospital\'s shift times are given in')
+    
+    # Time zone as last stored, so shifts are re-timed only when it changes.
+    loaded_timezone = None
+    # Country as last stored, so pay benchmarks regroup its shifts when it changes.
+    loaded_country = None
+    
+    def __str__(self):
+        return self.hospital_name 
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_timezone = instance.__dict__.get('timezone')
+        instance.loaded_country = instance.__dict__.get('country')
+        return instance
+    
+    @property
+    def tzinfo(self):
+        return zoneinfo.ZoneInfo(self.timezone)
+
+class ProfileTag(models.Model):
+    """
+    One row per entry of a profile's JSON tag lists (specialties,
+    certifications, departments).
+
+    Only maintained on databases without JSON containment lookups (SQLite),
+    where it backs the list filters; PostgreSQL uses GIN indexes on the JSON
+    columns instead.
+    """
+    KIND_CHOICES = [
+        ('specialty', 'Specialty'),
+        ('certification', 'Certification'),
+        ('department', 'Department'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='profile_tags')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    value = models.CharField(max_length=100)
+    
+    class Meta:
+        unique_together = ['user', 'kind', 'value']
+        indexes = [models.Index(fields=['kind', 'value', 'user'])]
+    
+    def __str__(self):
+        return f"{self.user_id} {self.kind}: {self.value}"
+
+
+class WorkerAvailability(models.Model):
+    """
+    Weekly availability window derived from ``WorkerProfile.availability``.
+
+    Minutes are counted from Monday 00:00, so an overnight window such as
+    Monday 19:00-07:00 is a single interval; windows crossing Sunday midnight
+    are split in two. Rows are rebuilt whenever the profile is saved.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='availability_windows')
+    start_minute = models.PositiveIntegerField()
+    end_minute = models.PositiveIntegerField()
+    
+    class Meta:
+        indexes = [models.Index(fields=['start_minute', 'end_minute', 'user'])]
     
     def __str__(self):
-        return self.hospital_name 
\ No newline at end of file
+        return f"{self.user_id}: {self.start_minute}-{self.end_minute}"
@@ -0,0 +1,174 @@
+"""
+Profile picture processing.
+
+Uploads are checked on the request path (``validate_picture``: size, pixel
+count and format, reading only the image header). Everything else happens
+after commit on a small thread pool (``PROFILE_PICTURE_WORKERS``):
+- the picture is decoded once and re-encoded without EXIF and other
+  metadata, upright and at most ``PROFILE_PICTURE_MAX_SIDE`` pixels;
+- square WebP and JPEG thumbnails are made for each of
+  ``PROFILE_PICTURE_SIZES``.
+
+Files are named after a hash of the uploaded bytes, in a per-user
+directory that ``upload_to`` cannot produce, so a URL never changes
+content and can be cached as immutable. The user row is then switched to
+the processed files, unless a newer upload replaced the picture in the
+meantime, and the raw upload and the previous processed files are
+deleted. A picture counts as processed when ``profile_thumbnails`` names
+it as their source; its file name proves nothing.
+"""
+
+import hashlib
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+
+# Uploaded file names lose any directory part, so nothing uploaded lands here.
+PROCESSED_DIR = 'profile_pictures/processed'
+
+_executor = None
+
+
+def validate_picture(file):
+    """Reject uploads that are too large, not an image or in an unsupported format."""
+    # Pillow is imported where it is used, keeping it out of process startup.
+    from PIL import Image, UnidentifiedImageError
+
+    if getattr(file, '_committed', False):
+        return  # already stored, checked when it was uploaded
+    if file.size > settings.PROFILE_PICTURE_MAX_BYTES:
+        raise ValidationError(f'Profile pictures may be at most {settings.PROFILE_PICTURE_MAX_BYTES // 2**20} MB.')
+    position = file.tell()
+    try:
+        with Image.open(file) as image:
+            kind, (width, height) = image.format, image.size
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise ValidationError('Upload a valid image.')
+    finally:
+        file.seek(position)
+    if kind not in FORMATS:
+        raise ValidationError(f'Profile pictures must be one of: {", ".join(FORMATS)}.')
+    if width * height > settings.PROFILE_PICTURE_MAX_PIXELS:
+        raise ValidationError('The picture has too many pixels.')
+
+
+def _encode(image, fmt, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def render_picture(data):
+    """
+    ``{None: jpeg}`` for the full picture plus ``{(size, 'webp'|'jpeg'): bytes}``
+    per thumbnail size, all without metadata.
+    """
+    from PIL import Image, ImageOps
+
+    max_side = settings.PROFILE_PICTURE_MAX_SIDE
+    with Image.open(io.BytesIO(data)) as image:
+        # Lets JPEG decode at a reduced scale when the original is much larger.
+        image.draft('RGB', (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGBA')
+            flat = Image.new('RGB', image.size, 'white')
+            flat.paste(image, mask=image.getchannel('A'))
+            image = flat
+        # A fresh image carries pixels only: no EXIF, ICC profile or comments.
+        clean = Image.new(image.mode, image.size)
+        clean.paste(image)
+    clean = clean.convert('RGB')
+
+    full = clean.copy()
+    full.thumbnail((max_side, max_side), Image.LANCZOS)
+    rendered = {None: _encode(full, 'JPEG', quality=85, optimize=True, progressive=True)}
+    for size, side in settings.PROFILE_PICTURE_SIZES.items():
+        thumbnail = ImageOps.fit(clean, (side, side), Image.LANCZOS)
+        rendered[size, 'webp'] = _encode(thumbnail, 'WEBP', quality=80, method=4)
+        rendered[size, 'jpeg'] = _encode(thumbnail, 'JPEG', quality=85, optimize=True, progressive=True)
+    return rendered
+
+
+def _store(name, content):
+    # Same name, same bytes: a file already written by an earlier run is kept.
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(content))
+    return name
+
+
+def is_processed(name, thumbnails):
+    """Whether ``name`` is a picture ``process_picture`` wrote, judged by the user's thumbnails."""
+    return bool(name) and (thumbnails or {}).get('source') == name
+
+
+def _file_names(thumbnails):
+    return {thumbnails.get('source'), *(
+        name for size in thumbnails.values() if isinstance(size, dict) for name in size.values()
+    )} - {None}
+
+
+def process_picture(user_id, upload_name):
+    """Replace ``user_id``'s raw ``upload_name`` with the processed picture and thumbnails."""
+    from .models import User
+
+    with default_storage.open(upload_name, 'rb') as upload:
+        data = upload.read()
+    prefix = f'{PROCESSED_DIR}/{user_id}/{hashlib.sha256(data).hexdigest()[:20]}'
+    rendered = render_picture(data)
+    picture = _store(f'{prefix}.jpg', rendered.pop(None))
+    thumbnails = {'source': picture}
+    for (size, fmt), content in rendered.items():
+        extension = 'jpg' if fmt == 'jpeg' else fmt
+        thumbnails.setdefault(size, {})[fmt] = _store(f'{prefix}_{size}.{extension}', content)
+    with transaction.atomic():
+        # Only if the upload is still the user's picture; a newer one has its own job.
+        previous = (User.objects.select_for_update().filter(pk=user_id, profile_picture=upload_name)
+                    .values_list('profile_thumbnails', flat=True).first())
+        if previous is None:
+            return 0
+        User.objects.filter(pk=user_id).update(profile_picture=picture, profile_thumbnails=thumbnails)
+    # Only files in the user's own directory: no other user can be pointing at them.
+    replaced = {name for name in _file_names(previous) if name.startswith(f'{PROCESSED_DIR}/{user_id}/')}
+    for name in ({upload_name} | replaced) - _file_names(thumbnails):
+        default_storage.delete(name)
+    return 1
+
+
+def _run(user_id, upload_name):
+    close_old_connections()
+    try:
+        process_picture(user_id, upload_name)
+    except Exception:
+        logger.exception('Processing profile picture %s of user %s failed', upload_name, user_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_processing(user_id, upload_name):
+    """Process the upload on the picture thread pool, or right away with no pool configured."""
+    global _executor
+    if not settings.PROFILE_PICTURE_WORKERS:
+        return process_picture(user_id, upload_name)
+    if _executor is None:
+        _executor = ThreadPoolExecutor(settings.PROFILE_PICTURE_WORKERS, thread_name_prefix='profile-pictures')
+    return _executor.submit(_run, user_id, upload_name)
+
+
+def thumbnail_names(user):
+    """``{size: {'webp': name, 'jpeg': name}}`` for ``user``'s current picture; empty until processed."""
+    thumbnails = user.profile_thumbnails or {}
+    if not is_processed(user.profile_picture.name, thumbnails):
+        return {}
+    return {size: thumbnails[size] for size in settings.PROFILE_PICTURE_SIZES if size in thumbnails}
@@ -1,18 +1,39 @@
 from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
 from django.contrib.auth import authenticate
+from django.core.files.storage import default_storage
 from .models import User, WorkerProfile, HospitalProfile
+from .pictures import thumbnail_names
+from .tokens import RefreshToken
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class ProfilePictureSizesField(serializers.Field):
+    """Thumbnail URLs of the user's picture as ``{size: {'webp': url, 'jpeg': url}}``; empty until processed."""
+    
+    def __init__(self, **kwargs):
+        super().__init__(source='*', read_only=True, **kwargs)
+    
+    def to_representation(self, user):
+        request = self.context.get('request')
+        
+        def url(name):
+            url = default_storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+        return {size: {fmt: url(name) for fmt, name in formats.items()}
+                for size, formats in thumbnail_names(user).items()}
+
+
 class UserSerializer(serializers.ModelSerializer):
     full_address = serializers.ReadOnlyField()
+    profile_picture_sizes = ProfilePictureSizesField()
     
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'user_type', 
-                 'phone_number', 'profile_picture', 'is_verified', 'date_joined',
+                 'phone_number', 'profile_picture', 'profile_picture_sizes', 'is_verified', 'date_joined',
                  'address', 'city', 'state', 'zip_code', 'country', 'full_address']
         read_only_fields = ['id', 'date_joined']
 
@@ -23,7 +44,7 @@ class WorkerProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = WorkerProfile
         fields = '__all__'
-        read_only_fields = ['rating', 'total_reviews']
+        read_only_fields = ['rating', 'total_reviews', 'rating_histogram']
 
 
 class HospitalProfileSerializer(serializers.ModelSerializer):
@@ -55,14 +76,13 @@ class RegisterSerializer(serializers.ModelSerializer):
         return attrs
     
     def create(self, validated_data):
-        logger.info(f"Creating user with data: {validated_data}")
         validated_data.pop('password_confirm')
         try:
             user = User.objects.create_user(**validated_data)
-            logger.info(f"User created successfully: {user.username} (ID: {user.id})")
+            logger.debug("User created: %s (ID: %s)", user.username, user.id)
             return user
         except Exception as e:
-            logger.error(f"Error in create_user: {str(e)}")
+            logger.error("Error in create_user: %s", e)
             raise e
 
 
@@ -102,8 +122,11 @@ class HospitalProfileCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = HospitalProfile
         fields = ['hospital_name', 'license_number', 'address', 'city', 'state', 
-                 'zip_code', 'phone', 'website', 'departments', 'bed_count', 'country']
+                 'zip_code', 'phone', 'website', 'departments', 'bed_count', 'country', 'timezone']
     
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
-        return super().create(validated_data) 
\ No newline at end of file
+        return super().create(validated_data) 
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    token_class = RefreshToken
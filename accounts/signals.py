@@ -0,0 +1,49 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .authentication import invalidate_user
+from .availability import sync_availability
+from .models import User, WorkerProfile, HospitalProfile
+from .pictures import is_processed, schedule_processing
+from .tags import clear_tags, sync_tags, uses_tag_table
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_claims(sender, instance, **kwargs):
+    # Covers profile edits, deactivation and user_type changes; updates
+    # through User.objects are handled by UserQuerySet.update().
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def process_profile_picture(sender, instance, update_fields=None, **kwargs):
+    # A deferred picture was not assigned, so this save did not change it.
+    if 'profile_picture' not in instance.__dict__:
+        return
+    if update_fields is not None and 'profile_picture' not in update_fields:
+        return
+    name = instance.profile_picture.name
+    if name and not is_processed(name, instance.profile_thumbnails):
+        user_id = instance.pk
+        transaction.on_commit(lambda: schedule_processing(user_id, name))
+
+
+@receiver(post_save, sender=WorkerProfile)
+@receiver(post_save, sender=HospitalProfile)
+def sync_profile_tags(sender, instance, using, **kwargs):
+    if uses_tag_table(using):
+        sync_tags(instance, using)
+
+
+@receiver(post_delete, sender=WorkerProfile)
+@receiver(post_delete, sender=HospitalProfile)
+def clear_profile_tags(sender, instance, using, **kwargs):
+    if uses_tag_table(using):
+        clear_tags(instance, using)
+
+
+@receiver(post_save, sender=WorkerProfile)
+def sync_worker_availability(sender, instance, using, **kwargs):
+    sync_availability(instance, using)
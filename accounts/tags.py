@@ -0,0 +1,96 @@
+"""
+Filtering profiles by the entries of their JSON tag lists.
+
+On PostgreSQL the JSON columns are queried with ``@>`` containment, served by
+GIN indexes. Backends without JSON containment (SQLite) use the normalized
+``ProfileTag`` table, which is kept in sync whenever a profile is saved or
+deleted.
+"""
+
+from functools import reduce
+import operator
+
+from django.db import connections, transaction
+from django.db.models import Count, Q
+
+from .models import WorkerProfile, HospitalProfile, ProfileTag
+
+
+# JSON list field -> tag kind, per profile model
+TAG_FIELDS = {
+    WorkerProfile: {'specialties': 'specialty', 'certifications': 'certification'},
+    HospitalProfile: {'departments': 'department'},
+}
+
+
+def uses_tag_table(using='default'):
+    return not connections[using].features.supports_json_field_contains
+
+
+def _tag_rows(profile):
+    for field, kind in TAG_FIELDS[type(profile)].items():
+        for value in set(getattr(profile, field) or []):
+            if isinstance(value, str) and value:
+                yield ProfileTag(user_id=profile.user_id, kind=kind, value=value[:100])
+
+
+def sync_tags(profile, using='default'):
+    """Rewrite the tag rows for one profile."""
+    kinds = TAG_FIELDS[type(profile)].values()
+    with transaction.atomic(using=using):
+        ProfileTag.objects.using(using).filter(user_id=profile.user_id, kind__in=kinds).delete()
+        ProfileTag.objects.using(using).bulk_create(_tag_rows(profile))
+
+
+def clear_tags(profile, using='default'):
+    """Remove the tag rows of a deleted profile."""
+    kinds = TAG_FIELDS[type(profile)].values()
+    ProfileTag.objects.using(using).filter(user_id=profile.user_id, kind__in=kinds).delete()
+
+
+def add_tags(profiles, batch_size=1000, using='default'):
+    """Write tag rows for freshly bulk-created profiles (no signals fire there)."""
+    rows = [row for profile in profiles for row in _tag_rows(profile)]
+    ProfileTag.objects.using(using).bulk_create(rows, batch_size=batch_size)
+
+
+def rebuild_tags(model, batch_size=1000, using='default'):
+    """Rebuild the tag table for every profile of ``model``; returns rows written."""
+    kinds = TAG_FIELDS[model].values()
+    fields = ['user_id', *TAG_FIELDS[model]]
+    written = 0
+    with transaction.atomic(using=using):
+        ProfileTag.objects.using(using).filter(kind__in=kinds).delete()
+        rows = []
+        for profile in model.objects.using(using).only(*fields).iterator(chunk_size=batch_size):
+            rows.extend(_tag_rows(profile))
+            if len(rows) >= batch_size:
+                ProfileTag.objects.using(using).bulk_create(rows, batch_size=batch_size)
+                written += len(rows)
+                rows = []
+        ProfileTag.objects.using(using).bulk_create(rows, batch_size=batch_size)
+        written += len(rows)
+    return written
+
+
+def filter_by_tags(queryset, field, values, match='any'):
+    """
+    Restrict ``queryset`` to profiles whose ``field`` list contains any (or,
+    with ``match='all'``, every one) of ``values``.
+    """
+    values = sorted(set(values))
+    if not values:
+        return queryset
+
+    if not uses_tag_table(queryset.db):
+        if match == 'all':
+            return queryset.filter(**{f'{field}__contains': values})
+        # One containment test per value so each is a GIN index scan.
+        return queryset.filter(reduce(operator.or_, (Q(**{f'{field}__contains': [v]}) for v in values)))
+
+    kind = TAG_FIELDS[queryset.model][field]
+    tags = ProfileTag.objects.using(queryset.db).filter(kind=kind, value__in=values)
+    if match == 'all':
+        tags = (tags.values('user_id').annotate(matched=Count('value', distinct=True))
+                .filter(matched=len(values)))
+    return queryset.filter(user_id__in=tags.values('user_id'))
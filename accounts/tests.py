@@ -0,0 +1,318 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.hashers import check_password
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+
+from .authentication import CachedJWTAuthentication, _local_blacklist, _local_users
+from .filters import HospitalProfileFilter, WorkerProfileFilter
+from .imports import import_accounts, hash_passwords
+from .models import User, WorkerProfile, HospitalProfile, ProfileTag, WorkerAvailability
+from .tokens import RefreshToken
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AccountImportTests(TestCase):
+    WORKERS = (
+        'username,email,password,first_name,license_number,specialties,availability,hourly_rate\n'
+        'ada,ada@example.com,s3cret,Ada,RN-1,ICU;ER,"{""monday"": [""08:00-20:00""]}",45\n'
+        'taken,t@example.com,,Tess,RN-2,,,\n'
+        'bola,bola@example.com,,Bola,RN-1,,,\n'
+        'chi,not-an-email,,Chi,RN-3,,[],abc\n'
+    )
+
+    def setUp(self):
+        User.objects.create_user('taken', password='x')
+
+    def test_import_validates_against_preloaded_sets(self):
+        result = import_accounts(self.WORKERS.splitlines(keepends=True), 'worker', processes=1)
+        self.assertEqual((result['rows'], result['valid'], result['created']), (4, 1, 1))
+        self.assertEqual({error['line']: sorted(error['errors']) for error in result['errors']},
+                         {3: ['username'], 4: ['license_number'], 5: ['availability', 'email', 'hourly_rate']})
+
+        ada = User.objects.get(username='ada')
+        self.assertTrue(check_password('s3cret', ada.password))
+        self.assertEqual((ada.user_type, ada.worker_profile.specialties), ('worker', ['ICU', 'ER']))
+        self.assertEqual(WorkerAvailability.objects.filter(user=ada).count(), 1)
+
+        again = import_accounts(self.WORKERS.splitlines(keepends=True), 'worker', dry_run=True)
+        self.assertEqual((again['valid'], again['created']), (0, 0))
+
+    def test_hashing_in_a_process_pool(self):
+        hashes = hash_passwords([f'pw{i}' for i in range(8)] + [None], processes=2)
+        self.assertTrue(all(check_password(f'pw{i}', hashes[i]) for i in range(8)))
+        self.assertFalse(User(password=hashes[8]).has_usable_password())
+
+    def test_admin_upload(self):
+        admin = User.objects.create_superuser('root', 'root@example.com', 'x')
+        self.client.force_login(admin)
+        roster = SimpleUploadedFile('hospitals.csv', (
+            'username,hospital_name,license_number,address,city,state,zip_code,phone,departments,timezone\n'
+            'stmary,St Mary,H-1,1 Road,Lagos,LA,100001,+2341,ER;ICU,Africa/Lagos\n'
+            'stjohn,St John,H-2,2 Road,Lagos,LA,100001,+2342,,Mars/Base\n'
+        ).encode())
+        with mock.patch('accounts.imports.hash_passwords', wraps=hash_passwords) as hashing:
+            response = self.client.post('/admin/accounts/user/import/', {'csv_file': roster, 'kind': 'hospital'})
+        # Never forks a pool from a web worker.
+        self.assertEqual(hashing.call_args.args[1], 1)
+        self.assertContains(response, '2 rows read, 1 valid, 1 created')
+        self.assertContains(response, 'Mars/Base')
+        self.assertEqual(HospitalProfile.objects.get(user__username='stmary').departments, ['ER', 'ICU'])
+
+
+class ProfilePictureTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings_override = override_settings(MEDIA_ROOT=self.media, PROFILE_PICTURE_WORKERS=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user('nurse', password='x', user_type='worker')
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def photo(self, size=(300, 200), name='photo.jpg'):
+        from PIL import Image
+
+        image = Image.new('RGB', size, 'red')
+        exif = Image.Exif()
+        exif[0x0112] = 6  # orientation: rotate 90 degrees to display upright
+        exif[0x010F] = 'PhoneMaker'
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', exif=exif.tobytes())
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def upload(self, upload):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.api.put('/api/auth/profile/', {'profile_picture': upload}, format='multipart')
+
+    def test_upload_is_stripped_and_thumbnailed(self):
+        from PIL import Image
+
+        self.assertEqual(self.upload(self.photo()).status_code, 200)
+        self.user.refresh_from_db()
+        picture = self.user.profile_picture
+        self.assertRegex(picture.name, rf'^profile_pictures/processed/{self.user.id}/[0-9a-f]{{20}}\.jpg$')
+        with Image.open(picture.path) as stored:
+            self.assertEqual(stored.size, (200, 300))  # turned upright
+            self.assertFalse(stored.getexif())
+        # The raw upload is gone once the processed files replace it.
+        self.assertFalse(any(name.startswith('photo') for name in os.listdir(f'{self.media}/profile_pictures')))
+
+        sizes = self.api.get('/api/auth/profile/').json()['profile_picture_sizes']
+        self.assertEqual(set(sizes), {'small', 'medium', 'large'})
+        self.assertTrue(sizes['small']['webp'].startswith('/media/profile_pictures/'))
+        with Image.open(f'{self.media}/{self.user.profile_thumbnails["small"]["webp"]}') as thumbnail:
+            self.assertEqual((thumbnail.format, thumbnail.size), ('WEBP', (64, 64)))
+
+    def test_upload_named_like_a_processed_file_is_processed(self):
+        from PIL import Image
+
+        self.upload(self.photo(name='0123456789abcdef0123.jpg'))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.profile_picture.name.startswith('profile_pictures/processed/'))
+        with Image.open(self.user.profile_picture.path) as stored:
+            self.assertFalse(stored.getexif())
+        self.assertNotIn('0123456789abcdef0123.jpg', os.listdir(f'{self.media}/profile_pictures'))
+
+    def test_replaced_picture_files_are_deleted(self):
+        self.upload(self.photo())
+        self.user.refresh_from_db()
+        first = f'{self.media}/profile_pictures/processed/{self.user.id}'
+        old_files = set(os.listdir(first))
+        self.assertEqual(len(old_files), 7)  # the picture and two thumbnails per size
+
+        self.upload(self.photo((120, 120), name='second.jpg'))
+        self.user.refresh_from_db()
+        remaining = set(os.listdir(first))
+        self.assertFalse(remaining & old_files)
+        self.assertEqual(len(remaining), 7)
+        self.assertEqual(os.listdir(f'{self.media}/profile_pictures'), ['processed'])
+
+    def test_rejects_invalid_uploads(self):
+        response = self.upload(SimpleUploadedFile('photo.jpg', b'not an image', content_type='image/jpeg'))
+        self.assertEqual(response.status_code, 400)
+        with override_settings(PROFILE_PICTURE_MAX_PIXELS=1000):
+            self.assertEqual(self.upload(self.photo()).status_code, 400)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.profile_picture)
+
+    def test_stale_job_leaves_newer_upload(self):
+        from unittest import mock
+        from accounts.pictures import process_picture
+
+        with override_settings(PROFILE_PICTURE_WORKERS=1):
+            with mock.patch('accounts.signals.schedule_processing'):
+                self.upload(self.photo(name='first.jpg'))
+                self.user.refresh_from_db()
+                first = self.user.profile_picture.name
+                self.upload(self.photo((120, 120), name='second.jpg'))
+        self.assertEqual(process_picture(self.user.id, first), 0)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.profile_picture.name.startswith('profile_pictures/second'))
+        self.assertEqual(self.api.get('/api/auth/profile/').json()['profile_picture_sizes'], {})
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _local_users.clear()
+        _local_blacklist.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user('nurse', password='x', user_type='worker', email='n@example.com')
+        self.refresh = RefreshToken.for_user(self.user)
+
+    def authenticate(self, token=None):
+        token = token or self.refresh.access_token
+        request = APIRequestFactory().get('/api/shifts/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return CachedJWTAuthentication().authenticate(request)[0]
+
+    def test_warm_requests_skip_the_database(self):
+        with CaptureQueriesContext(connection) as cold:
+            self.authenticate()
+        # The claims, and the blacklist table for the refresh token.
+        self.assertEqual(len(cold), 2)
+        with CaptureQueriesContext(connection) as warm:
+            user = self.authenticate()
+        self.assertEqual(len(warm), 0)
+        self.assertEqual((user.pk, user.user_type), (self.user.pk, 'worker'))
+        # A process with nothing cached locally uses the shared cache.
+        _local_users.clear()
+        with CaptureQueriesContext(connection) as shared:
+            self.authenticate()
+        self.assertEqual(len(shared), 0)
+
+    def test_deferred_fields_load_in_one_query(self):
+        user = self.authenticate()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual((user.username, user.email, user.city), ('nurse', 'n@example.com', self.user.city))
+        self.assertEqual(len(queries), 1)
+
+    def test_deactivated_user_is_rejected_by_every_process(self):
+        self.authenticate()
+        stale = _local_users.get(self.user.pk)
+        self.user.is_active = False
+        self.user.save()
+        # Another worker still holding the old claims locally.
+        _local_users.set(self.user.pk, stale)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_queryset_update_invalidates_claims(self):
+        self.authenticate()
+        User.objects.filter(pk=self.user.pk).update(user_type='hospital')
+        self.assertEqual(self.authenticate().user_type, 'hospital')
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_logout_revokes_access_tokens(self):
+        access = self.refresh.access_token
+        self.authenticate(access)
+        api = APIClient()
+        api.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(api.post('/api/auth/logout/', {'refresh': str(self.refresh)}, format='json').status_code, 200)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(access)
+        # Other processes learn of it from the shared cache.
+        _local_blacklist.clear()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(access)
+        with self.assertRaises(TokenError):
+            RefreshToken(str(self.refresh))
+
+    def test_blacklist_table_backs_the_caches(self):
+        access = self.refresh.access_token
+        self.authenticate(access)
+        # Revoked in another process whose cache this one cannot see, or
+        # whose cache entry was evicted since.
+        self.refresh.blacklist()
+        cache.clear()
+        _local_blacklist.clear()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(access)
+        with self.assertRaises(TokenError):
+            RefreshToken(str(self.refresh))
+
+    def test_not_revoked_is_cached_briefly(self):
+        from accounts.authentication import is_blacklisted
+
+        jti = self.refresh['jti']
+        with CaptureQueriesContext(connection) as first:
+            self.assertFalse(is_blacklisted(jti))
+        with CaptureQueriesContext(connection) as again:
+            self.assertFalse(is_blacklisted(jti))
+        self.assertEqual((len(first), len(again)), (1, 0))
+        # Shared too, so other processes skip the query.
+        _local_blacklist.clear()
+        with CaptureQueriesContext(connection) as shared:
+            self.assertFalse(is_blacklisted(jti))
+        self.assertEqual(len(shared), 0)
+
+
+class ProfileTagTests(TestCase):
+    """The ``ProfileTag`` path SQLite uses, forced on so it also runs on PostgreSQL."""
+
+    def setUp(self):
+        for target in ('accounts.signals.uses_tag_table', 'accounts.tags.uses_tag_table'):
+            patcher = mock.patch(target, return_value=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.workers = {}
+        for name, specialties, certifications in (
+            ('ada', ['ICU', 'ER'], ['BLS']),
+            ('bola', ['ICU'], ['BLS', 'ACLS']),
+            ('chi', ['Pediatrics', 'ER'], []),
+        ):
+            user = User.objects.create(username=name, user_type='worker')
+            self.workers[name] = WorkerProfile.objects.create(
+                user=user, license_number=name, specialties=specialties, certifications=certifications,
+            )
+        hospital = User.objects.create(username='general', user_type='hospital')
+        self.hospital = HospitalProfile.objects.create(
+            user=hospital, hospital_name='General', license_number='H1', address='1 Road', city='Lagos',
+            state='LA', zip_code='100001', phone='1', departments=['ER', 'ICU'],
+        )
+
+    def workers_matching(self, query):
+        filterset = WorkerProfileFilter(QueryDict(query), queryset=WorkerProfile.objects.all())
+        return sorted(profile.user.username for profile in filterset.qs)
+
+    def tag_rows(self, user):
+        return sorted(ProfileTag.objects.filter(user=user).values_list('kind', 'value'))
+
+    def test_any_and_all(self):
+        self.assertEqual(self.workers_matching('specialty=ICU,ER'), ['ada', 'bola', 'chi'])
+        self.assertEqual(self.workers_matching('specialty=ICU&specialty=ER&specialty_match=all'), ['ada'])
+        self.assertEqual(self.workers_matching('specialty=ER&certification=BLS'), ['ada'])
+        self.assertEqual(self.workers_matching('certification=BLS,ACLS&certification_match=all'), ['bola'])
+        self.assertEqual(self.workers_matching('specialty=Surgery'), [])
+        hospitals = HospitalProfileFilter(QueryDict('department=ER,ICU&department_match=all'),
+                                          queryset=HospitalProfile.objects.all()).qs
+        self.assertEqual(list(hospitals), [self.hospital])
+
+    def test_tags_follow_profile_saves_and_deletes(self):
+        ada = self.workers['ada']
+        self.assertEqual(self.tag_rows(ada.user),
+                         [('certification', 'BLS'), ('specialty', 'ER'), ('specialty', 'ICU')])
+        ada.specialties = ['Surgery']
+        ada.certifications = ['BLS', 'BLS']
+        ada.save()
+        self.assertEqual(self.tag_rows(ada.user), [('certification', 'BLS'), ('specialty', 'Surgery')])
+        self.assertEqual(self.workers_matching('specialty=ICU'), ['bola'])
+
+        ada.delete()
+        self.assertEqual(self.tag_rows(ada.user), [])
+        self.hospital.delete()
+        self.assertEqual(self.tag_rows(self.hospital.user), [])
+        self.assertEqual(self.workers_matching('specialty=Surgery'), [])
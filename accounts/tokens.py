@@ -0,0 +1,28 @@
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+
+from .authentication import REFRESH_JTI_CLAIM, blacklist_jti, is_blacklisted
+
+
+class RefreshToken(BaseRefreshToken):
+    """
+    Refresh token whose access tokens carry the refresh ``jti``, so that
+    blacklisting the refresh token on logout also revokes them.
+    """
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        access[REFRESH_JTI_CLAIM] = self[api_settings.JTI_CLAIM]
+        return access
+
+    def check_blacklist(self):
+        if is_blacklisted(self[api_settings.JTI_CLAIM]):
+            raise TokenError("Token is blacklisted")
+        super().check_blacklist()
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklist_jti(self[api_settings.JTI_CLAIM], self['exp'])
+        return result
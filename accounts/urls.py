@@ -2,7 +2,7 @@ from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     RegisterView, LoginView, UserProfileView, WorkerProfileView, 
-    HospitalProfileView, WorkerListView, HospitalListView, logout
+    HospitalProfileView, WorkerListView, HospitalListView, WorkerEarningsView, logout
 )
 
 urlpatterns = [
@@ -15,6 +15,7 @@ urlpatterns = [
     # User Profile
     path('profile/', UserProfileView.as_view(), name='user_profile'),
     path('worker-profile/', WorkerProfileView.as_view(), name='worker_profile'),
+    path('worker-profile/earnings/', WorkerEarningsView.as_view(), name='worker_earnings'),
     path('hospital-profile/', HospitalProfileView.as_view(), name='hospital_profile'),
     
     # Lists
@@ -2,12 +2,17 @@ from rest_framework import status, generics, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
+from django.conf import settings
 from django.contrib.auth import authenticate
 from django.shortcuts import get_object_or_404
 import logging
 
+from medicall.currency import get_rate, is_currency_code
+from medicall.replicas import pin_signed_in
+from shifts.earnings import earnings_summary
 from .models import User, WorkerProfile, HospitalProfile
+from .tokens import RefreshToken
+from .filters import WorkerProfileFilter, HospitalProfileFilter
 from .serializers import (
     UserSerializer, WorkerProfileSerializer, HospitalProfileSerializer,
     RegisterSerializer, LoginSerializer, WorkerProfileCreateSerializer,
@@ -20,26 +25,25 @@ class RegisterView(APIView):
     permission_classes = [permissions.AllowAny]
     
     def post(self, request):
-        logger.info(f"Registration attempt received: {request.data}")
+        logger.debug("Registration attempt received", extra={'username': request.data.get('username')})
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
-            logger.info(f"Registration data is valid: {serializer.validated_data}")
             try:
                 user = serializer.save()
-                logger.info(f"User created successfully: {user.username} (ID: {user.id})")
                 refresh = RefreshToken.for_user(user)
+                pin_signed_in(request, user)
                 response_data = {
                     'user': UserSerializer(user).data,
                     'refresh': str(refresh),
                     'access': str(refresh.access_token),
                 }
-                logger.info(f"Registration successful for user: {user.username}")
+                logger.info("Registration successful for user %s (ID: %s)", user.username, user.id)
                 return Response(response_data, status=status.HTTP_201_CREATED)
             except Exception as e:
-                logger.error(f"Error creating user: {str(e)}")
+                logger.exception("Error creating user")
                 return Response({'detail': f'Error creating user: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         else:
-            logger.error(f"Registration validation failed: {serializer.errors}")
+            logger.info("Registration validation failed", extra={'fields': sorted(serializer.errors)})
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -51,6 +55,7 @@ class LoginView(APIView):
         if serializer.is_valid():
             user = serializer.validated_data['user']
             refresh = RefreshToken.for_user(user)
+            pin_signed_in(request, user)
             return Response({
                 'user': UserSerializer(user).data,
                 'refresh': str(refresh),
@@ -107,6 +112,26 @@ class WorkerProfileView(APIView):
             return Response({'detail': 'Worker profile not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
+class WorkerEarningsView(APIView):
+    """Monthly earnings from the ledger, converted to ``?currency=`` at one cached rate."""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        if request.user.user_type != 'worker':
+            return Response({'detail': 'Only workers have earnings'}, status=status.HTTP_403_FORBIDDEN)
+        
+        currency = request.query_params.get('currency', settings.PAY_CURRENCY).upper()
+        if not is_currency_code(currency):
+            return Response({'detail': f'Invalid currency code: {currency!r}'}, status=status.HTTP_400_BAD_REQUEST)
+        rate, source = get_rate(settings.PAY_CURRENCY, currency)
+        return Response({
+            'currency': currency,
+            'rate': rate,
+            'rate_source': source,
+            **earnings_summary(request.user, rate),
+        })
+
+
 class HospitalProfileView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
@@ -144,7 +169,7 @@ class WorkerListView(generics.ListAPIView):
     queryset = WorkerProfile.objects.filter(is_available=True)
     serializer_class = WorkerProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filterset_fields = ['specialties', 'experience_years', 'rating']
+    filterset_class = WorkerProfileFilter
     search_fields = ['user__username', 'user__first_name', 'user__last_name']
     ordering_fields = ['rating', 'experience_years', 'hourly_rate']
 
@@ -153,7 +178,7 @@ class HospitalListView(generics.ListAPIView):
     queryset = HospitalProfile.objects.filter(is_verified=True)
     serializer_class = HospitalProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filterset_fields = ['departments', 'city', 'state']
+    filterset_class = HospitalProfileFilter
     search_fields = ['hospital_name', 'city', 'state']
     ordering_fields = ['hospital_name', 'bed_count']
 
@@ -0,0 +1,17 @@
+from django.contrib import admin
+from .models import HospitalDailyStats
+
+
+@admin.register(HospitalDailyStats)
+class HospitalDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('hospital', 'day', 'department', 'role', 'shifts_posted', 'shifts_filled',
+                    'applicants', 'median_hours_to_fill', 'total_spend')
+    list_filter = ('day', 'department')
+    search_fields = ('hospital__username', 'department', 'role')
+    date_hierarchy = 'day'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
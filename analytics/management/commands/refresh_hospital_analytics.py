@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from analytics.rollups import refresh, rebuild_all
+
+
+class Command(BaseCommand):
+    help = ('Rebuild hospital analytics rollups for the days changed since the last run; '
+            'schedule it (e.g. every few minutes from cron)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rebuild every day, not just changed ones')
+        parser.add_argument('--batch-size', type=int, default=500, help='Days rebuilt per transaction')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['full']:
+            days = rebuild_all(batch_size=options['batch_size'])
+        else:
+            days = refresh(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {days} hospital-days in {time.perf_counter() - started:.1f}s'
+        ))
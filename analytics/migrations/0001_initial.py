@@ -0,0 +1,65 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def queue_existing_days(apps, schema_editor):
+    # The first scheduled refresh then builds rollups for all existing history.
+    Shift = apps.get_model('shifts', 'Shift')
+    StaleDay = apps.get_model('analytics', 'StaleDay')
+    db = schema_editor.connection.alias
+    pairs = Shift.objects.using(db).values_list('hospital_id', 'date').distinct()
+    StaleDay.objects.using(db).bulk_create(
+        (StaleDay(hospital_id=hospital_id, day=day) for hospital_id, day in pairs), batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('shifts', '0006_shift_interval_not_null'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HospitalDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('department', models.CharField(max_length=100)),
+                ('role', models.CharField(max_length=100)),
+                ('shifts_posted', models.PositiveIntegerField(default=0)),
+                ('shifts_filled', models.PositiveIntegerField(default=0)),
+                ('shifts_expired', models.PositiveIntegerField(default=0)),
+                ('shifts_cancelled', models.PositiveIntegerField(default=0)),
+                ('applicants', models.PositiveIntegerField(default=0)),
+                ('median_hours_to_fill', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('total_spend', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('hospital', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'hospital daily stats',
+                'ordering': ['day', 'department', 'role'],
+                'unique_together': {('hospital', 'day', 'department', 'role')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StaleDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('marked_at', models.DateTimeField(auto_now_add=True)),
+                ('hospital', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('hospital', 'day')},
+            },
+        ),
+        migrations.RunPython(queue_existing_days, migrations.RunPython.noop),
+    ]
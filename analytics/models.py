@@ -0,0 +1,45 @@
+from django.db import models
+from django.conf import settings
+
+
+class HospitalDailyStats(models.Model):
+    """
+    Shift figures for one hospital, department and role on one shift date.
+
+    Rebuilt from shifts and applications by ``analytics.rollups``; never
+    edited directly.
+    """
+    hospital = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    department = models.CharField(max_length=100)
+    role = models.CharField(max_length=100)
+    shifts_posted = models.PositiveIntegerField(default=0)
+    shifts_filled = models.PositiveIntegerField(default=0)
+    shifts_expired = models.PositiveIntegerField(default=0)
+    shifts_cancelled = models.PositiveIntegerField(default=0)
+    applicants = models.PositiveIntegerField(default=0)
+    # Hours from posting a shift to approving its worker, median over filled shifts
+    median_hours_to_fill = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    total_spend = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['hospital', 'day', 'department', 'role']
+        ordering = ['day', 'department', 'role']
+        verbose_name_plural = 'hospital daily stats'
+    
+    def __str__(self):
+        return f"{self.hospital_id} - {self.day} - {self.department} - {self.role}"
+
+
+class StaleDay(models.Model):
+    """A (hospital, shift date) whose rollup rows need rebuilding."""
+    hospital = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    day = models.DateField()
+    marked_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['hospital', 'day']
+    
+    def __str__(self):
+        return f"{self.hospital_id} - {self.day}"
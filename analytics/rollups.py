@@ -0,0 +1,174 @@
+"""
+Daily per-hospital rollups behind ``/api/analytics/hospital/``.
+
+Writes to shifts and applications only queue their (hospital, shift date) in
+``StaleDay``. ``refresh``, run on a schedule by the
+``refresh_hospital_analytics`` command, rebuilds just those days from the
+source tables, so the endpoint reads a handful of pre-aggregated rows no
+matter how much history a hospital has.
+"""
+
+import statistics
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+from functools import reduce
+import operator
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Min, Q
+
+from shifts.models import Shift, Application
+from .models import HospitalDailyStats, StaleDay
+
+
+CENTS = Decimal('0.01')
+
+COUNT_FIELDS = ('shifts_posted', 'shifts_filled', 'shifts_expired', 'shifts_cancelled', 'applicants')
+
+
+def _quantize(value):
+    return Decimal(value).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def mark_stale(pairs, existing_only=False, batch_size=1000):
+    """
+    Queue ``(hospital_id, day)`` pairs for the next refresh. ``existing_only``
+    skips hospitals that no longer exist.
+    """
+    pairs = {(hospital_id, day) for hospital_id, day in pairs if hospital_id and day}
+    if existing_only and pairs:
+        existing = set(get_user_model().objects.filter(pk__in={hospital_id for hospital_id, _ in pairs})
+                       .values_list('pk', flat=True))
+        pairs = {(hospital_id, day) for hospital_id, day in pairs if hospital_id in existing}
+    rows = [StaleDay(hospital_id=hospital_id, day=day) for hospital_id, day in pairs]
+    StaleDay.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+
+
+def rebuild(pairs):
+    """Replace the rollup rows of the given ``(hospital_id, day)`` pairs."""
+    pairs = set(pairs)
+    if not pairs:
+        return 0
+    hospital_ids = {hospital_id for hospital_id, _ in pairs}
+    days = {day for _, day in pairs}
+
+    shifts = [
+        shift for shift in Shift.objects.filter(hospital_id__in=hospital_ids, date__in=days).values(
+            'id', 'hospital_id', 'date', 'department', 'role', 'status', 'created_at',
+            'pay_per_hour', 'duration_hours',
+        )
+        if (shift['hospital_id'], shift['date']) in pairs
+    ]
+    applications = {
+        row['shift_id']: row
+        for row in Application.objects.filter(shift_id__in=[shift['id'] for shift in shifts])
+        .values('shift_id')
+        .annotate(applicants=Count('id'), approved_at=Min('updated_at', filter=Q(status='approved')))
+    }
+
+    stats = {}
+    fill_hours = defaultdict(list)
+    for shift in shifts:
+        key = (shift['hospital_id'], shift['date'], shift['department'], shift['role'])
+        row = stats.get(key)
+        if row is None:
+            row = stats[key] = HospitalDailyStats(
+                hospital_id=key[0], day=key[1], department=key[2], role=key[3],
+            )
+        applied = applications.get(shift['id'], {})
+        approved_at = applied.get('approved_at')
+        row.shifts_posted += 1
+        row.applicants += applied.get('applicants', 0)
+        if shift['status'] == 'expired':
+            row.shifts_expired += 1
+        elif shift['status'] == 'cancelled':
+            # Not worked or paid, even with an approved worker; payroll leaves it out too.
+            row.shifts_cancelled += 1
+            continue
+        if shift['status'] == 'filled' or approved_at is not None:
+            row.shifts_filled += 1
+            row.total_spend += shift['pay_per_hour'] * shift['duration_hours']
+        if approved_at is not None:
+            # The approval is an application's last status change, so its
+            # updated_at stands in for the approval time.
+            fill_hours[key].append(max((approved_at - shift['created_at']).total_seconds(), 0) / 3600)
+    for key, row in stats.items():
+        row.total_spend = _quantize(row.total_spend)
+        if fill_hours[key]:
+            row.median_hours_to_fill = _quantize(statistics.median(fill_hours[key]))
+
+    stale = reduce(operator.or_, (Q(hospital_id=hospital_id, day=day) for hospital_id, day in pairs))
+    with transaction.atomic():
+        HospitalDailyStats.objects.filter(stale).delete()
+        HospitalDailyStats.objects.bulk_create(stats.values())
+    return len(pairs)
+
+
+def refresh(batch_size=500):
+    """Rebuild every queued day, ``batch_size`` days per transaction."""
+    done = 0
+    while True:
+        with transaction.atomic():
+            # Dequeue before reading the source tables: a write landing
+            # meanwhile queues its day again for the next run.
+            batch = list(
+                StaleDay.objects.select_for_update(skip_locked=True)
+                .order_by('id').values_list('id', 'hospital_id', 'day')[:batch_size]
+            )
+            if not batch:
+                return done
+            StaleDay.objects.filter(id__in=[row[0] for row in batch]).delete()
+            rebuild({(hospital_id, day) for _, hospital_id, day in batch})
+        done += len(batch)
+
+
+def rebuild_all(batch_size=500):
+    """Queue and rebuild every day that has shifts or rollup rows."""
+    mark_stale(Shift.objects.values_list('hospital_id', 'date').distinct())
+    mark_stale(HospitalDailyStats.objects.values_list('hospital_id', 'day').distinct())
+    return refresh(batch_size)
+
+
+def _weighted_median(pairs):
+    """Median of ``(value, weight)`` pairs; merges per-day medians into one figure."""
+    pairs = sorted((value, weight) for value, weight in pairs if value is not None and weight)
+    total = sum(weight for _, weight in pairs)
+    seen = 0
+    for value, weight in pairs:
+        seen += weight
+        if seen * 2 >= total:
+            return value
+    return None
+
+
+def _totals(rows):
+    totals = {field: sum(row[field] for row in rows) for field in COUNT_FIELDS}
+    totals['total_spend'] = sum((row['total_spend'] for row in rows), Decimal('0'))
+    totals['fill_rate'] = (
+        round(totals['shifts_filled'] / totals['shifts_posted'], 4) if totals['shifts_posted'] else None
+    )
+    totals['median_hours_to_fill'] = _weighted_median(
+        (row['median_hours_to_fill'], row['shifts_filled']) for row in rows
+    )
+    return totals
+
+
+def summarize(rows):
+    """
+    Totals plus per-department, per-role and per-day breakdowns of rollup rows.
+
+    Medians over several rows are the filled-shift-weighted median of the
+    daily medians, which is close to, but not exactly, the median over every
+    shift in the range.
+    """
+    groups = {'department': defaultdict(list), 'role': defaultdict(list), 'day': defaultdict(list)}
+    for row in rows:
+        for field, grouped in groups.items():
+            grouped[row[field]].append(row)
+    return {
+        'totals': _totals(rows),
+        'by_department': [{'department': key, **_totals(group)} for key, group in sorted(groups['department'].items())],
+        'by_role': [{'role': key, **_totals(group)} for key, group in sorted(groups['role'].items())],
+        'daily': [{'day': key, **_totals(group)} for key, group in sorted(groups['day'].items())],
+    }
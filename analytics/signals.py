@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from shifts.models import Shift, Application
+from .rollups import mark_stale
+
+
+@receiver(post_save, sender=Shift)
+def shift_saved(sender, instance, **kwargs):
+    # A rescheduled shift leaves its old day as well as joining the new one.
+    mark_stale([(instance.hospital_id, instance.date), (instance.hospital_id, instance.loaded_date)])
+
+
+@receiver(post_save, sender=Application)
+def application_saved(sender, instance, **kwargs):
+    shift = instance.shift
+    mark_stale([(shift.hospital_id, shift.date)])
+
+
+# Deletions are queued once the transaction commits: when a whole hospital is
+# being deleted, the cascade would otherwise queue rows pointing at it.
+
+@receiver(post_delete, sender=Shift)
+def shift_deleted(sender, instance, **kwargs):
+    pairs = [(instance.hospital_id, instance.loaded_date or instance.date)]
+    transaction.on_commit(lambda: mark_stale(pairs, existing_only=True))
+
+
+@receiver(post_delete, sender=Application)
+def application_deleted(sender, instance, **kwargs):
+    shift_id = instance.shift_id
+    # If the shift went too, its own deletion already queued the day.
+    transaction.on_commit(lambda: mark_stale(
+        Shift.objects.filter(pk=shift_id).values_list('hospital_id', 'date')
+    ))
@@ -0,0 +1,115 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from shifts.models import Shift, Application
+from .models import HospitalDailyStats, StaleDay
+
+
+class HospitalAnalyticsTests(TestCase):
+    def setUp(self):
+        self.hospital = User.objects.create_user('hosp', password='x', user_type='hospital')
+        self.workers = [
+            User.objects.create_user(f'w{i}', password='x', user_type='worker') for i in range(3)
+        ]
+        self.api = APIClient()
+        self.api.force_authenticate(self.hospital)
+
+    def make_shift(self, date, department='ER', role='Nurse', status='active'):
+        return Shift.objects.create(
+            hospital=self.hospital, department=department, role=role, date=date,
+            start_time='07:00', end_time='19:00', pay_per_hour=50, status=status,
+            requirements='RN', location='ER',
+        )
+
+    def analytics(self, **params):
+        response = self.api.get('/api/analytics/hospital/', {'start': '2025-07-01', 'end': '2025-07-31', **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def refresh(self):
+        call_command('refresh_hospital_analytics', stdout=StringIO())
+
+    def test_rollups_from_shifts_and_applications(self):
+        filled = self.make_shift('2025-07-01')
+        self.make_shift('2025-07-01', status='expired')
+        self.make_shift('2025-07-02', department='ICU', role='ICU Nurse')
+        for worker in self.workers:
+            Application.objects.create(shift=filled, worker=worker)
+        application = filled.applications.get(worker=self.workers[0])
+        application.status = 'approved'
+        application.save()
+        self.refresh()
+
+        data = self.analytics()
+        totals = data['totals']
+        self.assertEqual((totals['shifts_posted'], totals['shifts_filled'], totals['shifts_expired']), (3, 1, 1))
+        self.assertEqual(totals['applicants'], 3)
+        self.assertEqual(Decimal(totals['total_spend']), Decimal('600.00'))
+        self.assertEqual(totals['fill_rate'], round(1 / 3, 4))
+        self.assertIsNotNone(totals['median_hours_to_fill'])
+        self.assertEqual([row['department'] for row in data['by_department']], ['ER', 'ICU'])
+        self.assertEqual([row['day'] for row in data['daily']], ['2025-07-01', '2025-07-02'])
+
+    def test_cancelled_shift_is_neither_filled_nor_paid(self):
+        shift = self.make_shift('2025-07-01')
+        Application.objects.create(shift=shift, worker=self.workers[0], status='approved')
+        shift.status = 'cancelled'
+        shift.save()
+        self.refresh()
+
+        totals = self.analytics()['totals']
+        self.assertEqual((totals['shifts_posted'], totals['shifts_cancelled'], totals['shifts_filled']), (1, 1, 0))
+        self.assertEqual(Decimal(totals['total_spend']), Decimal('0.00'))
+        self.assertIsNone(totals['median_hours_to_fill'])
+
+    def test_refresh_only_rebuilds_changed_days(self):
+        first = self.make_shift('2025-07-01')
+        self.make_shift('2025-07-05')
+        self.refresh()
+        self.assertFalse(StaleDay.objects.exists())
+        untouched = HospitalDailyStats.objects.get(day='2025-07-05').updated_at
+
+        first.date = '2025-07-03'
+        first.save()
+        self.assertEqual(sorted(str(day) for day in StaleDay.objects.values_list('day', flat=True)),
+                         ['2025-07-01', '2025-07-03'])
+        self.refresh()
+        self.assertEqual(HospitalDailyStats.objects.get(day='2025-07-05').updated_at, untouched)
+        self.assertEqual(sorted(str(day) for day in HospitalDailyStats.objects.values_list('day', flat=True)),
+                         ['2025-07-03', '2025-07-05'])
+
+    def test_second_reschedule_leaves_the_intermediate_day(self):
+        shift = self.make_shift('2025-07-01')
+        for day in ('2025-07-03', '2025-07-04'):
+            StaleDay.objects.all().delete()
+            shift.date = day
+            shift.save()
+        self.assertEqual(sorted(str(day) for day in StaleDay.objects.values_list('day', flat=True)),
+                         ['2025-07-03', '2025-07-04'])
+
+    def test_deleted_shift_drops_out(self):
+        shift = self.make_shift('2025-07-01')
+        self.refresh()
+        with self.captureOnCommitCallbacks(execute=True):
+            shift.delete()
+        self.refresh()
+        self.assertFalse(HospitalDailyStats.objects.exists())
+        # Deleting the hospital itself queues nothing for it.
+        self.make_shift('2025-07-02')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hospital.delete()
+        self.assertFalse(StaleDay.objects.exists())
+
+    def test_full_rebuild_and_validation(self):
+        self.make_shift('2025-07-01')
+        StaleDay.objects.all().delete()
+        call_command('refresh_hospital_analytics', full=True, stdout=StringIO())
+        self.assertEqual(self.analytics()['totals']['shifts_posted'], 1)
+        self.assertEqual(self.api.get('/api/analytics/hospital/', {'start': 'July'}).status_code, 400)
+        self.api.force_authenticate(self.workers[0])
+        self.assertEqual(self.api.get('/api/analytics/hospital/').status_code, 403)
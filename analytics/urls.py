@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import hospital_analytics
+
+urlpatterns = [
+    path('hospital/', hospital_analytics, name='hospital_analytics'),
+]
@@ -0,0 +1,47 @@
+import datetime
+
+from django.utils import timezone
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from medicall.params import date_param
+from .models import HospitalDailyStats
+from .rollups import summarize
+
+
+DEFAULT_WINDOW = datetime.timedelta(days=30)
+
+ROW_FIELDS = [
+    'day', 'department', 'role', 'shifts_posted', 'shifts_filled', 'shifts_expired',
+    'shifts_cancelled', 'applicants', 'median_hours_to_fill', 'total_spend',
+]
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def hospital_analytics(request):
+    """
+    Fill rate, time-to-fill, spend and applicant figures for the requesting
+    hospital's shifts dated between ``?start=`` and ``?end=`` (default: the
+    30 days either side of today).
+    """
+    if request.user.user_type != 'hospital':
+        return Response({'detail': 'Only hospitals can view analytics'},
+                       status=status.HTTP_403_FORBIDDEN)
+    
+    today = timezone.localdate()
+    try:
+        start = date_param(request, 'start', today - DEFAULT_WINDOW)
+        end = date_param(request, 'end', today + DEFAULT_WINDOW)
+    except ValueError:
+        return Response({'detail': 'start and end must be YYYY-MM-DD dates'},
+                       status=status.HTTP_400_BAD_REQUEST)
+    if start > end:
+        return Response({'detail': 'start must not be after end'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    rows = list(
+        HospitalDailyStats.objects.filter(hospital=request.user, day__range=(start, end))
+        .values(*ROW_FIELDS)
+    )
+    return Response({'start': start, 'end': end, **summarize(rows)})
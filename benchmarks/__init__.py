@@ -0,0 +1,16 @@
+"""
+Benchmarks and load tests for the core marketplace flows.
+
+Micro-benchmarks (pytest-benchmark, pytest-django)::
+
+    DB_ENGINE=sqlite pytest benchmarks/
+    BENCH_SHIFTS=20000 pytest benchmarks/ --benchmark-sort=mean
+
+Load test (locust) against a running server seeded with ``seed_marketplace``::
+
+    python manage.py seed_marketplace --hospitals 50 --workers 2000 --shifts 20000
+    locust -f benchmarks/locustfile.py --host http://localhost:8000
+
+Without ``DB_ENGINE=sqlite`` both run against the PostgreSQL database from
+the ``DB_*`` settings.
+"""
@@ -0,0 +1,62 @@
+"""
+JSON list filters on worker/hospital profiles.
+
+Defaults to 2k profiles; set BENCH_PROFILES=100000 for the full-size run.
+"""
+
+import os
+import random
+
+import pytest
+
+from accounts.filters import WorkerProfileFilter, HospitalProfileFilter
+from accounts.models import WorkerProfile, HospitalProfile
+from accounts.tags import add_tags, uses_tag_table
+from shifts import seeding
+
+pytestmark = pytest.mark.django_db
+
+PROFILES = int(os.environ.get('BENCH_PROFILES', 2000))
+
+
+@pytest.fixture(scope='module')
+def profiles(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        rng = random.Random(1)
+        workers = seeding.seed_users('worker', PROFILES, rng, prefix='tagbench')
+        created = seeding.seed_worker_profiles(workers, rng, batch_size=5000)
+        hospitals = seeding.seed_users('hospital', PROFILES // 10, rng, prefix='tagbench')
+        created_hospitals = seeding.seed_hospital_profiles(hospitals, rng, batch_size=5000)
+        if uses_tag_table():
+            add_tags(created, batch_size=5000)
+            add_tags(created_hospitals, batch_size=5000)
+        yield
+        WorkerProfile.objects.filter(user__username__startswith='tagbench_').delete()
+        HospitalProfile.objects.filter(user__username__startswith='tagbench_').delete()
+
+
+def _expected(model, field, values, match):
+    test = all if match == 'all' else any
+    return {
+        pk for pk, tags in model.objects.values_list('pk', field)
+        if test(v in tags for v in values)
+    }
+
+
+@pytest.mark.parametrize('match', ['any', 'all'])
+def test_worker_specialty_filter(benchmark, profiles, match):
+    params = {'specialty': ['ICU', 'ER'], 'specialty_match': match}
+
+    def run():
+        return set(WorkerProfileFilter(params, WorkerProfile.objects.all()).qs.values_list('pk', flat=True))
+
+    assert benchmark(run) == _expected(WorkerProfile, 'specialties', ['ICU', 'ER'], match)
+
+
+def test_hospital_department_filter(benchmark, profiles):
+    params = {'department': ['Cardiology', 'Radiology'], 'department_match': 'all'}
+
+    def run():
+        return set(HospitalProfileFilter(params, HospitalProfile.objects.all()).qs.values_list('pk', flat=True))
+
+    assert benchmark(run) == _expected(HospitalProfile, 'departments', ['Cardiology', 'Radiology'], 'all')
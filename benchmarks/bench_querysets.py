@@ -0,0 +1,108 @@
+import random
+
+import pytest
+from django.db.models import Count
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from shifts import seeding
+from shifts.feed import exclude_applied, cached_feed_ids, load_page
+from shifts.models import Shift, Application
+from shifts.views import (
+    WorkerShiftListView, HospitalShiftListView, HospitalApplicationListView
+)
+
+pytestmark = pytest.mark.django_db
+
+factory = APIRequestFactory()
+
+
+def _busiest(user_type):
+    field = 'applications' if user_type == 'worker' else 'posted_shifts'
+    return (User.objects.filter(user_type=user_type)
+            .annotate(n=Count(field)).order_by('-n').first())
+
+
+def _get(view, user, path):
+    request = factory.get(path)
+    force_authenticate(request, user=user)
+    response = view(request)
+    response.render()
+    assert response.status_code == 200
+    return response
+
+
+def test_worker_feed_queryset(benchmark):
+    worker = _busiest('worker')
+
+    def run():
+        return list(Shift.objects.filter(status='active').exclude(applications__worker=worker)[:20])
+
+    assert benchmark(run)
+
+
+# Application counts of the workers the feed exclusion is measured for.
+APPLIED_COUNTS = [0, 100, 10000]
+
+
+@pytest.fixture(scope='module')
+def feed_workers(django_db_setup, django_db_blocker):
+    """One worker per entry of ``APPLIED_COUNTS``, each applied to that many extra shifts."""
+    with django_db_blocker.unblock():
+        hospital_ids = list(User.objects.filter(username__startswith='bench_hospital_')
+                            .values_list('id', flat=True))
+        shifts = seeding.seed_shifts(hospital_ids, max(APPLIED_COUNTS), random.Random(7), batch_size=5000)
+        shift_ids = [shift.id for shift in shifts]
+        workers = {}
+        for count in APPLIED_COUNTS:
+            worker = User.objects.create_user(f'feedbench_{count}', user_type='worker')
+            Application.objects.bulk_create(
+                [Application(shift_id=shift_id, worker=worker) for shift_id in shift_ids[:count]],
+                batch_size=5000,
+            )
+            workers[count] = worker
+    yield workers
+    with django_db_blocker.unblock():
+        User.objects.filter(username__startswith='feedbench_').delete()
+        Shift.objects.filter(pk__in=shift_ids).delete()
+
+
+@pytest.mark.parametrize('applied', APPLIED_COUNTS)
+@pytest.mark.parametrize('strategy', ['exclude', 'not_exists', 'cached'])
+def test_worker_feed_exclusion(benchmark, settings, feed_workers, applied, strategy):
+    """First feed page: reverse-FK exclude() vs NOT EXISTS vs the cached id sets."""
+    settings.WORKER_FEED_CACHE_TTL = 60
+    worker = feed_workers[applied]
+    active = Shift.objects.filter(status='active').order_by('-created_at', '-pk')
+    if strategy == 'exclude':
+        def run():
+            return list(active.exclude(applications__worker=worker)[:20])
+    elif strategy == 'not_exists':
+        def run():
+            return list(exclude_applied(active, worker.id)[:20])
+    else:
+        def run():
+            return load_page(cached_feed_ids(worker.id)[:20])
+
+    expected = [shift.id for shift in exclude_applied(active, worker.id)[:20]]
+    assert [shift.id for shift in benchmark(run)] == expected
+
+
+def test_hospital_applications_queryset(benchmark):
+    hospital = _busiest('hospital')
+    benchmark(lambda: list(Application.objects.filter(shift__hospital=hospital)[:20]))
+
+
+def test_worker_feed_view(benchmark):
+    worker = _busiest('worker')
+    benchmark(_get, WorkerShiftListView.as_view(), worker, '/api/shifts/worker/')
+
+
+def test_hospital_shift_view(benchmark):
+    hospital = _busiest('hospital')
+    benchmark(_get, HospitalShiftListView.as_view(), hospital, '/api/shifts/hospital/')
+
+
+def test_hospital_application_view(benchmark):
+    hospital = _busiest('hospital')
+    benchmark(_get, HospitalApplicationListView.as_view(), hospital, '/api/shifts/applications/hospital/')
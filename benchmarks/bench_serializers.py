@@ -0,0 +1,71 @@
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from medicall.readers import read_serializer
+from medicall.renderers import ORJSONRenderer, MessagePackRenderer
+from notifications.models import Notification
+from notifications.serializers import NotificationSerializer
+from shifts.models import Shift, Application, count_applicants
+from shifts.serializers import ShiftSerializer, ApplicationSerializer
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize('rows', [20, 100])
+def test_shift_serializer(benchmark, rows):
+    shifts = list(Shift.objects.select_related('hospital')[:rows])
+    data = benchmark(lambda: ShiftSerializer(shifts, many=True).data)
+    assert len(data) == rows
+
+
+@pytest.mark.parametrize('rows', [20, 100])
+def test_application_serializer(benchmark, rows):
+    applications = list(
+        Application.objects.select_related('worker', 'shift', 'shift__hospital')[:rows]
+    )
+    data = benchmark(lambda: ApplicationSerializer(applications, many=True).data)
+    assert len(data) == rows
+
+
+RENDERERS = {'drf-json': JSONRenderer, 'orjson': ORJSONRenderer, 'msgpack': MessagePackRenderer}
+
+
+@pytest.mark.parametrize('rows', [20, 100, 1000])
+@pytest.mark.parametrize('renderer', list(RENDERERS))
+def test_render_shift_page(benchmark, rows, renderer):
+    """Rendering an already-serialized shift page; payload size is in extra_info."""
+    shifts = list(Shift.objects.select_related('hospital')[:rows])
+    page = {'count': len(shifts), 'next': None, 'previous': None,
+            'results': ShiftSerializer(shifts, many=True).data}
+    render = RENDERERS[renderer]().render
+    body = benchmark(render, page)
+    benchmark.extra_info['bytes'] = len(body)
+    assert len(page['results']) == rows
+
+
+READ_PATHS = {'drf': lambda cls: cls, 'compiled': read_serializer}
+
+
+@pytest.mark.parametrize('rows', [20, 100])
+@pytest.mark.parametrize('path', list(READ_PATHS))
+@pytest.mark.parametrize('model', ['shift', 'application', 'notification'])
+def test_read_serializer(benchmark, rows, path, model):
+    """DRF serializers against their compiled readers, with no queries in the timed loop."""
+    if model == 'shift':
+        instances = list(Shift.objects.select_related('hospital')[:rows])
+        count_applicants(instances)
+        serializer_class = ShiftSerializer
+    elif model == 'application':
+        instances = list(Application.objects.select_related('worker', 'shift__hospital')[:rows])
+        count_applicants([application.shift for application in instances])
+        serializer_class = ApplicationSerializer
+    else:
+        instances = list(Notification.objects.select_related('sender', 'recipient')[:rows]) or [
+            Notification(recipient=shift.hospital, sender=shift.hospital, title='New shift', message=shift.role,
+                         notification_type='shift_posted', related_shift=shift)
+            for shift in Shift.objects.select_related('hospital')[:rows]
+        ]
+        serializer_class = NotificationSerializer
+    reader = READ_PATHS[path](serializer_class)
+    data = benchmark(lambda: reader(instances, many=True).data)
+    assert len(data) == rows
@@ -0,0 +1,36 @@
+import os
+
+import pytest
+from django.core.management import call_command
+
+try:
+    import pytest_benchmark  # noqa: F401
+    import pytest_django  # noqa: F401
+except ImportError:
+    collect_ignore_glob = ['bench_*.py']
+
+
+def _scale(name, default):
+    return int(os.environ.get(f'BENCH_{name.upper()}', default))
+
+
+@pytest.fixture(scope='package', autouse=True)
+def marketplace(django_db_setup, django_db_blocker):
+    """
+    Seed the test database once for the benchmark package and remove the
+    data afterwards; size is set by BENCH_* env vars.
+    """
+    from accounts.models import User
+
+    with django_db_blocker.unblock():
+        call_command(
+            'seed_marketplace',
+            hospitals=_scale('hospitals', 10),
+            workers=_scale('workers', 200),
+            shifts=_scale('shifts', 1000),
+            seed=_scale('seed', 42),
+            prefix='bench',
+        )
+    yield
+    with django_db_blocker.unblock():
+        User.objects.filter(username__startswith='bench_').delete()
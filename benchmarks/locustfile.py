@@ -0,0 +1,113 @@
+"""
+Locust scenario for the post -> browse -> apply -> approve loop.
+
+Run against a server seeded with ``seed_marketplace`` (default prefix "seed"
+and password "test123")::
+
+    locust -f benchmarks/locustfile.py --host http://localhost:8000 \\
+        --headless -u 50 -r 10 -t 2m
+
+Start the server with RATE_LIMITS_ENABLED=False: every simulated user logs
+in from the same address and would otherwise hit the login rate limit.
+
+Latency targets (milliseconds) can be overridden with LOCUST_P50/P95/P99.
+The run exits non-zero when the aggregated percentiles miss them.
+"""
+
+import datetime
+import os
+import random
+
+from locust import HttpUser, between, events, task
+
+PREFIX = os.environ.get('SEED_PREFIX', 'seed')
+PASSWORD = os.environ.get('SEED_PASSWORD', 'test123')
+HOSPITALS = int(os.environ.get('SEED_HOSPITALS', 20))
+WORKERS = int(os.environ.get('SEED_WORKERS', 200))
+
+TARGETS = {
+    0.50: float(os.environ.get('LOCUST_P50', 100)),
+    0.95: float(os.environ.get('LOCUST_P95', 400)),
+    0.99: float(os.environ.get('LOCUST_P99', 1000)),
+}
+
+
+class MarketplaceUser(HttpUser):
+    abstract = True
+    user_type = None
+    population = 0
+
+    def on_start(self):
+        username = f'{PREFIX}_{self.user_type}_{random.randrange(self.population)}'
+        response = self.client.post('/api/auth/login/', json={'username': username, 'password': PASSWORD})
+        response.raise_for_status()
+        self.client.headers['Authorization'] = f"Bearer {response.json()['access']}"
+
+
+class HospitalUser(MarketplaceUser):
+    user_type = 'hospital'
+    population = HOSPITALS
+    weight = 1
+    wait_time = between(2, 5)
+
+    @task(1)
+    def post_shift(self):
+        date = datetime.date.today() + datetime.timedelta(days=random.randint(1, 30))
+        self.client.post('/api/shifts/', name='/api/shifts/ [post]', json={
+            'department': 'Emergency Medicine',
+            'role': 'ER Nurse',
+            'date': date.isoformat(),
+            'start_time': '07:00:00',
+            'end_time': '19:00:00',
+            'pay_per_hour': '55.00',
+            'urgency': 'high',
+            'requirements': 'RN, BLS',
+            'location': 'Emergency Department',
+        })
+
+    @task(3)
+    def approve_pending(self):
+        response = self.client.get('/api/shifts/applications/hospital/?status=pending',
+                                   name='/api/shifts/applications/hospital/')
+        results = response.json().get('results', []) if response.ok else []
+        if results:
+            application = random.choice(results)
+            self.client.patch(f"/api/shifts/applications/{application['id']}/status/",
+                              name='/api/shifts/applications/[id]/status/',
+                              json={'status': random.choice(['approved', 'rejected'])})
+
+
+class WorkerUser(MarketplaceUser):
+    user_type = 'worker'
+    population = WORKERS
+    weight = 8
+    wait_time = between(1, 3)
+
+    @task(5)
+    def browse(self):
+        self.client.get('/api/shifts/worker/')
+
+    @task(2)
+    def apply(self):
+        response = self.client.get('/api/shifts/worker/?ordering=-pay_per_hour')
+        results = response.json().get('results', []) if response.ok else []
+        if results:
+            shift = random.choice(results)
+            self.client.post('/api/shifts/applications/', name='/api/shifts/applications/ [post]',
+                             json={'shift': shift['id'], 'cover_letter': 'Available'})
+
+    @task(1)
+    def my_applications(self):
+        self.client.get('/api/shifts/applications/')
+
+
+@events.quitting.add_listener
+def check_targets(environment, **kwargs):
+    total = environment.stats.total
+    if not total.num_requests:
+        return
+    for percentile, limit in TARGETS.items():
+        observed = total.get_response_time_percentile(percentile)
+        if observed > limit:
+            print(f'p{int(percentile * 100)} {observed:.0f}ms exceeds target {limit:.0f}ms')
+            environment.process_exit_code = 1
@@ -0,0 +1,27 @@
+"""
+Gunicorn settings (render.yaml starts gunicorn with this file).
+
+The application is loaded once in the master before workers are forked
+(``preload_app``): Django is set up and every view module imported there,
+so a new or restarted worker is ready at once and shares that memory with
+the master copy-on-write. Anything holding a socket is closed in the
+master before each fork so no two processes share a connection.
+"""
+
+preload_app = True
+
+
+def when_ready(server):
+    # Import the whole URLconf (and so every view) in the master too.
+    from django.urls import resolve
+
+    resolve('/api/health/')
+
+
+def pre_fork(server, worker):
+    from django.core.cache import caches
+    from django.db import connections
+
+    connections.close_all()
+    for cache in caches.all(initialized_only=True):
+        cache.close()
@@ -0,0 +1,102 @@
+"""
+Exchange rates for converting pay figures.
+
+A whole rate table for a base currency is fetched from the first free API
+that answers and cached, so converting many figures costs at most one
+upstream call per ``CURRENCY_RATE_TTL`` rather than one per figure.
+"""
+
+import logging
+import re
+from decimal import Decimal, ROUND_HALF_UP
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+# Units per US dollar, used when every API is unreachable (approximate as of 2024)
+FALLBACK_RATES = {
+    'USD': 1,
+    'NGN': 1500,  # Nigerian Naira
+    'GBP': 0.8,   # British Pound
+    'CAD': 1.35,  # Canadian Dollar
+    'KES': 150,   # Kenyan Shilling
+    'INR': 83,    # Indian Rupee
+    'EUR': 0.92,  # Euro
+    'JPY': 150,   # Japanese Yen
+    'AUD': 1.52,  # Australian Dollar
+    'CHF': 0.88,  # Swiss Franc
+    'CNY': 7.2,   # Chinese Yuan
+}
+
+# Free APIs that need no key; each returns every rate for ``base``.
+RATE_SOURCES = [
+    ('exchangerate.host', 'https://api.exchangerate.host/latest', 'base'),
+    ('open.er-api.com', 'https://open.er-api.com/v6/latest', 'base'),
+    ('frankfurter.app', 'https://api.frankfurter.app/latest', 'from'),
+]
+
+# A fallback table is only kept briefly so the APIs are retried soon.
+FALLBACK_TTL = 300
+
+CENTS = Decimal('0.01')
+
+# ISO 4217 style; anything else never reaches a cache key or an upstream URL.
+CURRENCY_CODE = re.compile(r'[A-Z]{3}')
+
+
+def _fallback_table(base):
+    base_per_usd = FALLBACK_RATES.get(base)
+    if base_per_usd is None:
+        return {base: 1}
+    return {code: per_usd / base_per_usd for code, per_usd in FALLBACK_RATES.items()}
+
+
+def rate_table(base='USD'):
+    """
+    ``{'base', 'rates', 'source'}`` for ``base``, where ``rates`` maps each
+    currency code to units per one unit of ``base``.
+    """
+    base = base.upper()
+    key = f'currency:rates:{base}'
+    table = cache.get(key)
+    if table is not None:
+        return table
+    for name, url, param in RATE_SOURCES:
+        try:
+            response = requests.get(url, params={param: base}, timeout=5)
+            if response.status_code != 200:
+                continue
+            rates = response.json().get('rates') or {}
+        except (requests.RequestException, ValueError) as exc:
+            logger.warning('Rate source %s failed: %s', name, exc)
+            continue
+        if len(rates) > 1:
+            table = {'base': base, 'rates': {base: 1, **rates}, 'source': name}
+            cache.set(key, table, settings.CURRENCY_RATE_TTL)
+            return table
+    table = {'base': base, 'rates': _fallback_table(base), 'source': 'fallback'}
+    cache.set(key, table, FALLBACK_TTL)
+    return table
+
+
+def is_currency_code(code):
+    return CURRENCY_CODE.fullmatch(code) is not None
+
+
+def get_rate(from_currency, to_currency):
+    """Units of ``to_currency`` per unit of ``from_currency`` and where the rate came from."""
+    if from_currency.upper() == to_currency.upper():
+        return 1, 'identity'
+    table = rate_table(from_currency)
+    rate = table['rates'].get(to_currency.upper())
+    if rate is None:
+        return _fallback_table(from_currency.upper()).get(to_currency.upper(), 1), 'fallback'
+    return rate, table['source']
+
+
+def convert(amount, rate):
+    return (Decimal(amount) * Decimal(str(rate))).quantize(CENTS, rounding=ROUND_HALF_UP)
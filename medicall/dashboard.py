@@ -0,0 +1,102 @@
+"""
+Everything a dashboard needs on load, in one response.
+
+Each section is built from a fixed number of queries whatever the data
+size: the user is loaded once together with their role profile, list
+sections fetch one page with their related rows joined in, and applicant
+counts for every shift shown are read in a single grouped query.
+"""
+
+import datetime
+
+from django.db.models import Count, Q
+from rest_framework.settings import api_settings
+
+from accounts.models import User
+from accounts.serializers import UserSerializer, WorkerProfileSerializer, HospitalProfileSerializer
+from notifications.models import Notification
+from shifts.availability import application_conflicts
+from shifts.feed import exclude_applied
+from shifts.models import Shift, Application, MonthlyEarnings, count_applicants
+from shifts.serializers import ShiftSerializer, ApplicationSerializer, HospitalApplicationSerializer
+
+
+SECTIONS = ('user', 'profile', 'shifts', 'applications', 'notifications', 'stats')
+
+
+def _status_counts(queryset, statuses):
+    return queryset.aggregate(
+        total=Count('id'), **{status: Count('id', filter=Q(status=status)) for status in statuses},
+    )
+
+
+def _page(queryset):
+    return list(queryset[:api_settings.PAGE_SIZE])
+
+
+def build_dashboard(user_id, include=SECTIONS):
+    """The requested ``include`` sections for ``user_id``."""
+    user = User.objects.select_related('worker_profile', 'hospital_profile').get(pk=user_id)
+    is_hospital = user.user_type == 'hospital'
+    data = {}
+    if 'user' in include:
+        data['user'] = UserSerializer(user).data
+    if 'profile' in include:
+        profile_name = 'hospital_profile' if is_hospital else 'worker_profile'
+        profile = getattr(user, profile_name, None)
+        serializer = HospitalProfileSerializer if is_hospital else WorkerProfileSerializer
+        data['profile'] = serializer(profile).data if profile is not None else None
+
+    shifts = applications = None
+    if 'shifts' in include:
+        if is_hospital:
+            queryset = Shift.objects.filter(hospital=user)
+        else:
+            queryset = exclude_applied(Shift.objects.filter(status='active'), user.id)
+        shifts = _page(queryset.select_related('hospital').order_by('-created_at'))
+    if 'applications' in include:
+        if is_hospital:
+            queryset = Application.objects.filter(shift__hospital=user).select_related('shift__hospital', 'worker')
+        else:
+            queryset = Application.objects.filter(worker=user).select_related('shift__hospital', 'worker')
+        applications = _page(queryset.order_by('-created_at'))
+    count_applicants([*(shifts or []), *(application.shift for application in applications or [])])
+    if shifts is not None:
+        data['shifts'] = ShiftSerializer(shifts, many=True).data
+    if applications is not None:
+        if is_hospital:
+            context = {'conflicts': application_conflicts(applications)}
+            data['applications'] = HospitalApplicationSerializer(applications, many=True, context=context).data
+        else:
+            data['applications'] = ApplicationSerializer(applications, many=True).data
+
+    if 'notifications' in include:
+        data['notifications'] = {
+            'unread': Notification.objects.filter(recipient=user, is_read=False).count(),
+        }
+    if 'stats' in include:
+        data['stats'] = hospital_stats(user) if is_hospital else worker_stats(user)
+    return data
+
+
+def worker_stats(user):
+    month = datetime.date.today().replace(day=1)
+    earnings = MonthlyEarnings.objects.filter(worker=user, month=month).first()
+    return {
+        'applications': _status_counts(Application.objects.filter(worker=user),
+                                       ('pending', 'approved', 'rejected')),
+        'this_month': {
+            'shifts': earnings.shifts if earnings else 0,
+            'hours': earnings.hours if earnings else 0,
+            'gross': earnings.gross if earnings else 0,
+        },
+    }
+
+
+def hospital_stats(user):
+    return {
+        'shifts': _status_counts(Shift.objects.filter(hospital=user),
+                                 ('active', 'filled', 'cancelled', 'expired')),
+        'applications': _status_counts(Application.objects.filter(shift__hospital=user),
+                                       ('pending', 'approved', 'rejected')),
+    }
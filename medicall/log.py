@@ -0,0 +1,180 @@
+"""
+Logging helpers for the MediCall backend.
+
+Request threads only put records on an in-memory queue; a background
+``QueueListener`` thread does the formatting and the disk I/O. Records can be
+rendered as JSON lines, have sensitive fields redacted, and be sampled for
+noisy loggers. Everything here is wired up from ``LOGGING`` in settings.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+
+
+REDACTED = '[REDACTED]'
+
+DEFAULT_REDACT_FIELDS = (
+    'password', 'password_confirm', 'token', 'refresh', 'access',
+    'secret', 'authorization', 'license_number',
+)
+
+# Attributes every LogRecord has; anything else was passed through ``extra``.
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def _redact(value, fields):
+    if isinstance(value, dict):
+        return {
+            k: REDACTED if str(k).lower() in fields else _redact(v, fields)
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return type(value)(_redact(v, fields) for v in value)
+    return value
+
+
+class RedactFilter(logging.Filter):
+    """Replace the values of sensitive keys in log args and ``extra`` fields."""
+
+    def __init__(self, fields=DEFAULT_REDACT_FIELDS, name=''):
+        super().__init__(name)
+        self.fields = frozenset(f.lower() for f in fields)
+
+    def filter(self, record):
+        if isinstance(record.args, dict):
+            record.args = _redact(record.args, self.fields)
+        elif record.args:
+            record.args = tuple(_redact(a, self.fields) for a in record.args)
+        for key in set(vars(record)) - _RECORD_ATTRS:
+            if key.lower() in self.fields:
+                setattr(record, key, REDACTED)
+            else:
+                setattr(record, key, _redact(getattr(record, key), self.fields))
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Let through only a fraction of low-severity records from ``loggers``.
+
+    Records at or above ``always_level`` are never dropped, so warnings and
+    errors from a sampled logger still show up in full. Records from loggers
+    outside ``loggers`` (and their children) are never sampled.
+    """
+
+    def __init__(self, rate=1.0, loggers=(), always_level='WARNING', name=''):
+        super().__init__(name)
+        self.rate = float(rate)
+        self.prefixes = tuple(loggers)
+        self.always_level = logging._checkLevel(always_level)
+
+    def _sampled(self, logger_name):
+        return any(
+            logger_name == prefix or logger_name.startswith(prefix + '.')
+            for prefix in self.prefixes
+        )
+
+    def filter(self, record):
+        if record.levelno >= self.always_level or self.rate >= 1.0:
+            return True
+        if not self._sampled(record.name):
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Render each record as a single JSON object per line."""
+
+    def format(self, record):
+        payload = {
+            'time': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'process': record.process,
+            'thread': record.thread,
+        }
+        for key in set(vars(record)) - _RECORD_ATTRS:
+            payload[key] = getattr(record, key)
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exc_info'] = record.exc_text
+        if record.stack_info:
+            payload['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(payload, default=str)
+
+
+class QueueFileHandler(QueueHandler):
+    """
+    Non-blocking file handler.
+
+    ``emit`` only enqueues the record; a ``QueueListener`` thread owned by this
+    handler formats it and appends it to ``filename``. A ``WatchedFileHandler``
+    is used so several gunicorn workers can share one file and survive log
+    rotation. The listener is restarted lazily after a fork, since threads do
+    not survive into the child process.
+    """
+
+    def __init__(self, filename, maxsize=10000, encoding='utf-8'):
+        super().__init__(queue.Queue(maxsize))
+        self.filename = os.fspath(filename)
+        self.encoding = encoding
+        self.target = None
+        self.listener = None
+        self._pid = None
+        atexit.register(self.stop)
+
+    def setFormatter(self, fmt):
+        # Formatting happens on the listener thread, not on the caller's.
+        super().setFormatter(fmt)
+        if self.target is not None:
+            self.target.setFormatter(fmt)
+
+    def start(self):
+        if self.target is None:
+            os.makedirs(os.path.dirname(self.filename) or '.', exist_ok=True)
+            self.target = WatchedFileHandler(self.filename, encoding=self.encoding, delay=True)
+            self.target.setFormatter(self.formatter)
+        self.listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+        self.listener.start()
+        self._pid = os.getpid()
+
+    def stop(self):
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+        self.listener = None
+        if self.target is not None:
+            self.target.close()
+
+    def prepare(self, record):
+        # Resolve the message now so later mutation of the args cannot change
+        # it, but leave the (expensive) formatting to the listener thread.
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Dropping a log line is better than stalling a request.
+            pass
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            # Checked again under the lock so concurrent callers start one listener.
+            with self.lock:
+                if self._pid != os.getpid():
+                    self.start()
+        super().emit(record)
@@ -0,0 +1,24 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from medicall.schema import FORMATS, generate_schema, schema_path
+
+
+class Command(BaseCommand):
+    help = 'Write the OpenAPI schema (JSON and YAML) to OPENAPI_SCHEMA_DIR; run at build time'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        os.makedirs(settings.OPENAPI_SCHEMA_DIR, exist_ok=True)
+        for fmt in FORMATS:
+            path = schema_path(fmt)
+            # Written beside the target and renamed, so a running server never reads half a file.
+            partial = path.with_suffix(path.suffix + '.tmp')
+            partial.write_bytes(generate_schema(fmt))
+            os.replace(partial, path)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote the OpenAPI schema to {settings.OPENAPI_SCHEMA_DIR} in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from medicall.startup import import_profile
+
+
+class Command(BaseCommand):
+    help = ('Profile a cold start (django.setup() and URL resolution) with python -X importtime '
+            'and list the packages that take longest to import')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help='Packages listed')
+        parser.add_argument('--sort', choices=['cumulative', 'self'], default='cumulative',
+                            help='Order by time including imports made by the package, or its own only')
+
+    def handle(self, *args, **options):
+        seconds, packages = import_profile()
+        column = 1 if options['sort'] == 'cumulative' else 0
+        ranked = sorted(packages.items(), key=lambda item: -item[1][column])[:options['top']]
+        self.stdout.write(f'{"package":<32} {"self ms":>9} {"cumulative ms":>14}')
+        for package, (self_us, cumulative_us) in ranked:
+            self.stdout.write(f'{package:<32} {self_us / 1000:>9.1f} {cumulative_us / 1000:>14.1f}')
+        self.stdout.write(self.style.SUCCESS(f'Cold start (setup and URL resolution): {seconds * 1000:.0f} ms'))
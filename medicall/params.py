@@ -0,0 +1,17 @@
+"""Query parameter parsing shared by the API views."""
+
+from django.utils.dateparse import parse_date
+
+
+def date_param(request, name, default=None):
+    """
+    ``?name=`` as a date, or ``default`` when it is missing or blank.
+    Raises ``ValueError`` for anything that is not a YYYY-MM-DD date.
+    """
+    value = request.query_params.get(name)
+    if not value:
+        return default
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
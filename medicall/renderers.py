@@ -0,0 +1,70 @@
+"""
+Faster renderers and parsers for the API.
+
+``ORJSONRenderer`` produces the same bytes as DRF's ``JSONRenderer`` for
+every response the API returns, but encodes with orjson. Values orjson
+would format differently (dates and times, ``Decimal``, lazy strings) are
+passed to DRF's own ``JSONEncoder.default``, so they come out exactly as
+before. Indented output, which orjson cannot match, is left to DRF.
+
+``MessagePackRenderer`` serves ``Accept: application/msgpack``, encoding
+the same values the JSON renderer would produce.
+"""
+
+import msgpack
+import orjson
+from rest_framework.utils import encoders
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+_encoder = encoders.JSONEncoder()
+
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if (self.get_indent(accepted_media_type, renderer_context) is not None
+                or self.ensure_ascii or not self.compact):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same escaping as DRF, keeping the output a strict JavaScript subset.
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding') or 'utf-8'
+        if encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_default, use_bin_type=True, datetime=False)
@@ -0,0 +1,117 @@
+"""
+Read replicas for read-only requests.
+
+``ReplicaRoutingMiddleware`` marks each GET/HEAD/OPTIONS request as
+read-only, and ``ReplicaRouter`` then sends that request's queries to one
+of the ``DATABASE_REPLICAS`` aliases. Everything else goes to the
+primary:
+- writes, and ``select_for_update`` and other querysets Django marks
+  for writing;
+- reads inside a transaction on the primary;
+- any read that follows a write in the same request.
+
+Read-your-writes: when a request writes, its user is pinned to the
+primary for ``REPLICA_PIN_SECONDS``, long enough for the replicas to
+catch up. Users are identified by their access token (or session) before
+any query runs. Register and login requests are anonymous, so those views
+name the user they signed in with ``pin_signed_in``. Pins live in the
+Django cache, so they only hold across gunicorn workers when
+``REDIS_URL`` is set.
+
+With no replicas configured the middleware does nothing and every query
+uses ``default``.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+from accounts.authentication import request_user_id
+
+
+class _RequestState:
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self, replica):
+        self.replica = replica
+        self.wrote = False
+
+
+_state = ContextVar('replica_routing', default=None)
+
+
+def _pin_key(user_id):
+    return f'db:pin-primary:{user_id}'
+
+
+def pin_to_primary(user_id):
+    cache.set(_pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return bool(cache.get(_pin_key(user_id)))
+
+
+def pin_signed_in(request, user):
+    """Pin ``user`` too once the request ends: an anonymous request just registered or logged them in."""
+    # A DRF request forwards attribute reads, not writes, to the HttpRequest the middleware sees.
+    getattr(request, '_request', request).signed_in_user_id = user.pk
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        user_id = request_user_id(request)
+        replica = None
+        if request.method in SAFE_METHODS and not (user_id and is_pinned(user_id)):
+            # One replica per request, so its reads see a single snapshot.
+            replica = random.choice(settings.DATABASE_REPLICAS)
+        state = _RequestState(replica)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote:
+            user = getattr(request, 'user', None)
+            if user_id is None and user is not None and user.is_authenticated:
+                user_id = user.pk
+            for pinned in {user_id, getattr(request, 'signed_in_user_id', None)} - {None}:
+                pin_to_primary(pinned)
+        return response
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.replica is None or state.wrote:
+            return None
+        # Reads in a transaction on the primary must see its uncommitted rows.
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary through replication.
+        return False if db in settings.DATABASE_REPLICAS else None
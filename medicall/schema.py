@@ -0,0 +1,103 @@
+"""
+The OpenAPI schema, generated once rather than per request.
+
+``build_openapi_schema`` (run by ``build.sh``) writes the schema as JSON
+and YAML to ``OPENAPI_SCHEMA_DIR``. ``openapi_schema`` serves those files
+with an ETag and ``OPENAPI_SCHEMA_MAX_AGE`` cache headers, and the
+Swagger UI and ReDoc pages load the schema from it. When no file was
+built, the schema is generated the first time it is asked for and kept
+for the life of the process.
+
+drf_yasg is imported on first use rather than with the URLconf, so
+processes that never serve the docs do not pay for loading it.
+"""
+
+import hashlib
+from functools import cache
+from pathlib import Path
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_safe
+
+
+FORMATS = {
+    '.json': ('OpenAPICodecJson', 'application/json'),
+    '.yaml': ('OpenAPICodecYaml', 'application/yaml'),
+}
+
+
+@cache
+def api_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="MediCall API",
+        default_version='v1',
+        description="API for connecting hospitals with medical professionals",
+        terms_of_service="https://www.medicall.com/terms/",
+        contact=openapi.Contact(email="contact@medicall.com"),
+        license=openapi.License(name="MIT License"),
+    )
+
+
+@cache
+def _schema_view():
+    from drf_yasg.views import get_schema_view
+    from rest_framework import permissions
+
+    return get_schema_view(api_info(), public=True, permission_classes=(permissions.AllowAny,))
+
+
+def schema_ui(renderer):
+    """The drf_yasg ``renderer`` (``swagger`` or ``redoc``) page view, built on its first request."""
+    @cache
+    def build():
+        return _schema_view().with_ui(renderer, cache_timeout=0)
+
+    def view(request, *args, **kwargs):
+        return build()(request, *args, **kwargs)
+    view.csrf_exempt = True
+    return view
+
+
+def schema_path(fmt):
+    return Path(settings.OPENAPI_SCHEMA_DIR) / f'swagger{fmt}'
+
+
+def generate_schema(fmt):
+    """The public schema encoded as ``fmt`` (``.json`` or ``.yaml``)."""
+    from drf_yasg import codecs
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    # No request: every endpoint is listed and the host is left to the client.
+    schema = OpenAPISchemaGenerator(api_info()).get_schema(request=None, public=True)
+    codec_name, _ = FORMATS[fmt]
+    return getattr(codecs, codec_name)(validators=[]).encode(schema)
+
+
+@cache
+def load_schema(fmt):
+    """``(body, etag)`` for ``fmt``, read from the built file or generated once per process."""
+    try:
+        body = schema_path(fmt).read_bytes()
+    except FileNotFoundError:
+        body = generate_schema(fmt)
+    return body, hashlib.sha256(body).hexdigest()[:32]
+
+
+def _etag(request, format):
+    return load_schema(format)[1] if format in FORMATS else None
+
+
+@require_safe
+@condition(etag_func=_etag)
+def openapi_schema(request, format):
+    if format not in FORMATS:
+        raise Http404('Unknown schema format')
+    body, _ = load_schema(format)
+    response = HttpResponse(body, content_type=FORMATS[format][1])
+    patch_cache_control(response, public=True, max_age=settings.OPENAPI_SCHEMA_MAX_AGE)
+    response.cache_compressed = True
+    return response
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+import importlib.util
 import os
 from datetime import timedelta
 
@@ -43,6 +44,7 @@ INSTALLED_APPS = [
     # Third party apps
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
     'django_filters',
     'drf_yasg',
@@ -51,15 +53,20 @@ INSTALLED_APPS = [
     'accounts',
     'shifts',
     'notifications',
+    'analytics',
+    'medicall',
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'medicall.compression.CompressionMiddleware',
+    'medicall.throttling.RateLimitMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'medicall.replicas.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -100,16 +107,129 @@ DATABASES = {
 }
 
 # Fallback to SQLite for development if PostgreSQL is not available
-if not DEBUG:
-    try:
-        import psycopg2
-    except ImportError:
-        DATABASES = {
-            'default': {
-                'ENGINE': 'django.db.backends.sqlite3',
-                'NAME': BASE_DIR / 'db.sqlite3',
-            }
+# (checked without importing the driver, which Django loads when it connects)
+if not DEBUG and importlib.util.find_spec('psycopg2') is None:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+
+# Explicit SQLite mode for local benchmarking and tests (DB_ENGINE=sqlite)
+if os.environ.get('DB_ENGINE', '').lower() == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
         }
+    }
+
+# Read replica (medicall/replicas.py): queries of GET requests go to it
+# unless the user wrote within REPLICA_PIN_SECONDS. Set DB_REPLICA_HOST for
+# PostgreSQL, or SQLITE_REPLICA_PATH with DB_ENGINE=sqlite for a local copy.
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    if os.environ.get('SQLITE_REPLICA_PATH'):
+        DATABASES['replica'] = {**DATABASES['default'], 'NAME': os.environ['SQLITE_REPLICA_PATH']}
+elif os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+    }
+DATABASE_REPLICAS = []
+if 'replica' in DATABASES:
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS = ['replica']
+DATABASE_ROUTERS = ['medicall.replicas.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 10))
+
+
+# Cache
+# Shared across gunicorn workers when REDIS_URL is set; per-process otherwise.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
+# Token-bucket rate limits (medicall/throttling.py) by URL name: limited
+# methods and a (rate, burst) budget per client IP and/or per user. Login
+# and registration run a PBKDF2 hash per request, currency_rate calls
+# upstreams, and exports and bulk applies are the heaviest queries.
+RATE_LIMITS_ENABLED = os.environ.get('RATE_LIMITS_ENABLED', 'True').lower() == 'true'
+RATE_LIMITS = {
+    'login': {'methods': ('POST',), 'ip': ('10/min', 5)},
+    'register': {'methods': ('POST',), 'ip': ('5/hour', 3)},
+    'token_refresh': {'methods': ('POST',), 'ip': ('30/min', 10)},
+    'currency_rate': {'methods': ('GET',), 'ip': ('60/min', 20)},
+    'hospital_export': {'methods': ('GET',), 'user': ('60/hour', 20)},
+    'application_bulk': {'methods': ('POST',), 'user': ('30/min', 10)},
+}
+
+# Currency shift pay is posted in, and seconds a fetched exchange rate
+# table is reused (medicall/currency.py)
+PAY_CURRENCY = os.environ.get('PAY_CURRENCY', 'USD').upper()
+CURRENCY_RATE_TTL = int(os.environ.get('CURRENCY_RATE_TTL', 6 * 60 * 60))
+
+# Pay benchmarks (shifts/market.py): shifts dated within the window count,
+# groups with fewer samples are not published.
+PAY_BENCHMARK_WINDOW_DAYS = int(os.environ.get('PAY_BENCHMARK_WINDOW_DAYS', 365))
+PAY_BENCHMARK_MIN_SAMPLES = int(os.environ.get('PAY_BENCHMARK_MIN_SAMPLES', 5))
+PAY_BENCHMARK_CACHE_TTL = int(os.environ.get('PAY_BENCHMARK_CACHE_TTL', 60 * 60))
+# Incremental refreshes also re-read rows changed this many seconds before
+# the previous run started, for transactions that committed after it read.
+PAY_BENCHMARK_REFRESH_OVERLAP = int(os.environ.get('PAY_BENCHMARK_REFRESH_OVERLAP', 15 * 60))
+
+# Worker shift feed (shifts/feed.py): seconds a worker's set of applied shift
+# ids is cached, and seconds the shared list of active shift ids is reused
+# for unfiltered feed requests (0 disables the cached feed).
+APPLIED_SHIFTS_CACHE_TTL = int(os.environ.get('APPLIED_SHIFTS_CACHE_TTL', 60 * 60))
+WORKER_FEED_CACHE_TTL = int(os.environ.get('WORKER_FEED_CACHE_TTL', 0))
+
+# Rows fetched per database round trip (and written per chunk) by the
+# streaming exports (shifts/exports.py)
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+
+# Profile pictures (accounts/pictures.py): largest upload accepted, side of
+# the stored picture, square thumbnail sizes, and threads rendering them
+# after commit (0 renders in the saving thread, e.g. in tests and scripts).
+PROFILE_PICTURE_MAX_BYTES = int(os.environ.get('PROFILE_PICTURE_MAX_BYTES', 10 * 2**20))
+PROFILE_PICTURE_MAX_PIXELS = int(os.environ.get('PROFILE_PICTURE_MAX_PIXELS', 40_000_000))
+PROFILE_PICTURE_MAX_SIDE = int(os.environ.get('PROFILE_PICTURE_MAX_SIDE', 1024))
+PROFILE_PICTURE_SIZES = {'small': 64, 'medium': 160, 'large': 480}
+PROFILE_PICTURE_WORKERS = int(os.environ.get('PROFILE_PICTURE_WORKERS', 2))
+
+# Response compression (medicall/compression.py): payload types compressed,
+# smallest body worth compressing, brotli quality per request and for bodies
+# cached precompressed, and seconds those are kept (0 disables the cache).
+COMPRESSION_CONTENT_TYPES = ('application/json', 'application/msgpack')
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+COMPRESSION_CACHED_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_CACHED_BROTLI_QUALITY', 9))
+COMPRESSION_CACHE_TTL = int(os.environ.get('COMPRESSION_CACHE_TTL', 5 * 60))
+
+# OpenAPI schema (medicall/schema.py): where build_openapi_schema writes it
+# and how long clients may reuse it before revalidating with its ETag.
+OPENAPI_SCHEMA_DIR = os.environ.get('OPENAPI_SCHEMA_DIR', os.path.join(BASE_DIR, 'openapi'))
+OPENAPI_SCHEMA_MAX_AGE = int(os.environ.get('OPENAPI_SCHEMA_MAX_AGE', 24 * 60 * 60))
+
+SWAGGER_SETTINGS = {'SPEC_URL': ('schema-json', {'format': '.json'})}
+REDOC_SETTINGS = {'SPEC_URL': ('schema-json', {'format': '.json'})}
+
+# Seconds a fresh process may take for django.setup() and URL resolution
+# before the startup regression test fails (medicall/startup.py)
+COLD_START_BUDGET = float(os.environ.get('COLD_START_BUDGET', 3.0))
 
 
 # Password validation
@@ -159,12 +279,26 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework settings
 REST_FRAMEWORK = {
+    # Proxies in front of the app (Render's load balancer); client IPs for
+    # rate limits come from X-Forwarded-For past these.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 1)),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # orjson by default; MessagePack for clients sending Accept: application/msgpack
+    'DEFAULT_RENDERER_CLASSES': (
+        'medicall.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'medicall.renderers.MessagePackRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'medicall.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': (
@@ -197,6 +331,17 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 
     'JTI_CLAIM': 'jti',
+
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.TokenRefreshSerializer',
+}
+
+# Cached user claims for CachedJWTAuthentication (TTLs in seconds)
+JWT_USER_CACHE = {
+    'LOCAL_SIZE': int(os.environ.get('JWT_USER_CACHE_SIZE', 1024)),
+    'LOCAL_TTL': int(os.environ.get('JWT_USER_LOCAL_TTL', 30)),
+    'SHARED_TTL': int(os.environ.get('JWT_USER_SHARED_TTL', 300)),
+    # How long a "not revoked" answer from the blacklist table is trusted
+    'BLACKLIST_MISS_TTL': int(os.environ.get('JWT_BLACKLIST_MISS_TTL', 30)),
 }
 
 # CORS settings
@@ -244,6 +389,13 @@ CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
 
 # Logging configuration
+# Request threads only enqueue records; formatting and file I/O run on a
+# background listener thread (see medicall/log.py).
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json' if not DEBUG else 'verbose')
+# Fraction of INFO/DEBUG records kept for high-volume loggers (auth endpoints).
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', '1.0' if DEBUG else '0.1'))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -256,32 +408,44 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'medicall.log.JsonFormatter',
+        },
+    },
+    'filters': {
+        'redact': {
+            '()': 'medicall.log.RedactFilter',
+        },
+        'sample': {
+            '()': 'medicall.log.SamplingFilter',
+            'rate': LOG_SAMPLE_RATE,
+            'loggers': ['accounts'],
+        },
     },
     'handlers': {
         'file': {
-            'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'level': LOG_LEVEL,
+            'class': 'medicall.log.QueueFileHandler',
             'filename': os.path.join(BASE_DIR, 'logs', 'django.log'),
-            'formatter': 'verbose',
+            'formatter': LOG_FORMAT,
+            'filters': ['sample', 'redact'],
         },
         'console': {
-            'level': 'INFO',
+            'level': LOG_LEVEL,
             'class': 'logging.StreamHandler',
-            'formatter': 'simple',
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'simple',
+            'filters': ['sample', 'redact'],
         },
     },
     'root': {
         'handlers': ['console', 'file'],
-        'level': 'INFO',
+        'level': LOG_LEVEL,
     },
     'loggers': {
         'django': {
             'handlers': ['console', 'file'],
-            'level': 'INFO',
+            'level': LOG_LEVEL,
             'propagate': False,
         },
     },
 }
-
-# Create logs directory if it doesn't exist
-os.makedirs(os.path.join(BASE_DIR, 'logs'), exist_ok=True)
@@ -0,0 +1,75 @@
+"""
+Measuring how long a fresh process takes to become ready to serve.
+
+A cold start is timed in a new interpreter: ``django.setup()`` followed by
+resolving a URL, which imports the whole URLconf and so every view module.
+``import_profile`` runs the same under ``python -X importtime`` and
+totals the report per top-level package. ``cold_start`` also reports the
+modules that were loaded, so tests can check that modules kept lazy stay
+out of startup.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+
+COLD_START_SCRIPT = '''
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+from django.urls import resolve
+resolve('/api/health/')
+elapsed = time.perf_counter() - started
+print(json.dumps({'seconds': elapsed, 'modules': sorted(sys.modules)}))
+'''
+
+
+def _run(args):
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'medicall.settings')}
+    return subprocess.run([sys.executable, *args, '-c', COLD_START_SCRIPT], cwd=settings.BASE_DIR,
+                          env=env, capture_output=True, text=True, check=True)
+
+
+def cold_start():
+    """``{'seconds', 'modules'}`` for one cold start in a fresh interpreter."""
+    return json.loads(_run([]).stdout.strip().splitlines()[-1])
+
+
+def parse_importtime(report):
+    """
+    ``{package: [self_us, cumulative_us]}`` from ``-X importtime`` output. A
+    package's cumulative time counts only its outermost imports, so modules
+    it imports from itself are not counted twice.
+    """
+    entries = []
+    for line in report.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip().partition('.')[0], int(self_us), int(cumulative_us)))
+
+    totals = {}
+    ancestors = []
+    # The report lists each import after everything it imported; reversed,
+    # every module comes after the imports enclosing it.
+    for depth, package, self_us, cumulative_us in reversed(entries):
+        del ancestors[depth:]
+        entry = totals.setdefault(package, [0, 0])
+        entry[0] += self_us
+        if package not in ancestors:
+            entry[1] += cumulative_us
+        ancestors.append(package)
+    return totals
+
+
+def import_profile():
+    """``(seconds, {package: [self_us, cumulative_us]})`` for one cold start under ``-X importtime``."""
+    result = _run(['-X', 'importtime'])
+    seconds = json.loads(result.stdout.strip().splitlines()[-1])['seconds']
+    return seconds, parse_importtime(result.stderr)
@@ -0,0 +1,538 @@
+import datetime
+import gzip
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import zoneinfo
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User, WorkerProfile, HospitalProfile
+from notifications.models import Notification
+from shifts.models import Shift, Application
+from shifts.serializers import ShiftSerializer
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        self.hospital = User.objects.create_user('hosp', password='x', user_type='hospital')
+        HospitalProfile.objects.create(
+            user=self.hospital, hospital_name='General', license_number='L1', address='1 Road',
+            city='Lagos', state='LA', zip_code='100001', phone='1',
+        )
+        self.worker = User.objects.create_user('work', password='x', user_type='worker')
+        WorkerProfile.objects.create(user=self.worker, license_number='RN1')
+        self.api = APIClient()
+
+    def post_shifts(self, count):
+        shifts = [Shift.objects.create(
+            hospital=self.hospital, department='ER', role='Nurse', date='2025-07-01', start_time='07:00',
+            end_time='15:00', pay_per_hour=50, requirements='RN', location='ER',
+        ) for _ in range(count)]
+        for shift in shifts:
+            Application.objects.create(shift=shift, worker=User.objects.create_user(f'w{shift.id}', password='x'))
+        return shifts
+
+    def dashboard(self, user, **params):
+        self.api.force_authenticate(user)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.api.get('/api/dashboard/', params)
+        return response, len(captured)
+
+    def test_hospital_dashboard_uses_a_fixed_number_of_queries(self):
+        self.post_shifts(1)
+        Notification.objects.create(recipient=self.hospital, notification_type='system', title='Hi', message='!')
+        _, few = self.dashboard(self.hospital)
+        self.post_shifts(4)
+        response, many = self.dashboard(self.hospital)
+        self.assertEqual(few, many)
+        data = response.json()
+        self.assertEqual(data['profile']['hospital_name'], 'General')
+        self.assertEqual(len(data['shifts']), 5)
+        self.assertEqual({shift['applicant_count'] for shift in data['shifts']}, {1})
+        self.assertEqual(data['applications'][0]['conflicting_shifts'], [])
+        self.assertEqual(data['notifications'], {'unread': 1})
+        self.assertEqual((data['stats']['shifts']['total'], data['stats']['applications']['pending']), (5, 5))
+
+    def test_worker_sections_are_selectable(self):
+        applied, open_shift = self.post_shifts(2)
+        Application.objects.create(shift=applied, worker=self.worker, status='approved')
+        response, _ = self.dashboard(self.worker, include='shifts,applications,stats')
+        data = response.json()
+        self.assertEqual(sorted(data), ['applications', 'shifts', 'stats'])
+        self.assertEqual([shift['id'] for shift in data['shifts']], [open_shift.id])
+        self.assertEqual([application['shift']['id'] for application in data['applications']], [applied.id])
+        self.assertEqual(data['stats']['applications']['approved'], 1)
+        self.assertEqual(self.dashboard(self.worker, include='profile,payroll')[0].status_code, 400)
+
+
+class RendererTests(TestCase):
+    def setUp(self):
+        self.hospital = User.objects.create_user('hosp', password='x', user_type='hospital')
+        self.shift = Shift.objects.create(
+            hospital=self.hospital, department='ER', role='Nurse \u2028 lead', date='2025-07-01',
+            start_time='07:00', end_time='15:00', pay_per_hour=Decimal('52.50'), requirements='RN', location='Ward é',
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.hospital)
+
+    def test_orjson_output_matches_drf_json(self):
+        from django.utils.translation import gettext_lazy
+        from rest_framework.renderers import JSONRenderer
+        from medicall.renderers import ORJSONRenderer
+
+        data = {
+            'shifts': ShiftSerializer([self.shift], many=True).data,
+            'decimal': Decimal('12.50'),
+            'aware': datetime.datetime(2025, 7, 1, 7, 30, 15, 120, tzinfo=datetime.timezone.utc),
+            'local': datetime.datetime(2025, 7, 1, 7, 30, tzinfo=zoneinfo.ZoneInfo('Africa/Lagos')),
+            'day': datetime.date(2025, 7, 1),
+            'time': datetime.time(19, 0),
+            'lazy': gettext_lazy('Active'),
+            'tuple': (1, 2.5, None, True),
+            1: 'int key',
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(ORJSONRenderer().render(data, renderer_context={'indent': 4}),
+                         JSONRenderer().render(data, renderer_context={'indent': 4}))
+
+    def test_msgpack_by_accept_header(self):
+        import msgpack
+
+        as_json = self.api.get('/api/shifts/hospital/').json()
+        response = self.api.get('/api/shifts/hospital/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), as_json)
+
+    def test_parser_rejects_malformed_json(self):
+        response = self.api.post('/api/shifts/', '{"role": "Nurse",', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('JSON parse error', response.json()['detail'])
+
+
+class ReadSerializerTests(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIRequestFactory
+        from rest_framework.request import Request
+
+        self.hospital = User.objects.create_user('hosp', password='x', user_type='hospital', city='Lagos',
+                                                 profile_picture='profile_pictures/hosp.png')
+        self.worker = User.objects.create_user('nurse', password='x', user_type='worker')
+        self.shift = Shift.objects.create(
+            hospital=self.hospital, department='ER', role='Nurse', date='2025-07-01',
+            start_time='07:00', end_time='15:00', pay_per_hour=Decimal('52.5'), requirements='RN',
+        )
+        self.other = Shift.objects.create(
+            hospital=self.hospital, department='ICU', role='Nurse', date='2025-07-02',
+            start_time='19:00', end_time='07:00', pay_per_hour=Decimal('60.00'), urgency='urgent',
+        )
+        Application.objects.create(shift=self.shift, worker=self.worker, cover_letter='Hi',
+                                   proposed_rate=Decimal('55.1'))
+        Application.objects.create(shift=self.other, worker=self.worker)
+        Notification.objects.create(recipient=self.worker, sender=self.hospital, title='New shift',
+                                    message='ER tomorrow', notification_type='shift_posted', related_shift=self.other)
+        Notification.objects.create(recipient=self.worker, title='Welcome', message='Hello',
+                                    notification_type='system')
+        self.request = Request(APIRequestFactory().get('/api/shifts/'))
+
+    def assert_same_output(self, serializer_class, instances, context):
+        from rest_framework.renderers import JSONRenderer
+        from medicall.readers import read_serializer
+
+        expected = serializer_class(instances, many=True, context=context).data
+        fast = read_serializer(serializer_class)(instances, many=True, context=context).data
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(expected))
+        self.assertEqual(list(fast[0]), list(expected[0]))
+
+    def test_matches_drf_output(self):
+        from notifications.serializers import NotificationSerializer
+        from shifts.serializers import ApplicationSerializer, HospitalApplicationSerializer
+
+        context = {'request': self.request}
+        applications = list(Application.objects.select_related('shift__hospital', 'worker'))
+        for tz in ('UTC', 'Africa/Lagos'):
+            with timezone.override(zoneinfo.ZoneInfo(tz)):
+                self.assert_same_output(ShiftSerializer, list(Shift.objects.select_related('hospital')), context)
+                self.assert_same_output(ApplicationSerializer, applications, context)
+                self.assert_same_output(HospitalApplicationSerializer, applications,
+                                        {**context, 'conflicts': {applications[0].id: [self.other.id]}})
+                self.assert_same_output(NotificationSerializer,
+                                        list(Notification.objects.select_related('sender', 'recipient')), {})
+
+    def test_list_views_use_reader(self):
+        api = APIClient()
+        api.force_authenticate(self.worker)
+        response = api.get('/api/notifications/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()['results'][0]['sender'])
+        self.assertEqual(response.json()['results'][1]['sender']['profile_picture'],
+                         'http://testserver/media/profile_pictures/hosp.png')
+        response = api.get('/api/shifts/applications/')
+        self.assertEqual(response.json()['results'][1]['proposed_rate'], '55.10')
+        self.assertEqual(response.json()['results'][1]['shift']['total_pay'], '420.00')
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.hospital = User.objects.create_user('hosp', password='x', user_type='hospital')
+        self.worker = User.objects.create_user('work', password='x', user_type='worker')
+        for day in range(1, 21):
+            Shift.objects.create(
+                hospital=self.hospital, department='ER', role='Nurse', date=datetime.date(2025, 7, day),
+                start_time='07:00', end_time='15:00', pay_per_hour=50, requirements='RN', location='ER',
+            )
+        self.api = APIClient()
+        self.api.force_authenticate(self.worker)
+
+    def test_negotiates_brotli_and_gzip(self):
+        import brotli
+        from medicall.compression import accepted_encoding
+
+        plain = self.api.get('/api/shifts/worker/')
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(plain['Vary'].count('Accept-Encoding'), 1)
+
+        response = self.api.get('/api/shifts/worker/', HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+
+        response = self.api.get('/api/shifts/worker/', HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+        self.assertEqual(accepted_encoding('gzip;q=1.0, br;q=0.5'), 'gzip')
+        self.assertEqual(accepted_encoding('*'), 'br')
+        self.assertIsNone(accepted_encoding('identity, *;q=0'))
+
+    def test_skips_small_and_streaming_responses(self):
+        response = self.api.get('/api/notifications/', HTTP_ACCEPT_ENCODING='br')
+        self.assertNotIn('Content-Encoding', response)
+        hospital = APIClient()
+        hospital.force_authenticate(self.hospital)
+        response = hospital.get('/api/shifts/hospital/export/shifts/', HTTP_ACCEPT_ENCODING='br')
+        self.assertTrue(response.streaming)
+        self.assertNotIn('Content-Encoding', response)
+
+    @override_settings(WORKER_FEED_CACHE_TTL=60)
+    def test_cached_feed_is_compressed_once(self):
+        from unittest import mock
+        from medicall import compression
+
+        with mock.patch.object(compression.brotli, 'compress', wraps=compression.brotli.compress) as compress:
+            first = self.api.get('/api/shifts/worker/', HTTP_ACCEPT_ENCODING='br')
+            second = self.api.get('/api/shifts/worker/', HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(first['Content-Encoding'], 'br')
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(compress.call_count, 1)
+
+
+class OpenAPISchemaTests(TestCase):
+    def setUp(self):
+        from medicall.schema import load_schema
+
+        self.schema_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.schema_dir)
+        load_schema.cache_clear()
+        self.addCleanup(load_schema.cache_clear)
+
+    def test_serves_built_schema_with_etag(self):
+        with override_settings(OPENAPI_SCHEMA_DIR=self.schema_dir):
+            call_command('build_openapi_schema', stdout=StringIO())
+            with open(f'{self.schema_dir}/swagger.json', 'rb') as built:
+                body = built.read()
+            self.assertIn('/shifts/worker/', json.loads(body)['paths'])
+
+            response = self.client.get('/swagger.json/')
+            self.assertEqual(response.content, body)
+            self.assertIn('max-age=86400', response['Cache-Control'])
+            response = self.client.get('/swagger.json/', HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(self.client.get('/swagger.yaml/')['Content-Type'], 'application/yaml')
+            self.assertEqual(self.client.get('/swagger.xml/').status_code, 404)
+            self.assertContains(self.client.get('/swagger/'), '/swagger.json/')
+
+    def test_generates_once_without_built_file(self):
+        from unittest import mock
+        from medicall import schema
+
+        with override_settings(OPENAPI_SCHEMA_DIR=self.schema_dir), \
+                mock.patch.object(schema, 'generate_schema', wraps=schema.generate_schema) as generate:
+            first = self.client.get('/swagger.json/')
+            second = self.client.get('/swagger.json/')
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(generate.call_count, 1)
+
+
+class ColdStartTests(TestCase):
+    def test_setup_and_url_resolution_within_budget(self):
+        from django.conf import settings
+        from medicall.startup import cold_start
+
+        # Best of two runs, so a single slow start on a busy machine does not fail the build.
+        runs = [cold_start() for _ in range(2)]
+        self.assertLess(min(run['seconds'] for run in runs), settings.COLD_START_BUDGET)
+        # Heavy modules only some requests need stay out of startup.
+        for module in ('numpy', 'drf_yasg.generators', 'drf_yasg.views'):
+            self.assertNotIn(module, runs[0]['modules'])
+
+    def test_parse_importtime(self):
+        from medicall.startup import parse_importtime
+
+        report = '\n'.join([
+            'import time: self [us] | cumulative | imported package',
+            'import time:       100 |        100 |     numpy.core',
+            'import time:        50 |        150 |   numpy',
+            'import time:        20 |        170 | shifts.market',
+            'import time:        30 |         30 | numpy.linalg',
+        ])
+        self.assertEqual(parse_importtime(report), {'numpy': [180, 180], 'shifts': [20, 170]})
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        from rest_framework.test import APIRequestFactory
+
+        cache.clear()
+        self.factory = APIRequestFactory()
+
+    def route(self, method='get', user_id=None, write=False):
+        """``(read alias before, read alias after a write)`` for one request through the middleware."""
+        from django.db import router
+        from rest_framework_simplejwt.tokens import AccessToken
+        from medicall.replicas import ReplicaRoutingMiddleware
+
+        headers = {}
+        if user_id is not None:
+            token = AccessToken()
+            token['user_id'] = user_id
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        seen = []
+
+        def view(request):
+            seen.append(router.db_for_read(Shift))
+            if write:
+                seen.append(router.db_for_write(Shift))
+                seen.append(router.db_for_read(Shift))
+            return None
+
+        ReplicaRoutingMiddleware(view)(getattr(self.factory, method)('/api/shifts/', **headers))
+        return seen
+
+    def test_reads_of_safe_requests_use_replica(self):
+        self.assertEqual(self.route('get'), ['replica'])
+        self.assertEqual(self.route('post'), ['default'])
+        self.assertEqual(Shift.objects.select_for_update().db, 'default')
+        # Outside a request everything stays on the primary.
+        from django.db import router
+        self.assertEqual(router.db_for_read(Shift), 'default')
+
+    def test_writes_pin_user_to_primary(self):
+        self.assertEqual(self.route('post', user_id=7, write=True), ['default', 'default', 'default'])
+        self.assertEqual(self.route('get', user_id=7), ['default'])
+        self.assertEqual(self.route('get', user_id=8), ['replica'])
+        # A write during a read request moves its later reads to the primary too.
+        self.assertEqual(self.route('get', user_id=8, write=True), ['replica', 'default', 'default'])
+        self.assertEqual(self.route('get', user_id=8), ['default'])
+        cache.clear()
+        self.assertEqual(self.route('get', user_id=7), ['replica'])
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replica_configured(self):
+        self.assertEqual(self.route('get'), ['default'])
+
+
+# 'default' stands in for the replica so the views can run against the test database.
+@override_settings(DATABASE_REPLICAS=['default'])
+class SignInPinTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_register_and_login_pin_the_new_user(self):
+        from medicall.replicas import is_pinned
+
+        response = self.client.post('/api/auth/register/', {
+            'username': 'new', 'email': 'new@example.com', 'user_type': 'worker', 'first_name': 'N', 'last_name': 'W',
+            'password': 'Str0ng-pass!', 'password_confirm': 'Str0ng-pass!',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        user_id = response.json()['user']['id']
+        self.assertTrue(is_pinned(user_id))
+
+        cache.clear()
+        response = self.client.post('/api/auth/login/', {'username': 'new', 'password': 'Str0ng-pass!'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertTrue(is_pinned(user_id))
+
+
+@override_settings(RATE_LIMITS_ENABLED=True, RATE_LIMITS={
+    'login': {'methods': ('POST',), 'ip': ('2/min', 2)},
+    'application_bulk': {'methods': ('POST',), 'user': ('1/hour', 1)},
+})
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def login(self, **extra):
+        return self.client.post('/api/auth/login/', {'username': 'nobody', 'password': 'wrong'},
+                                content_type='application/json', **extra)
+
+    def test_login_limited_per_ip_before_view(self):
+        self.assertNotEqual(self.login().status_code, 429)
+        self.assertNotEqual(self.login().status_code, 429)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertIn(int(response['Retry-After']), range(1, 31))
+        self.assertEqual(len(queries), 0)
+        # Another client, here behind the trusted proxy, has its own bucket.
+        self.assertNotEqual(self.login(HTTP_X_FORWARDED_FOR='203.0.113.9').status_code, 429)
+        with override_settings(RATE_LIMITS_ENABLED=False):
+            self.assertNotEqual(self.login().status_code, 429)
+
+    def test_bulk_apply_limited_per_user(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        statuses = []
+        workers = [User.objects.create(username=f'worker{i}', user_type='worker') for i in range(2)]
+        for worker in workers * 2:
+            api = APIClient()
+            api.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(worker)}')
+            statuses.append(api.post('/api/shifts/applications/bulk/', [], format='json').status_code)
+        self.assertEqual(statuses[:2], [400, 400])
+        self.assertEqual(statuses[2:], [429, 429])
+
+    def test_buckets_refill_and_take_all_or_none(self):
+        from unittest import mock
+        from medicall.throttling import parse_rate, take
+
+        self.assertEqual(parse_rate('30/min'), 0.5)
+        with mock.patch('medicall.throttling.time.time', return_value=1000.0) as clock:
+            self.assertEqual(take([('a', 0.5, 1)]), 0)
+            self.assertEqual(take([('a', 0.5, 1), ('b', 0.5, 1)]), 2.0)
+            clock.return_value = 1001.0
+            self.assertEqual(take([('a', 0.5, 1)]), 1.0)
+            clock.return_value = 1002.0
+            # b was not drained by the rejected request above.
+            self.assertEqual(take([('a', 0.5, 1), ('b', 0.5, 1)]), 0)
+            self.assertEqual(take([('b', 0.5, 1)]), 2.0)
+
+
+class CurrencyRateTests(TestCase):
+    def test_rate_from_cached_table(self):
+        cache.set('currency:rates:USD', {'base': 'USD', 'rates': {'USD': 1, 'EUR': 0.5}, 'source': 'test'})
+        try:
+            response = self.client.get('/api/currency-rate/', {'from': 'usd', 'to': 'eur'})
+        finally:
+            cache.delete('currency:rates:USD')
+        self.assertEqual(response.json(), {'rate': 0.5, 'from': 'USD', 'to': 'EUR', 'source': 'test'})
+
+    def test_rejects_codes_that_are_not_three_letters(self):
+        from unittest import mock
+
+        with mock.patch('medicall.currency.requests.get') as upstream:
+            for params in ({'from': 'US'}, {'to': 'EURO'}, {'from': 'U$D'}, {'to': 'EUR\n'}, {'from': ''}):
+                with self.subTest(params=params):
+                    response = self.client.get('/api/currency-rate/', params)
+                    self.assertEqual(response.status_code, 400)
+        upstream.assert_not_called()
+
+
+class LoggingTests(SimpleTestCase):
+    def record(self, msg='login %s', args=('ada',), name='accounts.views', level=logging.INFO, **extra):
+        record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+        record.__dict__.update(extra)
+        return record
+
+    def test_redacts_args_and_extra_fields(self):
+        from medicall.log import REDACTED, RedactFilter
+
+        record = self.record('payload %(user)s', None, authorization='Bearer x', path='/api/auth/login/',
+                             user={'Password': 'pw', 'profile': [{'token': 't', 'city': 'Lagos'}]})
+        record.args = {'user': 'ada', 'refresh': 'r'}
+        self.assertTrue(RedactFilter().filter(record))
+        self.assertEqual(record.args, {'user': 'ada', 'refresh': REDACTED})
+        self.assertEqual(record.user, {'Password': REDACTED, 'profile': [{'token': REDACTED, 'city': 'Lagos'}]})
+        self.assertEqual((record.authorization, record.path), (REDACTED, '/api/auth/login/'))
+
+        record = self.record('%s %s', ({'license_number': 'RN-1'}, 'ok'))
+        RedactFilter(fields=('LICENSE_NUMBER',)).filter(record)
+        self.assertEqual(record.getMessage(), "{'license_number': '[REDACTED]'} ok")
+
+    def test_samples_only_low_severity_records_of_listed_loggers(self):
+        from unittest import mock
+        from medicall.log import SamplingFilter
+
+        sampling = SamplingFilter(rate=0.1, loggers=['accounts'])
+        with mock.patch('medicall.log.random.random', return_value=0.5):
+            self.assertFalse(sampling.filter(self.record(name='accounts')))
+            self.assertFalse(sampling.filter(self.record(name='accounts.views')))
+            self.assertTrue(sampling.filter(self.record(name='accounts.views', level=logging.WARNING)))
+            self.assertTrue(sampling.filter(self.record(name='accountsx')))
+            self.assertTrue(sampling.filter(self.record(name='shifts.views')))
+            self.assertTrue(SamplingFilter(rate=1.0, loggers=['accounts']).filter(self.record()))
+        with mock.patch('medicall.log.random.random', return_value=0.05):
+            self.assertTrue(sampling.filter(self.record(name='accounts.views')))
+
+    def test_json_lines_through_the_queue(self):
+        from medicall.log import JsonFormatter, QueueFileHandler
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        handler = QueueFileHandler(os.path.join(directory, 'app.log'))
+        handler.setFormatter(JsonFormatter())
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            failed = self.record('failed for %s', ('ada',), level=logging.ERROR, exc_info=sys.exc_info(),
+                                 shift_id=7)
+        handler.emit(self.record(user=object()))
+        handler.emit(failed)
+        handler.stop()
+
+        with open(os.path.join(directory, 'app.log')) as written:
+            first, second = [json.loads(line) for line in written]
+        self.assertEqual((first['level'], first['logger'], first['message']), ('INFO', 'accounts.views', 'login ada'))
+        self.assertTrue(first['user'].startswith('<object object'))
+        self.assertEqual((second['message'], second['shift_id']), ('failed for ada', 7))
+        self.assertIn('ValueError: boom', second['exc_info'])
+
+    def test_concurrent_first_emits_start_one_listener(self):
+        import threading
+        import time
+        from unittest import mock
+        from medicall.log import QueueFileHandler
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        handler = QueueFileHandler(os.path.join(directory, 'app.log'))
+        self.addCleanup(handler.stop)
+        start = handler.start
+
+        def slow_start():
+            time.sleep(0.05)  # wide enough for every thread to pass the unlocked check
+            start()
+
+        with mock.patch.object(handler, 'start', side_effect=slow_start) as started:
+            threads = [threading.Thread(target=handler.emit, args=(self.record(),)) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(started.call_count, 1)
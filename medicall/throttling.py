@@ -0,0 +1,155 @@
+"""
+Token-bucket rate limits, checked before the view runs.
+
+``RATE_LIMITS`` maps URL names to the methods it limits and a budget per
+client IP (``'ip'``) and/or per user (``'user'``). A budget is
+``(rate, burst)``:
+- ``rate`` is ``'count/period'``, as in DRF throttles;
+- ``burst`` is the bucket size, the number of requests allowed at once
+  after a quiet spell.
+
+A request takes a token from each of its buckets. Once any bucket is
+empty the request gets a 429 with ``Retry-After``, and the view never
+runs, so neither does its password hashing, query or upstream call.
+
+Buckets live in the Django cache. With ``REDIS_URL`` set, one Lua script
+refills all of a request's buckets and takes from them in one atomic
+step, so the limits hold across gunicorn workers. Other caches update the
+buckets under a process-wide lock, which makes the limits per process.
+
+Users are identified from their access token without a query. The IP is
+DRF's ``get_ident``, which trusts the last ``NUM_PROXIES`` entries of
+``X-Forwarded-For``.
+"""
+
+import math
+import threading
+import time
+from functools import cache as memoize
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.redis import RedisCache
+from django.http import JsonResponse
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.throttling import BaseThrottle
+
+from accounts.authentication import request_user_id
+
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+# KEYS are the buckets; ARGV holds rate (tokens per second) and burst for
+# each, in order. If every bucket has a token, one is taken from each and
+# 0 is returned. Otherwise nothing is taken and the script returns the
+# seconds until they all have one.
+TAKE_SCRIPT = '''
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local levels, wait = {}, 0
+for i, key in ipairs(KEYS) do
+    local rate, burst = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    local bucket = redis.call('HMGET', key, 'tokens', 'at')
+    local tokens = tonumber(bucket[1]) or burst
+    local at = tonumber(bucket[2]) or now
+    levels[i] = math.min(burst, tokens + math.max(0, now - at) * rate)
+    if levels[i] < 1 then
+        wait = math.max(wait, (1 - levels[i]) / rate)
+    end
+end
+for i, key in ipairs(KEYS) do
+    local rate, burst = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    local tokens = levels[i]
+    if wait == 0 then
+        tokens = tokens - 1
+    end
+    redis.call('HSET', key, 'tokens', tokens, 'at', now)
+    redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+end
+return tostring(wait)
+'''
+
+_lock = threading.Lock()
+_script = None
+
+
+@memoize
+def parse_rate(rate):
+    """Tokens per second for a ``'count/period'`` rate such as ``'10/min'``."""
+    count, _, period = rate.partition('/')
+    return int(count) / PERIODS[period.strip()[0]]
+
+
+def _ttl(rate, burst):
+    # An expired bucket reads as full, which it would be by then anyway.
+    return math.ceil(burst / rate) + 1
+
+
+def _take_redis(backend, buckets):
+    global _script
+    keys = [backend.make_and_validate_key(key) for key, _, _ in buckets]
+    client = backend._cache.get_client(keys[0], write=True)
+    if _script is None:
+        _script = client.register_script(TAKE_SCRIPT)
+    args = [value for _, rate, burst in buckets for value in (rate, burst)]
+    return float(_script(keys=keys, args=args, client=client))
+
+
+def _take_local(backend, buckets):
+    now = time.time()
+    with _lock:
+        levels = []
+        for key, rate, burst in buckets:
+            tokens, at = backend.get(key, (burst, now))
+            levels.append(min(burst, tokens + max(0.0, now - at) * rate))
+        wait = max(((1 - tokens) / rate for tokens, (_, rate, _) in zip(levels, buckets) if tokens < 1),
+                   default=0.0)
+        for tokens, (key, rate, burst) in zip(levels, buckets):
+            backend.set(key, (tokens if wait else tokens - 1, now), _ttl(rate, burst))
+    return wait
+
+
+def take(buckets):
+    """
+    Take a token from each of ``buckets`` (``(key, rate, burst)``, rate in
+    tokens per second), all or none. Returns 0, or the seconds until every
+    bucket has a token again.
+    """
+    backend = caches[DEFAULT_CACHE_ALIAS]
+    if isinstance(backend, RedisCache):
+        return _take_redis(backend, buckets)
+    return _take_local(backend, buckets)
+
+
+def buckets_for(request, name, limit):
+    buckets = []
+    if 'ip' in limit:
+        ident = BaseThrottle().get_ident(request)
+        buckets.append((f'ratelimit:{name}:ip:{ident}', *limit['ip']))
+    if 'user' in limit:
+        user_id = request_user_id(request)
+        if user_id is not None:
+            buckets.append((f'ratelimit:{name}:user:{user_id}', *limit['user']))
+    return [(key, parse_rate(rate), burst) for key, rate, burst in buckets]
+
+
+def throttled(wait):
+    retry_after = max(1, math.ceil(wait))
+    response = JsonResponse(
+        {'detail': f'Request was throttled. Expected available in {retry_after} seconds.'}, status=429,
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+class RateLimitMiddleware(MiddlewareMixin):
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.RATE_LIMITS_ENABLED:
+            return None
+        name = request.resolver_match.url_name
+        limit = settings.RATE_LIMITS.get(name)
+        if limit is None or request.method not in limit['methods']:
+            return None
+        buckets = buckets_for(request, name, limit)
+        wait = take(buckets) if buckets else 0
+        return throttled(wait) if wait else None
@@ -18,26 +18,11 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-from medicall.views import currency_rate
+from medicall.schema import openapi_schema, schema_ui
+from medicall.views import currency_rate, dashboard
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="MediCall API",
-        default_version='v1',
-        description="API for connecting hospitals with medical professionals",
-        terms_of_service="https://www.medicall.com/terms/",
-        contact=openapi.Contact(email="contact@medicall.com"),
-        license=openapi.License(name="MIT License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
-
 @csrf_exempt
 def health_check(request):
     return JsonResponse({"status": "healthy"}, status=200)
@@ -45,15 +30,17 @@ def health_check(request):
 urlpatterns = [
     path('admin/', admin.site.urls),
     
-    # API Documentation
-    path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    # API Documentation; the UI pages load the prebuilt schema (medicall/schema.py)
+    path('swagger<format>/', openapi_schema, name='schema-json'),
+    path('swagger/', schema_ui('swagger'), name='schema-swagger-ui'),
+    path('redoc/', schema_ui('redoc'), name='schema-redoc'),
     
     # API Endpoints
     path('api/auth/', include('accounts.urls')),
     path('api/shifts/', include('shifts.urls')),
     path('api/notifications/', include('notifications.urls')),
+    path('api/analytics/', include('analytics.urls')),
+    path('api/dashboard/', dashboard, name='dashboard'),
     path('api/currency-rate/', currency_rate, name='currency_rate'),
     path('api/health/', health_check, name='health_check'),
 ]
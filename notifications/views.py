@@ -2,17 +2,18 @@ from django.shortcuts import render
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
+from medicall.readers import ReadSerializerMixin
 from .models import Notification
 from .serializers import NotificationSerializer
 
 # Create your views here.
 
-class NotificationListView(generics.ListAPIView):
+class NotificationListView(ReadSerializerMixin, generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Notification.objects.filter(recipient=self.request.user)
+        return Notification.objects.filter(recipient=self.request.user).select_related('sender', 'recipient')
 
 
 class NotificationDetailView(generics.RetrieveDestroyAPIView):
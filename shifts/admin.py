@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Shift, Application, ShiftReview
+from .models import Shift, Application, ShiftReview, MonthlyEarnings, PayBenchmark
 
 
 @admin.register(Shift)
@@ -7,7 +7,7 @@ class ShiftAdmin(admin.ModelAdmin):
     list_display = ('role', 'department', 'hospital', 'date', 'urgency', 'status', 'pay_per_hour', 'applicant_count')
     list_filter = ('status', 'urgency', 'department', 'date', 'created_at')
     search_fields = ('role', 'department', 'hospital__username', 'location')
-    readonly_fields = ('applicant_count', 'created_at', 'updated_at')
+    readonly_fields = ('applicant_count', 'starts_at', 'ends_at', 'duration_hours', 'created_at', 'updated_at')
     date_hierarchy = 'date'
     
     fieldsets = (
@@ -15,7 +15,7 @@ class ShiftAdmin(admin.ModelAdmin):
             'fields': ('hospital', 'department', 'role', 'description')
         }),
         ('Schedule', {
-            'fields': ('date', 'start_time', 'end_time', 'duration_hours')
+            'fields': ('date', 'start_time', 'end_time', 'starts_at', 'ends_at', 'duration_hours')
         }),
         ('Compensation', {
             'fields': ('pay_per_hour',)
@@ -54,3 +54,20 @@ class ShiftReviewAdmin(admin.ModelAdmin):
     list_filter = ('rating', 'created_at')
     search_fields = ('reviewer__username', 'reviewed_user__username', 'shift__role')
     readonly_fields = ('created_at',)
+
+
+@admin.register(MonthlyEarnings)
+class MonthlyEarningsAdmin(admin.ModelAdmin):
+    list_display = ('worker', 'month', 'shifts', 'hours', 'gross')
+    search_fields = ('worker__username',)
+    date_hierarchy = 'month'
+    readonly_fields = ('worker', 'month', 'shifts', 'hours', 'gross', 'updated_at')
+
+
+@admin.register(PayBenchmark)
+class PayBenchmarkAdmin(admin.ModelAdmin):
+    list_display = ('role', 'department', 'country', 'urgency', 'source', 'sample_size', 'p25', 'p50', 'p75', 'p90')
+    list_filter = ('source', 'urgency', 'country')
+    search_fields = ('role', 'department')
+    readonly_fields = ('source', 'role', 'department', 'country', 'urgency', 'sample_size',
+                       'p25', 'p50', 'p75', 'p90', 'computed_at')
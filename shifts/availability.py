@@ -0,0 +1,228 @@
+"""
+Matching shifts against worker availability and existing bookings.
+
+A worker is free for a shift when their weekly windows cover it (see
+``accounts.availability``) and no approved shift (``BusyInterval``)
+overlaps it. The same bookings are used to stop a worker from being
+approved for two overlapping shifts.
+"""
+
+import datetime
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.db.models import Exists, Func, OuterRef
+
+from accounts.availability import filter_available
+from accounts.models import WorkerProfile
+from .earnings import refresh_earnings
+from .intervals import IntervalTree
+from .models import BusyInterval
+
+
+# Longest possible booking: a slot ending at or before its start time runs
+# into the next day, so none lasts more than a day plus a DST shift.
+MAX_SHIFT_SPAN = datetime.timedelta(hours=25)
+
+
+def shift_bounds(shift):
+    return shift.starts_at, shift.ends_at
+
+
+class TsTzRange(Func):
+    function = 'TSTZRANGE'
+
+
+def overlapping(starts_at, ends_at, using='default'):
+    """
+    Bookings overlapping ``[starts_at, ends_at)``.
+
+    No booking is longer than ``MAX_SHIFT_SPAN``, so only rows starting within
+    that distance before the window can overlap it; the extra bound keeps the
+    scan of the ``(worker, starts_at)`` index short. PostgreSQL additionally
+    matches the range against the GiST index on ``tstzrange(starts_at, ends_at)``.
+    """
+    queryset = BusyInterval.objects.using(using).filter(
+        starts_at__lt=ends_at, starts_at__gt=starts_at - MAX_SHIFT_SPAN, ends_at__gt=starts_at,
+    )
+    if connections[using].vendor == 'postgresql':
+        from django.contrib.postgres.fields import DateTimeRangeField
+
+        queryset = queryset.alias(
+            span=TsTzRange('starts_at', 'ends_at', output_field=DateTimeRangeField()),
+        ).filter(span__overlap=(starts_at, ends_at))
+    return queryset
+
+
+def exclude_busy(queryset, starts_at, ends_at, exclude_shift=None):
+    """Drop workers with a booking overlapping the interval from a ``WorkerProfile`` queryset."""
+    busy = overlapping(starts_at, ends_at).filter(worker_id=OuterRef('user_id'))
+    if exclude_shift is not None:
+        busy = busy.exclude(application__shift=exclude_shift)
+    return queryset.filter(~Exists(busy))
+
+
+def free_workers(shift, queryset=None):
+    """Workers whose availability covers ``shift`` and who are not booked during it."""
+    if queryset is None:
+        queryset = WorkerProfile.objects.filter(is_available=True)
+    queryset = filter_available(queryset, shift.date, shift.start_time, shift.end_time)
+    return exclude_busy(queryset, *shift_bounds(shift), exclude_shift=shift)
+
+
+def check_candidates(shift, user_ids):
+    """Map each of ``user_ids`` to whether they are free for ``shift``, in one query."""
+    free = set(
+        free_workers(shift, WorkerProfile.objects.filter(user_id__in=user_ids))
+        .values_list('user_id', flat=True)
+    )
+    return {user_id: user_id in free for user_id in user_ids}
+
+
+class BookingConflict(Exception):
+    """The worker is already booked for shifts overlapping the one being approved."""
+
+    def __init__(self, shift_ids):
+        super().__init__(f'Overlaps shifts {shift_ids}')
+        self.shift_ids = shift_ids
+
+
+def booking_conflicts(worker_id, starts_at, ends_at, exclude_shift=None):
+    """Bookings of ``worker_id`` overlapping the interval."""
+    queryset = overlapping(starts_at, ends_at).filter(worker_id=worker_id)
+    if exclude_shift is not None:
+        queryset = queryset.exclude(application__shift=exclude_shift)
+    return queryset
+
+
+def shift_conflicts(shift, worker_id):
+    """Ids of the shifts ``worker_id`` is booked on that overlap ``shift``."""
+    return list(
+        booking_conflicts(worker_id, *shift_bounds(shift), exclude_shift=shift)
+        .order_by('starts_at').values_list('application__shift_id', flat=True)
+    )
+
+
+def application_conflicts(applications):
+    """
+    Map each application's id to the other shifts its worker is booked on
+    during that shift.
+
+    One query loads the bookings of all the workers involved within the window
+    the shifts span; each application is then answered from a per-worker
+    interval tree.
+    """
+    applications = list(applications)
+    if not applications:
+        return {}
+    bounds = {application.id: shift_bounds(application.shift) for application in applications}
+    window_start = min(starts_at for starts_at, _ in bounds.values())
+    window_end = max(ends_at for _, ends_at in bounds.values())
+    bookings = defaultdict(list)
+    rows = (
+        overlapping(window_start, window_end)
+        .filter(worker_id__in={application.worker_id for application in applications})
+        .values_list('worker_id', 'starts_at', 'ends_at', 'application__shift_id')
+    )
+    for worker_id, starts_at, ends_at, shift_id in rows:
+        bookings[worker_id].append((starts_at, ends_at, shift_id))
+    trees = {worker_id: IntervalTree(intervals) for worker_id, intervals in bookings.items()}
+    conflicts = {}
+    for application in applications:
+        tree = trees.get(application.worker_id)
+        matches = tree.overlapping(*bounds[application.id]) if tree is not None else []
+        conflicts[application.id] = [
+            shift_id for _, _, shift_id in matches if shift_id != application.shift_id
+        ]
+    return conflicts
+
+
+def approve(application):
+    """
+    Approve ``application`` unless its worker is booked for an overlapping
+    shift, in which case ``BookingConflict`` is raised.
+
+    The worker's row is locked for the check, so two hospitals approving the
+    same worker concurrently cannot both succeed.
+    """
+    with transaction.atomic():
+        list(get_user_model().objects.select_for_update()
+             .filter(pk=application.worker_id).values_list('pk', flat=True))
+        conflicts = shift_conflicts(application.shift, application.worker_id)
+        if conflicts:
+            raise BookingConflict(conflicts)
+        application.status = 'approved'
+        application.save()
+
+
+def sync_busy(application):
+    """Keep the application's busy interval in line with its status."""
+    if application.status == 'approved':
+        starts_at, ends_at = shift_bounds(application.shift)
+        BusyInterval.objects.update_or_create(
+            application=application,
+            defaults={'worker_id': application.worker_id, 'starts_at': starts_at, 'ends_at': ends_at},
+        )
+    else:
+        BusyInterval.objects.filter(application=application).delete()
+
+
+def reschedule_busy(shift):
+    """Move the bookings of a shift whose date or times changed."""
+    starts_at, ends_at = shift_bounds(shift)
+    BusyInterval.objects.filter(application__shift=shift).update(starts_at=starts_at, ends_at=ends_at)
+
+
+def retime_shifts(queryset, batch_size=1000):
+    """
+    Recompute the stored intervals of the shifts in ``queryset`` (after a
+    hospital changes time zone) and move their bookings along, one batch per
+    transaction.
+    """
+    zones = {}
+    batch = []
+    count = 0
+    for shift in queryset.order_by('pk').iterator(chunk_size=batch_size):
+        if shift.hospital_id not in zones:
+            zones[shift.hospital_id] = shift.hospital_timezone()
+        shift.set_interval(zones[shift.hospital_id])
+        batch.append(shift)
+        if len(batch) >= batch_size:
+            count += _save_intervals(batch, batch_size)
+            batch = []
+    return count + _save_intervals(batch, batch_size)
+
+
+def _save_intervals(shifts, batch_size):
+    from .models import Shift
+
+    by_id = {shift.pk: shift for shift in shifts}
+    with transaction.atomic():
+        Shift.objects.bulk_update(shifts, ['starts_at', 'ends_at', 'duration_hours'], batch_size=batch_size)
+        bookings = list(BusyInterval.objects.filter(application__shift_id__in=by_id)
+                        .select_related('application'))
+        for booking in bookings:
+            shift = by_id[booking.application.shift_id]
+            booking.starts_at, booking.ends_at = shift.starts_at, shift.ends_at
+        BusyInterval.objects.bulk_update(bookings, ['starts_at', 'ends_at'], batch_size=batch_size)
+        # A DST change can alter a shift's length and so what it pays.
+        refresh_earnings((booking.worker_id, by_id[booking.application.shift_id].date) for booking in bookings)
+    return len(shifts)
+
+
+def rebuild_busy(batch_size=1000):
+    """Recreate every busy interval from approved applications."""
+    from .models import Application
+
+    with transaction.atomic():
+        BusyInterval.objects.all().delete()
+        rows = [
+            BusyInterval(application=application, worker_id=application.worker_id,
+                         starts_at=bounds[0], ends_at=bounds[1])
+            for application in Application.objects.filter(status='approved')
+            .select_related('shift').iterator(chunk_size=batch_size)
+            for bounds in [shift_bounds(application.shift)]
+        ]
+        BusyInterval.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
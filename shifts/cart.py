@@ -0,0 +1,96 @@
+"""
+Applying to many shifts at once.
+
+``apply_to_shifts`` checks a whole cart of ``{shift, cover_letter,
+proposed_rate}`` items with a fixed number of queries however long it is:
+one locking read of the shifts, one count of their live applications, one
+read of the worker's existing applications among them and one read of the
+worker's bookings across the window the shifts span. Accepted items are
+inserted with a single ``bulk_create``.
+"""
+
+from django.db import transaction
+from django.db.models import Count
+
+from analytics.rollups import mark_stale
+from .availability import overlapping, shift_bounds
+from .feed import invalidate_applied
+from .intervals import IntervalTree
+from .models import Shift, Application
+
+
+# Applications that still hold a place on a shift.
+LIVE_STATUSES = ('pending', 'approved')
+
+
+def _reject(results, index, shift_id, message):
+    results[index] = {'index': index, 'shift': shift_id, 'status': 'rejected', 'errors': [message]}
+
+
+def apply_to_shifts(worker, items):
+    """
+    Create ``worker``'s applications for the valid ``items`` and return one
+    result per item, in order: ``{'index', 'shift', 'status': 'created',
+    'id'}`` or ``{'index', 'shift', 'status': 'rejected', 'errors'}``.
+    """
+    results = [None] * len(items)
+    shift_ids = {item['shift'] for item in items}
+    with transaction.atomic():
+        # Locking the shifts keeps concurrent carts from overfilling them.
+        shifts = Shift.objects.select_for_update().in_bulk(shift_ids)
+        taken = dict(
+            Application.objects.filter(shift_id__in=shifts, status__in=LIVE_STATUSES)
+            .values_list('shift_id').annotate(count=Count('id')).order_by()
+        )
+        applied = set(Application.objects.filter(worker=worker, shift_id__in=shifts)
+                      .values_list('shift_id', flat=True))
+        booked = IntervalTree()
+        if shifts:
+            bounds = [shift_bounds(shift) for shift in shifts.values()]
+            booked = IntervalTree(
+                overlapping(min(start for start, _ in bounds), max(end for _, end in bounds))
+                .filter(worker_id=worker.id)
+                .values_list('starts_at', 'ends_at', 'application__shift_id')
+            )
+
+        accepted = []
+        in_cart = []
+        for index, item in enumerate(items):
+            shift = shifts.get(item['shift'])
+            if shift is None:
+                _reject(results, index, item['shift'], 'Shift does not exist')
+                continue
+            if shift.id in applied:
+                _reject(results, index, shift.id, 'You have already applied to this shift')
+                continue
+            if shift.status != 'active':
+                _reject(results, index, shift.id, f'Shift is {shift.status}')
+                continue
+            if taken.get(shift.id, 0) >= shift.max_applicants:
+                _reject(results, index, shift.id, 'Shift has no applicant places left')
+                continue
+            starts_at, ends_at = shift_bounds(shift)
+            if any(other != shift.id for _, _, other in booked.overlapping(starts_at, ends_at)):
+                _reject(results, index, shift.id, 'You are already booked for an overlapping shift')
+                continue
+            clash = next((other for other in in_cart
+                          if other.starts_at < ends_at and other.ends_at > starts_at), None)
+            if clash is not None:
+                _reject(results, index, shift.id, f'Overlaps shift {clash.id} earlier in this request')
+                continue
+            applied.add(shift.id)
+            taken[shift.id] = taken.get(shift.id, 0) + 1
+            in_cart.append(shift)
+            accepted.append((index, Application(
+                shift=shift, worker=worker, cover_letter=item.get('cover_letter', ''),
+                proposed_rate=item.get('proposed_rate'),
+            )))
+
+        created = Application.objects.bulk_create([application for _, application in accepted])
+        # bulk_create sends no post_save, so queue the analytics days and
+        # drop the worker's applied set here.
+        mark_stale((application.shift.hospital_id, application.shift.date) for application in created)
+        transaction.on_commit(lambda: invalidate_applied(worker.id))
+    for (index, _), application in zip(accepted, created):
+        results[index] = {'index': index, 'shift': application.shift_id, 'status': 'created', 'id': application.id}
+    return results
@@ -0,0 +1,129 @@
+"""
+Per-worker monthly earnings ledger (``MonthlyEarnings``).
+
+An application earns once it is approved and its shift is not cancelled:
+``proposed_rate`` (or the shift's ``pay_per_hour``) times the shift's
+``duration_hours``, counted in the month of the shift date. Approvals,
+edits and cancellations re-total only the worker-months they touch, so
+reading earnings never scans a worker's application history.
+``recompute_earnings`` rebuilds the ledger from scratch.
+"""
+
+import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from functools import reduce
+import operator
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils.dateparse import parse_date
+
+from medicall.currency import convert
+from .models import Application, MonthlyEarnings
+
+
+CENTS = Decimal('0.01')
+
+
+def _quantize(value):
+    return Decimal(value or 0).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def month_start(day):
+    if isinstance(day, str):
+        day = parse_date(day)
+    return day.replace(day=1)
+
+
+def _next_month(month):
+    return (month + datetime.timedelta(days=32)).replace(day=1)
+
+
+def earning_applications():
+    return Application.objects.filter(status='approved').exclude(shift__status='cancelled')
+
+
+def _ledger_rows(applications):
+    """``MonthlyEarnings`` rows (unsaved) for ``applications``, keyed by (worker_id, month)."""
+    rows = (
+        applications.annotate(month=TruncMonth('shift__date'))
+        .values('worker_id', 'month')
+        .annotate(
+            shift_count=Count('id'),
+            hour_total=Sum('shift__duration_hours'),
+            gross_total=Sum(
+                Coalesce('proposed_rate', 'shift__pay_per_hour') * F('shift__duration_hours'),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+        )
+        .order_by()
+    )
+    return {
+        (row['worker_id'], month_start(row['month'])): MonthlyEarnings(
+            worker_id=row['worker_id'], month=month_start(row['month']), shifts=row['shift_count'],
+            hours=_quantize(row['hour_total']), gross=_quantize(row['gross_total']),
+        )
+        for row in rows
+    }
+
+
+def refresh_earnings(pairs, existing_only=False):
+    """
+    Re-total the ledger for ``(worker_id, day)`` pairs; each day stands for
+    its whole month. ``existing_only`` skips workers that no longer exist.
+    """
+    pairs = {(worker_id, month_start(day)) for worker_id, day in pairs if worker_id and day}
+    if existing_only and pairs:
+        existing = set(get_user_model().objects.filter(pk__in={worker_id for worker_id, _ in pairs})
+                       .values_list('pk', flat=True))
+        pairs = {(worker_id, month) for worker_id, month in pairs if worker_id in existing}
+    if not pairs:
+        return 0
+    months = {month for _, month in pairs}
+    applications = earning_applications().filter(
+        worker_id__in={worker_id for worker_id, _ in pairs},
+        shift__date__gte=min(months), shift__date__lt=_next_month(max(months)),
+    )
+    rows = [row for key, row in _ledger_rows(applications).items() if key in pairs]
+    touched = reduce(operator.or_, (Q(worker_id=worker_id, month=month) for worker_id, month in pairs))
+    with transaction.atomic():
+        MonthlyEarnings.objects.filter(touched).delete()
+        MonthlyEarnings.objects.bulk_create(rows)
+    return len(pairs)
+
+
+def recompute_earnings(user_ids=None, batch_size=1000):
+    """Rebuild the ledger (for ``user_ids`` only, if given); returns the number of rows."""
+    applications = earning_applications()
+    ledger = MonthlyEarnings.objects.all()
+    if user_ids is not None:
+        applications = applications.filter(worker_id__in=user_ids)
+        ledger = ledger.filter(worker_id__in=user_ids)
+    rows = list(_ledger_rows(applications).values())
+    with transaction.atomic():
+        ledger.delete()
+        MonthlyEarnings.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def earnings_summary(worker, rate=1, today=None):
+    """Ledger rows for ``worker`` with money converted at ``rate``, newest month first."""
+    today = today or datetime.date.today()
+    current = today.replace(day=1)
+    months = []
+    totals = {'shifts': 0, 'hours': Decimal('0.00'), 'gross': Decimal('0.00')}
+    for row in MonthlyEarnings.objects.filter(worker=worker).order_by('-month'):
+        months.append({
+            'month': row.month.strftime('%Y-%m'),
+            'shifts': row.shifts,
+            'hours': row.hours,
+            'gross': convert(row.gross, rate),
+            'period': 'past' if row.month < current else 'current' if row.month == current else 'upcoming',
+        })
+        totals['shifts'] += row.shifts
+        totals['hours'] += row.hours
+        totals['gross'] += row.gross
+    totals['gross'] = convert(totals['gross'], rate)
+    return {'totals': totals, 'months': months}
@@ -0,0 +1,188 @@
+"""
+Streaming exports of a hospital's shifts, applications and payroll.
+
+Rows are read with ``values_list(...).iterator(chunk_size=...)`` (a
+server-side cursor on PostgreSQL) and written out a chunk at a time, so
+memory stays flat however many rows are exported. Output is CSV or JSON
+Lines, optionally gzip-compressed as it streams. CSV text cells that a
+spreadsheet would run as a formula are prefixed with ``'``.
+"""
+
+import csv
+import datetime
+import io
+import json
+import zlib
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import DecimalField, ExpressionWrapper, F
+from django.db.models.functions import Coalesce
+
+from .models import Shift, Application
+from .earnings import earning_applications
+
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+SHIFT_COLUMNS = (
+    ('id', 'id'),
+    ('date', 'date'),
+    ('starts_at', 'starts_at'),
+    ('ends_at', 'ends_at'),
+    ('department', 'department'),
+    ('role', 'role'),
+    ('urgency', 'urgency'),
+    ('status', 'status'),
+    ('duration_hours', 'duration_hours'),
+    ('pay_per_hour', 'pay_per_hour'),
+    ('location', 'location'),
+    ('created_at', 'created_at'),
+)
+
+APPLICATION_COLUMNS = (
+    ('id', 'id'),
+    ('shift_id', 'shift_id'),
+    ('shift_date', 'shift__date'),
+    ('role', 'shift__role'),
+    ('department', 'shift__department'),
+    ('worker_id', 'worker_id'),
+    ('worker_username', 'worker__username'),
+    ('worker_email', 'worker__email'),
+    ('status', 'status'),
+    ('proposed_rate', 'proposed_rate'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+)
+
+PAYROLL_COLUMNS = (
+    ('application_id', 'id'),
+    ('shift_id', 'shift_id'),
+    ('shift_date', 'shift__date'),
+    ('starts_at', 'shift__starts_at'),
+    ('ends_at', 'shift__ends_at'),
+    ('role', 'shift__role'),
+    ('department', 'shift__department'),
+    ('shift_status', 'shift__status'),
+    ('worker_id', 'worker_id'),
+    ('worker_username', 'worker__username'),
+    ('worker_first_name', 'worker__first_name'),
+    ('worker_last_name', 'worker__last_name'),
+    ('hours', 'shift__duration_hours'),
+    ('rate', 'rate'),
+    ('amount', 'amount'),
+)
+
+CENTS = Decimal('0.01')
+
+
+def shift_rows(hospital):
+    return Shift.objects.filter(hospital=hospital), SHIFT_COLUMNS, ''
+
+
+def application_rows(hospital):
+    return Application.objects.filter(shift__hospital=hospital), APPLICATION_COLUMNS, 'shift__'
+
+
+def payroll_rows(hospital):
+    """Approved applications on shifts that were not cancelled, with what each pays."""
+    rate = Coalesce('proposed_rate', 'shift__pay_per_hour')
+    queryset = earning_applications().filter(shift__hospital=hospital).annotate(
+        rate=rate,
+        amount=ExpressionWrapper(rate * F('shift__duration_hours'),
+                                 output_field=DecimalField(max_digits=12, decimal_places=2)),
+    )
+    return queryset, PAYROLL_COLUMNS, 'shift__'
+
+
+DATASETS = {
+    'shifts': shift_rows,
+    'applications': application_rows,
+    'payroll': payroll_rows,
+}
+
+
+def export_queryset(dataset, hospital, start=None, end=None, status=None):
+    """
+    ``(queryset, headers)`` for ``dataset``. ``start``/``end`` bound the shift
+    date (inclusive); ``status`` filters the exported rows' own status (the
+    shift status, for payroll).
+    """
+    queryset, columns, shift_prefix = DATASETS[dataset](hospital)
+    if start:
+        queryset = queryset.filter(**{f'{shift_prefix}date__gte': start})
+    if end:
+        queryset = queryset.filter(**{f'{shift_prefix}date__lte': end})
+    if status:
+        status_field = 'shift__status' if dataset == 'payroll' else 'status'
+        queryset = queryset.filter(**{status_field: status})
+    queryset = queryset.order_by(f'{shift_prefix}date', 'pk').values_list(*(lookup for _, lookup in columns))
+    return queryset, [header for header, _ in columns]
+
+
+def _plain(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value.quantize(CENTS))
+    if isinstance(value, float):
+        return str(Decimal(str(value)).quantize(CENTS))
+    return value
+
+
+# Spreadsheets run a cell starting with one of these as a formula.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        # Free text such as a location or username; a leading quote keeps it text.
+        return f"'{value}" if value.startswith(FORMULA_PREFIXES) else value
+    return _plain(value)
+
+
+def _csv_chunks(rows, headers, chunk_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for count, row in enumerate(rows, 1):
+        writer.writerow([_csv_cell(value) for value in row])
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _jsonl_chunks(rows, headers, chunk_size):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(headers, map(_plain, row)))))
+        if len(lines) == chunk_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def _gzipped(chunks):
+    # wbits=31 writes a gzip header and trailer around the deflate stream.
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(queryset, headers, fmt='csv', gzip=False, chunk_size=None):
+    """Byte chunks of ``queryset`` rendered as ``fmt``."""
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    render = _csv_chunks if fmt == 'csv' else _jsonl_chunks
+    chunks = (text.encode() for text in render(queryset.iterator(chunk_size=chunk_size), headers, chunk_size))
+    return _gzipped(chunks) if gzip else chunks
@@ -0,0 +1,88 @@
+"""
+The worker shift feed: active shifts the worker has not applied to.
+
+``exclude_applied`` drops applied shifts with a correlated ``NOT EXISTS``
+probe of the ``(shift, worker)`` unique index, which stays cheap however
+many applications exist, unlike a reverse-FK ``exclude()`` that compiles
+to ``NOT IN (subquery)``.
+
+Optionally (``WORKER_FEED_CACHE_TTL`` > 0) unfiltered feed requests are
+served from a cached, shared list of active shift ids, with each worker's
+applied shifts removed in memory using their cached applied-id set
+(``applied_shift_ids``). Applying and withdrawing invalidate that set once
+they commit (``invalidate_applied``); it is reloaded on next use.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+
+from .models import Shift, Application
+
+
+FEED_CACHE_KEY = 'worker-feed:active-ids'
+
+
+def exclude_applied(queryset, worker_id):
+    """``queryset`` of shifts without those ``worker_id`` has applied to."""
+    applied = Application.objects.filter(shift_id=OuterRef('pk'), worker_id=worker_id)
+    return queryset.filter(~Exists(applied))
+
+
+def _applied_key(worker_id):
+    return f'worker-feed:applied-ids:{worker_id}'
+
+
+def _version_key(worker_id):
+    return f'worker-feed:applied-version:{worker_id}'
+
+
+def applied_shift_ids(worker_id):
+    """Ids of every shift ``worker_id`` has applied to, from the cache when possible."""
+    key, version_key = _applied_key(worker_id), _version_key(worker_id)
+    found = cache.get_many([key, version_key])
+    version, entry = found.get(version_key), found.get(key)
+    if version is not None and entry is not None and entry[0] == version:
+        return entry[1]
+    if version is None:
+        # Outlives any set cached under an older version, as in invalidate_applied.
+        cache.add(version_key, time.time_ns(), 2 * settings.APPLIED_SHIFTS_CACHE_TTL)
+        version = cache.get(version_key)
+    ids = set(Application.objects.filter(worker_id=worker_id).values_list('shift_id', flat=True))
+    # Read before the query: a load that races a committing change is stored
+    # under the version that change replaces, so it is never served.
+    cache.set(key, (version, ids), settings.APPLIED_SHIFTS_CACHE_TTL)
+    return ids
+
+
+def invalidate_applied(worker_id):
+    """
+    Drop the worker's cached applied set. Call once a new or deleted
+    application has committed.
+    """
+    cache.set(_version_key(worker_id), time.time_ns(), 2 * settings.APPLIED_SHIFTS_CACHE_TTL)
+    cache.delete(_applied_key(worker_id))
+
+
+def active_shift_ids():
+    """Ids of all active shifts, newest first, shared by every worker for ``WORKER_FEED_CACHE_TTL``."""
+    ids = cache.get(FEED_CACHE_KEY)
+    if ids is None:
+        ids = list(Shift.objects.filter(status='active').order_by('-created_at', '-pk')
+                   .values_list('pk', flat=True))
+        cache.set(FEED_CACHE_KEY, ids, settings.WORKER_FEED_CACHE_TTL)
+    return ids
+
+
+def cached_feed_ids(worker_id):
+    """The worker's feed as shift ids, built in memory from the two cached sets."""
+    applied = applied_shift_ids(worker_id)
+    return [pk for pk in active_shift_ids() if pk not in applied]
+
+
+def load_page(ids):
+    """Shifts for a page of feed ids, in order, skipping any no longer active."""
+    shifts = Shift.objects.filter(status='active').select_related('hospital').in_bulk(ids)
+    return [shifts[pk] for pk in ids if pk in shifts]
@@ -0,0 +1,15 @@
+import django_filters
+
+from .models import Shift
+
+
+class ShiftFilter(django_filters.FilterSet):
+    # Range filters on the stored, indexed interval columns, e.g.
+    # ?starts_after=2025-07-01T00:00Z&ends_before=2025-07-08T00:00Z&duration_gte=8
+    starts_after = django_filters.IsoDateTimeFilter(field_name='starts_at', lookup_expr='gte')
+    ends_before = django_filters.IsoDateTimeFilter(field_name='ends_at', lookup_expr='lte')
+    duration_gte = django_filters.NumberFilter(field_name='duration_hours', lookup_expr='gte')
+
+    class Meta:
+        model = Shift
+        fields = ['status', 'department', 'urgency', 'date', 'location']
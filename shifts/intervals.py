@@ -0,0 +1,52 @@
+"""
+A static interval tree for overlap queries on half-open ``[start, end)`` intervals.
+
+The intervals are sorted by start and laid out as an implicit balanced binary
+search tree over that array; every node also records the largest end in its
+subtree, so whole subtrees that finish before the query window are skipped.
+Building is O(n log n) and a query costs O(log n + k) for k overlaps.
+"""
+
+
+class IntervalTree:
+    def __init__(self, intervals=()):
+        # (start, end, value) triples; ``value`` is returned with each match.
+        self.items = sorted(intervals, key=lambda item: (item[0], item[1]))
+        self.max_end = [None] * len(self.items)
+        self._build(0, len(self.items))
+
+    def __len__(self):
+        return len(self.items)
+
+    def _build(self, lo, hi):
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        end = self.items[mid][1]
+        for child in (self._build(lo, mid), self._build(mid + 1, hi)):
+            if child is not None and child > end:
+                end = child
+        self.max_end[mid] = end
+        return end
+
+    def overlapping(self, start, end):
+        """Every stored ``(start, end, value)`` that overlaps ``[start, end)``."""
+        found = []
+        stack = [(0, len(self.items))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if self.max_end[mid] <= start:
+                # Nothing below this node ends after the window starts.
+                continue
+            stack.append((lo, mid))
+            item = self.items[mid]
+            if item[0] < end:
+                if item[1] > start:
+                    found.append(item)
+                # Only nodes starting before the window ends can overlap it.
+                stack.append((mid + 1, hi))
+        found.sort(key=lambda item: (item[0], item[1]))
+        return found
@@ -37,7 +37,6 @@ class Command(BaseCommand):
                 'date': '2025-06-26',
                 'start_time': '08:00:00',
                 'end_time': '20:00:00',
-                'duration_hours': 12,
                 'pay_per_hour': 120.00,
                 'urgency': 'high',
                 'requirements': 'Board certified emergency medicine physician with 3+ years experience',
@@ -52,7 +51,6 @@ class Command(BaseCommand):
                 'date': '2025-06-27',
                 'start_time': '07:00:00',
                 'end_time': '19:00:00',
-                'duration_hours': 12,
                 'pay_per_hour': 45.00,
                 'urgency': 'medium',
                 'requirements': 'RN with ICU experience, BLS and ACLS certified',
@@ -67,7 +65,6 @@ class Command(BaseCommand):
                 'date': '2025-06-28',
                 'start_time': '09:00:00',
                 'end_time': '17:00:00',
-                'duration_hours': 8,
                 'pay_per_hour': 150.00,
                 'urgency': 'low',
                 'requirements': 'Board certified cardiologist, experience with cardiac procedures',
@@ -82,7 +79,6 @@ class Command(BaseCommand):
                 'date': '2025-06-29',
                 'start_time': '08:00:00',
                 'end_time': '18:00:00',
-                'duration_hours': 10,
                 'pay_per_hour': 100.00,
                 'urgency': 'medium',
                 'requirements': 'Board certified pediatrician, experience with pediatric emergencies',
@@ -97,7 +93,6 @@ class Command(BaseCommand):
                 'date': '2025-06-30',
                 'start_time': '06:00:00',
                 'end_time': '18:00:00',
-                'duration_hours': 12,
                 'pay_per_hour': 50.00,
                 'urgency': 'high',
                 'requirements': 'RN with OR experience, sterile technique certified',
@@ -118,7 +113,6 @@ class Command(BaseCommand):
                 start_time=shift_data['start_time'],
                 defaults={
                     'end_time': shift_data['end_time'],
-                    'duration_hours': shift_data['duration_hours'],
                     'pay_per_hour': shift_data['pay_per_hour'],
                     'urgency': shift_data['urgency'],
                     'requirements': shift_data['requirements'],
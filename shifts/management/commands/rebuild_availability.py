@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.availability import add_availability
+from accounts.models import WorkerProfile, WorkerAvailability
+from shifts.availability import rebuild_busy
+
+
+class Command(BaseCommand):
+    help = 'Rebuild worker availability windows and busy intervals from profiles and approved applications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='bulk_create batch size')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        with transaction.atomic():
+            WorkerAvailability.objects.all().delete()
+            profiles = []
+            for profile in WorkerProfile.objects.only('user_id', 'availability').iterator(chunk_size=batch_size):
+                profiles.append(profile)
+                if len(profiles) >= batch_size:
+                    add_availability(profiles, batch_size)
+                    profiles = []
+            add_availability(profiles, batch_size)
+        windows = WorkerAvailability.objects.count()
+        busy = rebuild_busy(batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {windows} availability windows and {busy} busy intervals'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from shifts.earnings import recompute_earnings
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the monthly worker earnings ledger from approved applications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help='Only recompute this user id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='bulk_create batch size')
+
+    def handle(self, *args, **options):
+        rows = recompute_earnings(options['users'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} monthly earnings rows'))
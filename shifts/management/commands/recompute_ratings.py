@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from shifts.ratings import recompute_ratings
+
+
+class Command(BaseCommand):
+    help = 'Rebuild worker ratings, review counts and rating histograms from shift reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help='Only recompute this user id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='bulk_update batch size')
+
+    def handle(self, *args, **options):
+        changed = recompute_ratings(options['users'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Corrected ratings for {changed} worker profiles'))
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from shifts.market import refresh_benchmarks
+
+
+class Command(BaseCommand):
+    help = ('Recompute pay percentile benchmarks for groups with new shifts or applications; '
+            'schedule it (e.g. hourly from cron)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Recompute every group, dropping data that left the window')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rows = refresh_benchmarks(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {rows} pay benchmark rows in {time.perf_counter() - started:.1f}s'
+        ))
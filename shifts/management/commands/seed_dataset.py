@@ -0,0 +1,54 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from shifts import seeding
+
+
+class Command(BaseCommand):
+    help = 'Generate a large deterministic dataset: users, profiles, shifts, applications, reviews and notifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hospitals', type=int, default=100, help='Number of hospital users')
+        parser.add_argument('--workers', type=int, default=5000, help='Number of worker users')
+        parser.add_argument('--shifts', type=int, default=50000, help='Number of shifts')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; same seed, same data')
+        parser.add_argument('--start-date', type=datetime.date.fromisoformat, default=None,
+                            help=f'First shift date (YYYY-MM-DD); shifts span {seeding.SHIFT_DAYS} days from it. '
+                                 'Defaults to a date that centres the span on this week')
+        parser.add_argument('--prefix', type=str, default='seed', help='Username prefix')
+        parser.add_argument('--password', type=str, default=seeding.DEFAULT_PASSWORD,
+                            help='Password shared by all generated users (hashed once)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='bulk_create batch size')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows generated per chunk')
+        parser.add_argument('--processes', type=int, default=1, help='Worker processes (PostgreSQL only)')
+        parser.add_argument('--no-reviews', action='store_true', help='Skip shift reviews')
+        parser.add_argument('--no-notifications', action='store_true', help='Skip notifications')
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        if processes > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING('SQLite allows a single writer; running in one process'))
+            processes = 1
+
+        started = time.perf_counter()
+        totals = seeding.generate(
+            options['hospitals'], options['workers'], options['shifts'],
+            seed=options['seed'],
+            start_date=options['start_date'],
+            prefix=options['prefix'],
+            password=options['password'],
+            batch_size=options['batch_size'],
+            chunk_size=options['chunk_size'],
+            processes=processes,
+            reviews=not options['no_reviews'],
+            notifications=not options['no_notifications'],
+        )
+
+        for kind, count in totals.items():
+            self.stdout.write(f'  {kind}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Dataset generated in {time.perf_counter() - started:.1f}s'
+        ))
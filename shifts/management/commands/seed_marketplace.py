@@ -0,0 +1,35 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+
+from shifts import seeding
+
+
+class Command(BaseCommand):
+    help = 'Seed N hospitals, M workers and K shifts with applications for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hospitals', type=int, default=20, help='Number of hospital users')
+        parser.add_argument('--workers', type=int, default=200, help='Number of worker users')
+        parser.add_argument('--shifts', type=int, default=1000, help='Number of shifts')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        parser.add_argument('--start-date', type=datetime.date.fromisoformat, default=None,
+                            help=f'First shift date (YYYY-MM-DD); shifts span {seeding.SHIFT_DAYS} days from it. '
+                                 'Defaults to a date that centres the span on this week')
+        parser.add_argument('--batch-size', type=int, default=1000, help='bulk_create batch size')
+        parser.add_argument('--prefix', type=str, default='seed', help='Username prefix')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        totals = seeding.generate(
+            options['hospitals'], options['workers'], options['shifts'],
+            seed=options['seed'], start_date=options['start_date'], prefix=options['prefix'],
+            batch_size=options['batch_size'],
+            reviews=False, notifications=False,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {totals['hospitals']} hospitals, {totals['workers']} workers, "
+            f"{totals.get('shifts', 0)} shifts and {totals.get('applications', 0)} applications "
+            f"in {time.perf_counter() - started:.1f}s"
+        ))
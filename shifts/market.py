@@ -0,0 +1,201 @@
+"""
+Market pay benchmarks: p25/p50/p75/p90 hourly pay per role, department,
+country and urgency, for posted shift pay and for agreed rates.
+
+Percentiles for every group are computed in one vectorized NumPy pass
+(``group_percentiles``) and stored as one ``PayBenchmark`` row per group.
+A refresh only re-reads groups touched by shifts or applications changed
+since shortly before the previous run (``PAY_BENCHMARK_REFRESH_OVERLAP``),
+plus groups queued by ``mark_stale_groups`` for losses ``updated_at``
+cannot show (a shift changing group or being deleted, a hospital changing
+country); ``full=True`` recomputes everything, which also drops groups
+whose data aged out of the window. The endpoint serves the whole table
+from the cache.
+"""
+
+import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from functools import reduce
+import operator
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Max, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from accounts.models import HospitalProfile
+from .models import Shift, Application, PayBenchmark, StaleBenchmarkGroup
+
+
+QUANTILES = (25, 50, 75, 90)
+
+GROUP_FIELDS = ('role', 'department', 'country', 'urgency')
+
+CACHE_KEY = 'pay-benchmarks'
+
+# Past this many changed groups a full pass is cheaper than filtering by group.
+MAX_INCREMENTAL_GROUPS = 500
+
+CENTS = Decimal('0.01')
+
+
+def group_percentiles(keys, values, quantiles=QUANTILES):
+    """
+    ``{key: (count, [percentiles])}`` for the values belonging to each key.
+
+    Values are sorted once by (group, value); each percentile is then read
+    off every group at the same time with NumPy's default linear
+    interpolation, so there is no per-group Python loop over the data.
+    """
+    if not keys:
+        return {}
+    # Imported here: only the refresh command and its tests need NumPy, and
+    # loading it adds a noticeable share to every process's startup.
+    import numpy as np
+
+    index = {}
+    codes = np.fromiter((index.setdefault(key, len(index)) for key in keys), dtype=np.int64, count=len(keys))
+    values = np.asarray(values, dtype=np.float64)
+    order = np.lexsort((values, codes))
+    codes, values = codes[order], values[order]
+
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    counts = np.diff(np.r_[starts, len(codes)])
+    positions = starts[:, None] + (counts[:, None] - 1) * (np.asarray(quantiles) / 100)[None, :]
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.ceil(positions).astype(np.int64)
+    result = values[lower] + (values[upper] - values[lower]) * (positions - lower)
+
+    by_code = {code: key for key, code in index.items()}
+    return {
+        by_code[code]: (int(count), row.tolist())
+        for code, count, row in zip(codes[starts].tolist(), counts.tolist(), result)
+    }
+
+
+def _since():
+    return timezone.localdate() - datetime.timedelta(days=settings.PAY_BENCHMARK_WINDOW_DAYS)
+
+
+def _samples(source, groups=None):
+    """``(group key, rate)`` pairs for ``source`` within the window, optionally only for ``groups``."""
+    if source == 'posted':
+        prefix = ''
+        queryset = Shift.objects.exclude(status='cancelled').annotate(rate=F('pay_per_hour'))
+    else:
+        prefix = 'shift__'
+        queryset = Application.objects.filter(status='approved').exclude(shift__status='cancelled').annotate(
+            rate=Coalesce('proposed_rate', 'shift__pay_per_hour'),
+        )
+    lookups = {
+        'role': f'{prefix}role',
+        'department': f'{prefix}department',
+        'country': f'{prefix}hospital__hospital_profile__country',
+        'urgency': f'{prefix}urgency',
+    }
+    queryset = queryset.filter(**{f'{prefix}date__gte': _since()})
+    if groups is not None:
+        if not groups:
+            return [], []
+        # A superset filter in SQL; exact groups are picked out below.
+        queryset = queryset.filter(**{
+            f'{lookups[field]}__in': {group[i] for group in groups}
+            for i, field in enumerate(GROUP_FIELDS) if field != 'country'
+        })
+    keys, rates = [], []
+    for *key, rate in queryset.values_list(*(lookups[field] for field in GROUP_FIELDS), 'rate').iterator():
+        key = (key[0], key[1], key[2] or '', key[3])
+        if groups is None or key in groups:
+            keys.append(key)
+            rates.append(rate)
+    return keys, rates
+
+
+def _changed_groups(since):
+    """Group keys with shifts or applications changed at or after ``since``."""
+    profile_country = 'hospital__hospital_profile__country'
+    changed = set()
+    shifts = Shift.objects.filter(updated_at__gte=since).values_list('role', 'department', profile_country, 'urgency')
+    applications = Application.objects.filter(updated_at__gte=since).values_list(
+        'shift__role', 'shift__department', f'shift__{profile_country}', 'shift__urgency',
+    )
+    for role, department, country, urgency in [*shifts.distinct(), *applications.distinct()]:
+        changed.add((role, department, country or '', urgency))
+    return changed
+
+
+def hospital_country(hospital_id):
+    """The country a hospital's shifts are grouped under (blank without a profile)."""
+    country = HospitalProfile.objects.filter(user_id=hospital_id).values_list('country', flat=True).first()
+    return country or ''
+
+
+def mark_stale_groups(keys):
+    """Queue ``(role, department, country, urgency)`` keys for the next refresh."""
+    rows = [StaleBenchmarkGroup(**dict(zip(GROUP_FIELDS, key))) for key in set(keys)]
+    StaleBenchmarkGroup.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def _quantize(value):
+    return Decimal(value).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def refresh_benchmarks(full=False):
+    """Recompute changed groups (every group with ``full``); returns the number of rows written."""
+    with transaction.atomic():
+        written = _refresh(full)
+    cache.delete(CACHE_KEY)
+    return written
+
+
+def _refresh(full):
+    started = timezone.now()
+    # Dequeued before reading the source tables: a group marked meanwhile
+    # is queued again for the next run.
+    marked = list(StaleBenchmarkGroup.objects.select_for_update(skip_locked=True)
+                  .values_list('id', *GROUP_FIELDS))
+    StaleBenchmarkGroup.objects.filter(id__in=[row[0] for row in marked]).delete()
+    last_run = PayBenchmark.objects.aggregate(last=Max('computed_at'))['last']
+    groups = None
+    if not full and last_run is not None:
+        # A row stamped before the last run but committed after it read the
+        # tables would otherwise never be seen; re-reading a little is cheap.
+        since = last_run - datetime.timedelta(seconds=settings.PAY_BENCHMARK_REFRESH_OVERLAP)
+        groups = _changed_groups(since) | {tuple(row[1:]) for row in marked}
+    if groups is not None and not groups:
+        return 0
+    if groups is not None and len(groups) > MAX_INCREMENTAL_GROUPS:
+        groups = None
+
+    rows = []
+    for source, _ in PayBenchmark.SOURCE_CHOICES:
+        table = group_percentiles(*_samples(source, groups))
+        for key, (count, percentiles) in table.items():
+            if count < settings.PAY_BENCHMARK_MIN_SAMPLES:
+                continue
+            rows.append(PayBenchmark(
+                source=source, **dict(zip(GROUP_FIELDS, key)), sample_size=count,
+                **{f'p{q}': _quantize(value) for q, value in zip(QUANTILES, percentiles)},
+                computed_at=started,
+            ))
+
+    stale = PayBenchmark.objects.all()
+    if groups is not None:
+        stale = stale.filter(reduce(operator.or_, (
+            Q(**dict(zip(GROUP_FIELDS, key))) for key in groups
+        )))
+    stale.delete()
+    PayBenchmark.objects.bulk_create(rows)
+    return len(rows)
+
+
+def benchmark_table():
+    """Every benchmark row as a list of dicts, from the cache when possible."""
+    table = cache.get(CACHE_KEY)
+    if table is None:
+        fields = ('source', *GROUP_FIELDS, 'sample_size', *(f'p{q}' for q in QUANTILES))
+        table = list(PayBenchmark.objects.order_by(*GROUP_FIELDS, 'source').values(*fields))
+        cache.set(CACHE_KEY, table, settings.PAY_BENCHMARK_CACHE_TTL)
+    return table
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:34
+
+import datetime
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# Copied from shifts.availability as of this migration, so later changes
+# to the app code cannot change (or break) what it does.
+def slot_bounds(date, start_time, end_time):
+    tz = timezone.get_default_timezone()
+    starts_at = datetime.datetime.combine(date, start_time, tzinfo=tz)
+    ends_at = datetime.datetime.combine(date, end_time, tzinfo=tz)
+    if ends_at <= starts_at:
+        ends_at += datetime.timedelta(days=1)
+    return starts_at, ends_at
+
+
+def backfill_busy(apps, schema_editor):
+    Application = apps.get_model('shifts', 'Application')
+    BusyInterval = apps.get_model('shifts', 'BusyInterval')
+    db = schema_editor.connection.alias
+    rows = []
+    for application in Application.objects.using(db).filter(status='approved').select_related('shift').iterator():
+        shift = application.shift
+        starts_at, ends_at = slot_bounds(shift.date, shift.start_time, shift.end_time)
+        rows.append(BusyInterval(application_id=application.id, worker_id=application.worker_id,
+                                 starts_at=starts_at, ends_at=ends_at))
+    BusyInterval.objects.using(db).bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shifts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusyInterval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField()),
+                ('application', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='busy_interval', to='shifts.application')),
+                ('worker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='busy_intervals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['worker', 'starts_at', 'ends_at'], name='shifts_busy_worker__e44631_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_busy, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:39
+
+from django.db import migrations
+
+
+def create_span_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS shifts_busyinterval_span_gist '
+        'ON shifts_busyinterval USING gist (tstzrange(starts_at, ends_at))'
+    )
+
+
+def drop_span_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS shifts_busyinterval_span_gist')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shifts', '0002_busyinterval'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_span_index, drop_span_index),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shifts', '0003_busyinterval_span_gist'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shift',
+            name='ends_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='shift',
+            name='starts_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='shift',
+            name='duration_hours',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=4),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:43
+
+import datetime
+import zoneinfo
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, transaction
+from django.utils import timezone
+
+
+BATCH_SIZE = 2000
+
+
+# Copied from shifts.models as of this migration, so later changes to the
+# app code cannot change (or break) what it does.
+def slot_bounds(date, start_time, end_time, tz=None):
+    tz = tz or timezone.get_default_timezone()
+    starts_at = datetime.datetime.combine(date, start_time, tzinfo=tz)
+    end_date = date if end_time > start_time else date + datetime.timedelta(days=1)
+    ends_at = datetime.datetime.combine(end_date, end_time, tzinfo=tz)
+    return starts_at, ends_at
+
+
+def hours_between(starts_at, ends_at):
+    utc = datetime.timezone.utc
+    seconds = Decimal((ends_at.astimezone(utc) - starts_at.astimezone(utc)).total_seconds())
+    return (seconds / 3600).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def backfill_intervals(apps, schema_editor):
+    Shift = apps.get_model('shifts', 'Shift')
+    HospitalProfile = apps.get_model('accounts', 'HospitalProfile')
+    db = schema_editor.connection.alias
+    zones = {
+        user_id: zoneinfo.ZoneInfo(zone)
+        for user_id, zone in HospitalProfile.objects.using(db).values_list('user_id', 'timezone')
+    }
+    last_pk = 0
+    while True:
+        # Each batch commits on its own so the shift table is never locked
+        # for the whole backfill.
+        with transaction.atomic(using=db):
+            batch = list(Shift.objects.using(db).filter(pk__gt=last_pk).order_by('pk')[:BATCH_SIZE])
+            if not batch:
+                break
+            for shift in batch:
+                shift.starts_at, shift.ends_at = slot_bounds(
+                    shift.date, shift.start_time, shift.end_time, zones.get(shift.hospital_id))
+                shift.duration_hours = hours_between(shift.starts_at, shift.ends_at)
+            Shift.objects.using(db).bulk_update(batch, ['starts_at', 'ends_at', 'duration_hours'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('shifts', '0004_shift_interval'),
+        ('accounts', '0008_hospitalprofile_timezone'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_intervals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shifts', '0005_backfill_shift_interval'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='shift',
+            name='ends_at',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name='shift',
+            name='starts_at',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='shift',
+            index=models.Index(fields=['starts_at'], name='shifts_shif_starts__24492b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shift',
+            index=models.Index(fields=['ends_at'], name='shifts_shif_ends_at_cac074_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shift',
+            index=models.Index(fields=['status', 'starts_at'], name='shifts_shif_status_e1f0f2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shift',
+            index=models.Index(fields=['status', 'duration_hours'], name='shifts_shif_status_d7ffdc_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:52
+
+from collections import defaultdict
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_earnings(apps, schema_editor):
+    Application = apps.get_model('shifts', 'Application')
+    MonthlyEarnings = apps.get_model('shifts', 'MonthlyEarnings')
+    db = schema_editor.connection.alias
+    totals = defaultdict(lambda: [0, Decimal('0'), Decimal('0')])
+    applications = (Application.objects.using(db).filter(status='approved')
+                    .exclude(shift__status='cancelled').select_related('shift'))
+    for application in applications.iterator():
+        shift = application.shift
+        row = totals[(application.worker_id, shift.date.replace(day=1))]
+        row[0] += 1
+        row[1] += shift.duration_hours
+        row[2] += (application.proposed_rate or shift.pay_per_hour) * shift.duration_hours
+    MonthlyEarnings.objects.using(db).bulk_create(
+        (MonthlyEarnings(worker_id=worker_id, month=month, shifts=shifts, hours=hours, gross=gross)
+         for (worker_id, month), (shifts, hours, gross) in totals.items()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shifts', '0006_shift_interval_not_null'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyEarnings',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('shifts', models.PositiveIntegerField(default=0)),
+                ('hours', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('gross', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('worker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_earnings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'monthly earnings',
+                'ordering': ['-month'],
+                'unique_together': {('worker', 'month')},
+            },
+        ),
+        migrations.RunPython(backfill_earnings, migrations.RunPython.noop),
+    ]
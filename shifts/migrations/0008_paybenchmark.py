@@ -0,0 +1,44 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shifts', '0007_monthlyearnings'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayBenchmark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('posted', 'Posted pay'), ('agreed', 'Agreed rate')], max_length=10)),
+                ('role', models.CharField(max_length=100)),
+                ('department', models.CharField(max_length=100)),
+                ('country', models.CharField(blank=True, max_length=2)),
+                ('urgency', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('critical', 'Critical')], max_length=10)),
+                ('sample_size', models.PositiveIntegerField()),
+                ('p25', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('p50', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('p75', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('p90', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('computed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['updated_at'], name='shifts_appl_updated_2bded9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shift',
+            index=models.Index(fields=['updated_at'], name='shifts_shif_updated_fdcb5f_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='paybenchmark',
+            unique_together={('source', 'role', 'department', 'country', 'urgency')},
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shifts', '0008_paybenchmark'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaleBenchmarkGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(max_length=100)),
+                ('department', models.CharField(max_length=100)),
+                ('country', models.CharField(blank=True, max_length=2)),
+                ('urgency', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('critical', 'Critical')], max_length=10)),
+                ('marked_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'unique_together': {('role', 'department', 'country', 'urgency')},
+            },
+        ),
+    ]
@@ -1,5 +1,41 @@
+import datetime
+from decimal import Decimal, ROUND_HALF_UP
+
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_time
+
+from accounts.models import HospitalProfile
+
+
+HOURS_QUANTUM = Decimal('0.01')
+
+
+def slot_bounds(date, start_time, end_time, tz=None):
+    """
+    Aware start/end datetimes of a wall-clock slot in ``tz`` (the default
+    time zone if omitted); a slot ending at or before its start time ends the
+    next day.
+    """
+    if isinstance(date, str):
+        date = parse_date(date)
+    if isinstance(start_time, str):
+        start_time = parse_time(start_time)
+    if isinstance(end_time, str):
+        end_time = parse_time(end_time)
+    tz = tz or timezone.get_default_timezone()
+    starts_at = datetime.datetime.combine(date, start_time, tzinfo=tz)
+    end_date = date if end_time > start_time else date + datetime.timedelta(days=1)
+    ends_at = datetime.datetime.combine(end_date, end_time, tzinfo=tz)
+    return starts_at, ends_at
+
+
+def hours_between(starts_at, ends_at):
+    # Subtract in UTC: same-zone arithmetic ignores DST transitions.
+    utc = datetime.timezone.utc
+    seconds = Decimal((ends_at.astimezone(utc) - starts_at.astimezone(utc)).total_seconds())
+    return (seconds / 3600).quantize(HOURS_QUANTUM, rounding=ROUND_HALF_UP)
 
 
 class Shift(models.Model):
@@ -23,7 +59,11 @@ class Shift(models.Model):
     date = models.DateField()
     start_time = models.TimeField()
     end_time = models.TimeField()
-    duration_hours = models.DecimalField(max_digits=4, decimal_places=2)
+    # Derived from date/start_time/end_time in the hospital's time zone on
+    # every save; see set_interval().
+    starts_at = models.DateTimeField(editable=False)
+    ends_at = models.DateTimeField(editable=False)
+    duration_hours = models.DecimalField(max_digits=4, decimal_places=2, editable=False)
     pay_per_hour = models.DecimalField(max_digits=8, decimal_places=2)
     urgency = models.CharField(max_length=10, choices=URGENCY_CHOICES, default='medium')
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active')
@@ -34,21 +74,83 @@ class Shift(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Date as last stored, so a rescheduled shift's old day can be found.
+    loaded_date = None
+    # (role, department, urgency) as last stored: the benchmark group it leaves
+    loaded_group = None
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['starts_at']),
+            models.Index(fields=['ends_at']),
+            models.Index(fields=['status', 'starts_at']),
+            models.Index(fields=['status', 'duration_hours']),
+            # incremental rollups scan recent changes
+            models.Index(fields=['updated_at']),
+        ]
     
     def __str__(self):
         return f"{self.role} - {self.department} - {self.date}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_date = instance.__dict__.get('date')
+        instance.loaded_group = instance.benchmark_group()
+        return instance
+    
+    def save(self, *args, **kwargs):
+        self.set_interval()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'starts_at', 'ends_at', 'duration_hours'}
+        super().save(*args, **kwargs)
+        # post_save receivers have seen the old date and group by now
+        self.loaded_date = self.date
+        self.loaded_group = self.benchmark_group()
+    
+    def benchmark_group(self):
+        """``(role, department, urgency)``, or None if any of them was deferred."""
+        values = tuple(self.__dict__.get(field) for field in ('role', 'department', 'urgency'))
+        return None if None in values else values
+    
+    def hospital_timezone(self):
+        zone = (HospitalProfile.objects.filter(user_id=self.hospital_id)
+                .values_list('timezone', flat=True).first())
+        return HospitalProfile(timezone=zone).tzinfo if zone else None
+    
+    def set_interval(self, tz=None):
+        """Recompute ``starts_at``, ``ends_at`` and ``duration_hours`` from the wall-clock fields."""
+        tz = tz or self.hospital_timezone()
+        self.starts_at, self.ends_at = slot_bounds(self.date, self.start_time, self.end_time, tz)
+        self.duration_hours = hours_between(self.starts_at, self.ends_at)
+    
     @property
     def total_pay(self):
         return self.pay_per_hour * self.duration_hours
     
     @property
     def applicant_count(self):
+        # Set by count_applicants() for whole listings at once.
+        if hasattr(self, 'num_applicants'):
+            return self.num_applicants
         return self.applications.count()
 
 
+def count_applicants(shifts):
+    """Load ``applicant_count`` for all of ``shifts`` with a single grouped query."""
+    shifts = [shift for shift in shifts if not hasattr(shift, 'num_applicants')]
+    if not shifts:
+        return
+    counts = dict(
+        Application.objects.filter(shift__in=shifts).values_list('shift_id')
+        .annotate(n=models.Count('id')).order_by()
+    )
+    for shift in shifts:
+        shift.num_applicants = counts.get(shift.pk, 0)
+
+
 class Application(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -65,12 +167,23 @@ class Application(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Status as last stored in the database; lets the busy calendar react
+    # only to actual status transitions.
+    loaded_status = None
+    
     class Meta:
         unique_together = ['shift', 'worker']
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['updated_at'])]
     
     def __str__(self):
         return f"{self.worker.username} - {self.shift.role}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_status = instance.__dict__.get('status')
+        return instance
 
 
 class ShiftReview(models.Model):
@@ -81,8 +194,105 @@ class ShiftReview(models.Model):
     comment = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     
+    # Rating as last stored in the database, so edits can adjust the
+    # reviewed worker's running average without re-aggregating.
+    loaded_rating = None
+    
     class Meta:
         unique_together = ['shift', 'reviewer', 'reviewed_user']
     
     def __str__(self):
         return f"{self.reviewer.username} -> {self.reviewed_user.username} ({self.rating}/5)"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_rating = instance.__dict__.get('rating')
+        return instance
+
+
+class BusyInterval(models.Model):
+    """Time a worker is booked for, one row per approved application."""
+    worker = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='busy_intervals')
+    application = models.OneToOneField(Application, on_delete=models.CASCADE, related_name='busy_interval')
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    
+    class Meta:
+        indexes = [models.Index(fields=['worker', 'starts_at', 'ends_at'])]
+    
+    def __str__(self):
+        return f"{self.worker_id}: {self.starts_at} - {self.ends_at}"
+
+
+class MonthlyEarnings(models.Model):
+    """
+    A worker's approved shifts, hours and gross pay for one calendar month
+    (by shift date), in the currency shifts are posted in.
+    """
+    worker = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='monthly_earnings')
+    month = models.DateField(help_text='First day of the month')
+    shifts = models.PositiveIntegerField(default=0)
+    hours = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    gross = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['worker', 'month']
+        ordering = ['-month']
+        verbose_name_plural = 'monthly earnings'
+    
+    def __str__(self):
+        return f"{self.worker_id} - {self.month:%Y-%m}: {self.gross}"
+
+
+class PayBenchmark(models.Model):
+    """
+    Hourly pay percentiles for one role, department, country and urgency.
+
+    ``posted`` rows cover shifts' ``pay_per_hour``; ``agreed`` rows the rate
+    of approved applications (``proposed_rate``, else the posted pay).
+    Computed by ``shifts.market``; never edited directly.
+    """
+    SOURCE_CHOICES = [
+        ('posted', 'Posted pay'),
+        ('agreed', 'Agreed rate'),
+    ]
+    
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    role = models.CharField(max_length=100)
+    department = models.CharField(max_length=100)
+    country = models.CharField(max_length=2, blank=True)
+    urgency = models.CharField(max_length=10, choices=Shift.URGENCY_CHOICES)
+    sample_size = models.PositiveIntegerField()
+    p25 = models.DecimalField(max_digits=8, decimal_places=2)
+    p50 = models.DecimalField(max_digits=8, decimal_places=2)
+    p75 = models.DecimalField(max_digits=8, decimal_places=2)
+    p90 = models.DecimalField(max_digits=8, decimal_places=2)
+    # Start of the refresh that wrote this row; changes after it are picked up next time
+    computed_at = models.DateTimeField()
+    
+    class Meta:
+        unique_together = ['source', 'role', 'department', 'country', 'urgency']
+    
+    def __str__(self):
+        return f"{self.source}: {self.role} / {self.department} / {self.country} / {self.urgency}"
+
+
+class StaleBenchmarkGroup(models.Model):
+    """
+    A pay benchmark group that lost samples in a way ``updated_at`` cannot
+    show: a shift moved to another group or was deleted, or its hospital
+    changed country.
+    """
+    role = models.CharField(max_length=100)
+    department = models.CharField(max_length=100)
+    country = models.CharField(max_length=2, blank=True)
+    urgency = models.CharField(max_length=10, choices=Shift.URGENCY_CHOICES)
+    marked_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['role', 'department', 'country', 'urgency']
+    
+    def __str__(self):
+        return f"{self.role} / {self.department} / {self.country} / {self.urgency}"
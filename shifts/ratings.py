@@ -0,0 +1,92 @@
+"""
+Incremental maintenance of ``WorkerProfile.rating``, ``total_reviews`` and
+``rating_histogram``.
+
+Each review change locks the reviewed worker's profile row and adjusts its
+star histogram in O(1) instead of re-aggregating every review. The count
+and average are derived from the histogram, never from the rounded stored
+average, so they match what ``recompute_ratings`` would compute.
+``recompute_ratings`` rebuilds them from ``ShiftReview`` to correct drift.
+"""
+
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import Count
+
+from accounts.models import WorkerProfile
+from .models import ShiftReview
+
+
+RATING_QUANTUM = Decimal('0.01')
+
+
+def _quantize(value):
+    return Decimal(value).quantize(RATING_QUANTUM, rounding=ROUND_HALF_UP)
+
+
+def _figures(histogram):
+    """``(total_reviews, rating)`` for a ``{'stars': count}`` histogram."""
+    count = sum(histogram.values())
+    total = sum(int(stars) * n for stars, n in histogram.items())
+    return count, _quantize(Decimal(total) / count) if count else Decimal('0.00')
+
+
+def update_rating(user_id, added=None, removed=None):
+    """
+    Apply one review change to ``user_id``'s worker profile.
+
+    ``added`` is the new star value, ``removed`` the old one; an edit passes
+    both. Users without a worker profile (hospitals) are ignored.
+    """
+    with transaction.atomic():
+        profile = (WorkerProfile.objects.select_for_update()
+                   .filter(user_id=user_id)
+                   .only('rating', 'total_reviews', 'rating_histogram')
+                   .first())
+        if profile is None:
+            return None
+
+        histogram = dict(profile.rating_histogram or {})
+        if removed is not None:
+            remaining = histogram.pop(str(removed), 0) - 1
+            if remaining > 0:
+                histogram[str(removed)] = remaining
+        if added is not None:
+            histogram[str(added)] = histogram.get(str(added), 0) + 1
+
+        profile.total_reviews, profile.rating = _figures(histogram)
+        profile.rating_histogram = histogram
+        profile.save(update_fields=['rating', 'total_reviews', 'rating_histogram'])
+        return profile
+
+
+def recompute_ratings(user_ids=None, batch_size=1000):
+    """
+    Rebuild rating figures from scratch with one grouped query.
+
+    Returns the number of profiles whose stored values changed.
+    """
+    reviews = ShiftReview.objects.all()
+    profiles = WorkerProfile.objects.all()
+    if user_ids is not None:
+        reviews = reviews.filter(reviewed_user_id__in=user_ids)
+        profiles = profiles.filter(user_id__in=user_ids)
+
+    histograms = defaultdict(dict)
+    for row in reviews.values('reviewed_user_id', 'rating').annotate(n=Count('id')).order_by():
+        histograms[row['reviewed_user_id']][str(row['rating'])] = row['n']
+
+    changed = []
+    for profile in profiles.only('user_id', 'rating', 'total_reviews', 'rating_histogram').iterator():
+        histogram = histograms.get(profile.user_id, {})
+        count, rating = _figures(histogram)
+        if (profile.rating, profile.total_reviews, profile.rating_histogram) != (rating, count, histogram):
+            profile.rating, profile.total_reviews, profile.rating_histogram = rating, count, histogram
+            changed.append(profile)
+
+    WorkerProfile.objects.bulk_update(
+        changed, ['rating', 'total_reviews', 'rating_histogram'], batch_size=batch_size
+    )
+    return len(changed)
@@ -0,0 +1,397 @@
+"""
+Synthetic marketplace data for load tests and benchmarks.
+
+Every generator takes a ``random.Random`` so a given seed always produces the
+same rows, and inserts through ``bulk_create`` in batches instead of one
+``save()`` per object. ``generate`` splits the work into chunks with their own
+RNG stream, so the output for a seed does not depend on how many processes
+ran the chunks. Dates count from ``start_date``, by default a date in the
+current week (``default_start_date``), so active shifts are upcoming as they
+would be in real traffic; a seed and start date always give the same rows.
+"""
+
+import datetime
+import random
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+from django.utils import timezone
+
+from accounts.models import User, WorkerProfile, HospitalProfile
+from accounts.availability import WEEKDAYS, add_availability
+from accounts.tags import add_tags, uses_tag_table
+from analytics.rollups import mark_stale, refresh as refresh_rollups
+from notifications.models import Notification
+from .models import Shift, Application, ShiftReview
+from .availability import rebuild_busy
+from .earnings import recompute_earnings
+from .ratings import recompute_ratings
+
+
+DEPARTMENTS = {
+    'Emergency Medicine': ['Emergency Physician', 'ER Nurse', 'Paramedic'],
+    'Critical Care': ['ICU Nurse', 'Intensivist', 'Respiratory Therapist'],
+    'Cardiology': ['Cardiologist', 'Cardiac Nurse', 'Echo Technician'],
+    'Pediatrics': ['Pediatrician', 'Pediatric Nurse'],
+    'Surgery': ['Surgical Nurse', 'Anesthesiologist', 'Surgeon'],
+    'Radiology': ['Radiologist', 'Radiology Technician'],
+}
+
+SPECIALTIES = ['Emergency Medicine', 'Critical Care', 'ICU', 'ER', 'Cardiology',
+               'Pediatrics', 'Surgery', 'Radiology', 'Anesthesia', 'Oncology']
+CERTIFICATIONS = ['BLS', 'ACLS', 'PALS', 'TNCC', 'CCRN', 'NRP']
+AVAILABILITY_PATTERNS = [['07:00-19:00'], ['19:00-07:00'], ['08:00-16:00'], ['00:00-24:00'], ['06:00-14:00', '18:00-23:00']]
+CITIES = [('Lagos', 'LA', 'NG'), ('Nairobi', 'NA', 'KE'), ('Austin', 'TX', 'US'),
+          ('Boston', 'MA', 'US'), ('London', 'LDN', 'GB'), ('Toronto', 'ON', 'CA')]
+
+# Base hourly pay by role keyword; everything else falls back to nursing rates.
+BASE_PAY = {'Physician': 120, 'ist': 140, 'Surgeon': 160, 'Nurse': 45, 'Technician': 35,
+            'Therapist': 40, 'Paramedic': 30}
+
+URGENCY_WEIGHTS = [('low', 3), ('medium', 5), ('high', 3), ('critical', 1)]
+# Mean applicant count per urgency; high-urgency shifts attract more interest.
+APPLICANTS_MEAN = {'low': 2, 'medium': 3, 'high': 5, 'critical': 7}
+# Reviews skew positive, as they do on most marketplaces.
+RATING_WEIGHTS = [(1, 1), (2, 2), (3, 5), (4, 12), (5, 20)]
+
+DEFAULT_PASSWORD = 'test123'
+
+# Shifts are spread over SHIFT_DAYS days from the start date; the middle of
+# that span is treated as "now" when picking statuses and reviews.
+SHIFT_DAYS = 60
+
+
+def _weighted(rng, pairs, k):
+    values, weights = zip(*pairs)
+    return rng.choices(values, weights=weights, k=k)
+
+
+def _base_pay(role):
+    for keyword, pay in BASE_PAY.items():
+        if keyword in role:
+            return pay
+    return BASE_PAY['Nurse']
+
+
+def default_start_date(days=SHIFT_DAYS):
+    """
+    A start date that puts ``as_of`` on this week's Monday: the same all week,
+    so reruns within a week reproduce the dataset.
+    """
+    today = timezone.localdate()
+    return today - datetime.timedelta(days=today.weekday() + days // 2)
+
+
+def chunk_rng(seed, phase, chunk, start_date):
+    """RNG stream for one chunk of one phase, independent of execution order."""
+    return random.Random(f'{seed}:{start_date.isoformat()}:{phase}:{chunk}')
+
+
+def as_of(start_date, days=SHIFT_DAYS):
+    """The date generated data treats as today: shifts before it are in the past."""
+    return start_date + datetime.timedelta(days=days // 2)
+
+
+def seed_users(user_type, count, rng, prefix='seed', batch_size=1000, password_hash=None, start=0):
+    """
+    Create users ``start`` .. ``start + count`` of ``user_type``.
+
+    All users share ``password_hash`` so PBKDF2 runs once per dataset rather
+    than once per user.
+    """
+    password_hash = password_hash or make_password(DEFAULT_PASSWORD)
+    users = []
+    for i in range(start, start + count):
+        city, state, country = rng.choice(CITIES)
+        users.append(User(
+            username=f'{prefix}_{user_type}_{i}',
+            email=f'{prefix}_{user_type}_{i}@example.com',
+            password=password_hash,
+            user_type=user_type,
+            first_name=user_type.title(),
+            last_name=str(i),
+            is_verified=True,
+            city=city,
+            state=state,
+            country=country,
+        ))
+    return User.objects.bulk_create(users, batch_size=batch_size)
+
+
+def seed_hospital_profiles(users, rng, batch_size=1000):
+    profiles = [
+        HospitalProfile(
+            user=user,
+            hospital_name=f'{user.city} General Hospital {user.last_name}',
+            license_number=f'H-{user.username}',
+            address=f'{rng.randint(1, 999)} Main Street',
+            city=user.city,
+            state=user.state,
+            zip_code=f'{rng.randint(10000, 99999)}',
+            phone='+15550000000',
+            departments=rng.sample(list(DEPARTMENTS), k=rng.randint(2, len(DEPARTMENTS))),
+            bed_count=rng.randint(50, 800),
+            is_verified=True,
+            country=user.country,
+        )
+        for user in users
+    ]
+    return HospitalProfile.objects.bulk_create(profiles, batch_size=batch_size)
+
+
+def seed_worker_profiles(users, rng, batch_size=1000):
+    profiles = [
+        WorkerProfile(
+            user=user,
+            license_number=f'W-{user.username}',
+            specialties=rng.sample(SPECIALTIES, k=rng.randint(1, 3)),
+            experience_years=rng.randint(0, 30),
+            certifications=rng.sample(CERTIFICATIONS, k=rng.randint(1, 4)),
+            availability={
+                day: rng.choice(AVAILABILITY_PATTERNS)
+                for day in rng.sample(WEEKDAYS, k=rng.randint(2, 6))
+            },
+            hourly_rate=Decimal(rng.randint(25, 150)),
+            is_available=rng.random() < 0.85,
+            country=user.country,
+        )
+        for user in users
+    ]
+    return WorkerProfile.objects.bulk_create(profiles, batch_size=batch_size)
+
+
+def seed_shifts(hospital_ids, count, rng, start_date=None, days=SHIFT_DAYS, batch_size=1000):
+    """
+    Create ``count`` shifts spread over ``days`` days from ``start_date``
+    (``default_start_date()`` if not given).
+
+    Shifts before ``as_of`` are mostly filled or expired, later ones mostly
+    active. Seeded hospitals keep the default time zone, which the stored
+    intervals are computed in.
+    """
+    start_date = start_date or default_start_date(days)
+    urgencies = _weighted(rng, URGENCY_WEIGHTS, count)
+    today = as_of(start_date, days)
+    tz = timezone.get_default_timezone()
+    shifts = []
+    for i in range(count):
+        department = rng.choice(list(DEPARTMENTS))
+        role = rng.choice(DEPARTMENTS[department])
+        date = start_date + datetime.timedelta(days=rng.randrange(days))
+        start_hour = rng.choice([6, 7, 8, 9, 14, 19])
+        duration = rng.choice([8, 10, 12])
+        if date < today:
+            status = _weighted(rng, [('filled', 7), ('expired', 2), ('cancelled', 1)], 1)[0]
+        else:
+            status = _weighted(rng, [('active', 8), ('filled', 2)], 1)[0]
+        shift = Shift(
+            hospital_id=rng.choice(hospital_ids),
+            department=department,
+            role=role,
+            date=date,
+            start_time=datetime.time(start_hour),
+            end_time=datetime.time((start_hour + duration) % 24),
+            pay_per_hour=Decimal(_base_pay(role) + rng.randint(-10, 30)),
+            urgency=urgencies[i],
+            status=status,
+            requirements=f'{role} with current license',
+            location=f'{department}, Floor {rng.randint(1, 6)}',
+            description=f'{department} coverage',
+            max_applicants=rng.randint(2, 10),
+        )
+        # bulk_create skips save(), so derive the interval here
+        shift.set_interval(tz)
+        shifts.append(shift)
+    return Shift.objects.bulk_create(shifts, batch_size=batch_size)
+
+
+def seed_applications(shifts, worker_ids, rng, batch_size=1000):
+    """
+    Create applications with an urgency-driven, long-tailed count per shift.
+
+    Filled shifts get exactly one approved application; the rest of their
+    applicants are rejected. Open shifts keep mostly pending applications.
+    """
+    applications = []
+    for shift in shifts:
+        mean = APPLICANTS_MEAN[shift.urgency]
+        count = min(int(rng.expovariate(1 / mean)), shift.max_applicants, len(worker_ids))
+        if shift.status == 'filled':
+            count = max(count, 1)
+        applicants = rng.sample(worker_ids, k=count)
+        for n, worker_id in enumerate(applicants):
+            if shift.status == 'filled':
+                status = 'approved' if n == 0 else 'rejected'
+            elif shift.status == 'active':
+                status = _weighted(rng, [('pending', 8), ('withdrawn', 1), ('rejected', 1)], 1)[0]
+            else:
+                status = _weighted(rng, [('rejected', 3), ('withdrawn', 1)], 1)[0]
+            rate = shift.pay_per_hour + rng.randint(-5, 15) if rng.random() < 0.3 else None
+            applications.append(Application(
+                shift=shift,
+                worker_id=worker_id,
+                status=status,
+                cover_letter='Available and experienced.',
+                proposed_rate=rate,
+            ))
+    return Application.objects.bulk_create(applications, batch_size=batch_size)
+
+
+def seed_reviews(applications, rng, today, batch_size=1000):
+    """
+    Review approved applications on shifts before ``today``.
+
+    Most hospitals rate the worker; fewer workers rate the hospital back.
+    """
+    reviews = []
+    for application in applications:
+        shift = application.shift
+        if application.status != 'approved' or shift.date >= today:
+            continue
+        if rng.random() < 0.7:
+            reviews.append(ShiftReview(
+                shift=shift, reviewer_id=shift.hospital_id, reviewed_user_id=application.worker_id,
+                rating=_weighted(rng, RATING_WEIGHTS, 1)[0], comment='Reliable and professional.',
+            ))
+        if rng.random() < 0.4:
+            reviews.append(ShiftReview(
+                shift=shift, reviewer_id=application.worker_id, reviewed_user_id=shift.hospital_id,
+                rating=_weighted(rng, RATING_WEIGHTS, 1)[0], comment='Well organised shift.',
+            ))
+    return ShiftReview.objects.bulk_create(reviews, batch_size=batch_size)
+
+
+def seed_notifications(applications, rng, batch_size=1000):
+    """Create the notifications the application flow would have sent."""
+    notifications = []
+    for application in applications:
+        shift = application.shift
+        notifications.append(Notification(
+            recipient_id=shift.hospital_id,
+            sender_id=application.worker_id,
+            notification_type='application_received',
+            title='New application received',
+            message=f'A worker applied for {shift.role} on {shift.date}.',
+            is_read=rng.random() < 0.6,
+            related_shift=shift,
+            related_application=application,
+        ))
+        if application.status in ('approved', 'rejected'):
+            notifications.append(Notification(
+                recipient_id=application.worker_id,
+                sender_id=shift.hospital_id,
+                notification_type=f'application_{application.status}',
+                title=f'Application {application.status}',
+                message=f'Your application for {shift.role} on {shift.date} was {application.status}.',
+                is_read=rng.random() < 0.6,
+                related_shift=shift,
+                related_application=application,
+            ))
+    return Notification.objects.bulk_create(notifications, batch_size=batch_size)
+
+
+def _chunks(total, size):
+    return [(n, start, min(size, total - start)) for n, start in enumerate(range(0, total, size))]
+
+
+def _user_ids(user_type, prefix):
+    """Ids of seeded users ordered by their index, not by insertion order."""
+    rows = User.objects.filter(
+        user_type=user_type, username__startswith=f'{prefix}_{user_type}_'
+    ).values_list('username', 'id')
+    return [pk for _, pk in sorted(rows, key=lambda row: int(row[0].rsplit('_', 1)[1]))]
+
+
+def _seed_user_chunk(args):
+    user_type, chunk, start, count, options = args
+    rng = chunk_rng(options['seed'], user_type, chunk, options['start_date'])
+    with transaction.atomic():
+        users = seed_users(user_type, count, rng, options['prefix'], options['batch_size'],
+                           options['password_hash'], start)
+        if user_type == 'hospital':
+            profiles = seed_hospital_profiles(users, rng, options['batch_size'])
+        else:
+            profiles = seed_worker_profiles(users, rng, options['batch_size'])
+            add_availability(profiles, options['batch_size'])
+        if uses_tag_table():
+            add_tags(profiles, options['batch_size'])
+    return {'users': len(users)}
+
+
+def _seed_shift_chunk(args):
+    chunk, _, count, hospital_ids, worker_ids, options = args
+    start_date = options['start_date']
+    rng = chunk_rng(options['seed'], 'shift', chunk, start_date)
+    batch_size = options['batch_size']
+    with transaction.atomic():
+        shifts = seed_shifts(hospital_ids, count, rng, start_date, batch_size=batch_size)
+        applications = seed_applications(shifts, worker_ids, rng, batch_size)
+        reviews = seed_reviews(applications, rng, as_of(start_date), batch_size) if options['reviews'] else []
+        notifications = seed_notifications(applications, rng, batch_size) if options['notifications'] else []
+    return {'shifts': len(shifts), 'applications': len(applications),
+            'reviews': len(reviews), 'notifications': len(notifications)}
+
+
+def _run(func, tasks, processes):
+    if processes <= 1:
+        return [func(task) for task in tasks]
+    import multiprocessing
+
+    # Children must open their own database connections.
+    connections.close_all()
+    with multiprocessing.get_context('fork').Pool(processes) as pool:
+        return pool.map(func, tasks)
+
+
+def _total(results):
+    totals = {}
+    for result in results:
+        for key, value in result.items():
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+def generate(hospitals, workers, shifts, seed=42, prefix='seed', password=DEFAULT_PASSWORD,
+             batch_size=1000, chunk_size=5000, processes=1, reviews=True, notifications=True,
+             start_date=None):
+    """
+    Seed a full dataset and return the number of rows created per kind.
+    The same ``seed`` and ``start_date`` (default ``default_start_date()``)
+    always give the same rows.
+
+    Users (with profiles) are created first; shifts are then generated in
+    chunks, each together with its applications, reviews and notifications.
+    Chunks can run in ``processes`` forked workers.
+    """
+    options = {
+        'seed': seed, 'start_date': start_date or default_start_date(), 'prefix': prefix, 'batch_size': batch_size,
+        'password_hash': make_password(password),
+        'reviews': reviews, 'notifications': notifications,
+    }
+    user_tasks = [
+        (user_type, chunk, start, count, options)
+        for user_type, total in (('hospital', hospitals), ('worker', workers))
+        for chunk, start, count in _chunks(total, chunk_size)
+    ]
+    totals = {'hospitals': hospitals, 'workers': workers}
+    _run(_seed_user_chunk, user_tasks, processes)
+
+    hospital_ids = _user_ids('hospital', prefix)
+    worker_ids = _user_ids('worker', prefix)
+    if not hospital_ids:
+        return totals
+    shift_tasks = [
+        (chunk, start, count, hospital_ids, worker_ids, options)
+        for chunk, start, count in _chunks(shifts, chunk_size)
+    ]
+    totals.update(_total(_run(_seed_shift_chunk, shift_tasks, processes)))
+    # bulk_create skips the model signals; derive bookings, ratings and
+    # analytics rollups in one pass.
+    rebuild_busy(batch_size)
+    if reviews:
+        recompute_ratings()
+    recompute_earnings(worker_ids, batch_size)
+    mark_stale(Shift.objects.filter(hospital_id__in=hospital_ids).values_list('hospital_id', 'date').distinct())
+    refresh_rollups()
+    return totals
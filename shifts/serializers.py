@@ -1,4 +1,8 @@
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
+from .availability import shift_conflicts
+from .cart import LIVE_STATUSES
 from .models import Shift, Application, ShiftReview
 from accounts.serializers import UserSerializer
 
@@ -6,6 +10,7 @@ from accounts.serializers import UserSerializer
 class ShiftSerializer(serializers.ModelSerializer):
     hospital = UserSerializer(read_only=True)
     applicant_count = serializers.ReadOnlyField()
+    total_pay = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
     
     class Meta:
         model = Shift
@@ -17,7 +22,7 @@ class ShiftCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Shift
         fields = ['department', 'role', 'date', 'start_time', 'end_time', 
-                 'duration_hours', 'pay_per_hour', 'urgency', 'requirements', 
+                 'pay_per_hour', 'urgency', 'requirements', 
                  'location', 'description', 'max_applicants']
     
     def create(self, validated_data):
@@ -35,6 +40,14 @@ class ApplicationSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
 
+class HospitalApplicationSerializer(ApplicationSerializer):
+    # Other shifts the applicant is already booked on during this one
+    conflicting_shifts = serializers.SerializerMethodField()
+    
+    def get_conflicting_shifts(self, obj):
+        return self.context.get('conflicts', {}).get(obj.id, [])
+
+
 class ApplicationCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Application
@@ -42,15 +55,32 @@ class ApplicationCreateSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         validated_data['worker'] = self.context['request'].user
-        return super().create(validated_data)
+        with transaction.atomic():
+            # Same rule and lock as the cart, so concurrent applications cannot overfill a shift.
+            shift = Shift.objects.select_for_update().get(pk=validated_data['shift'].pk)
+            if shift.applications.filter(status__in=LIVE_STATUSES).count() >= shift.max_applicants:
+                raise serializers.ValidationError({'shift': ["Shift has no applicant places left"]})
+            return super().create(validated_data)
     
     def validate_shift(self, value):
         # Check if user already applied to this shift
         if Application.objects.filter(worker=self.context['request'].user, shift=value).exists():
             raise serializers.ValidationError("You have already applied to this shift")
+        if value.status != 'active':
+            raise serializers.ValidationError(f"Shift is {value.status}")
+        if shift_conflicts(value, self.context['request'].user.id):
+            raise serializers.ValidationError("You are already booked for an overlapping shift")
         return value
 
 
+class BulkApplicationItemSerializer(serializers.Serializer):
+    """One entry of a multi-shift application; checked against the database in ``cart.apply_to_shifts``."""
+    shift = serializers.IntegerField(min_value=1)
+    cover_letter = serializers.CharField(required=False, allow_blank=True, default='')
+    proposed_rate = serializers.DecimalField(max_digits=8, decimal_places=2, min_value=0,
+                                             required=False, allow_null=True, default=None)
+
+
 class ShiftReviewSerializer(serializers.ModelSerializer):
     reviewer = UserSerializer(read_only=True)
     reviewed_user = UserSerializer(read_only=True)
@@ -72,9 +102,24 @@ class ShiftReviewCreateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
     
     def validate(self, attrs):
+        user, shift = self.context['request'].user, attrs['shift']
+        # Reviews move ratings, so only the two sides of a worked shift may leave them.
+        workers = set(shift.applications.filter(status='approved').values_list('worker_id', flat=True))
+        if user.pk == shift.hospital_id:
+            other_party = workers
+        elif user.pk in workers:
+            other_party = {shift.hospital_id}
+        else:
+            raise serializers.ValidationError("You can only review shifts you worked or posted")
+        if attrs['reviewed_user'].pk not in other_party:
+            raise serializers.ValidationError(
+                {'reviewed_user': "Review the hospital or the approved worker of this shift"}
+            )
+        if shift.status == 'cancelled' or (shift.status != 'filled' and shift.ends_at > timezone.now()):
+            raise serializers.ValidationError("Shifts can only be reviewed once filled or finished")
         # Check if user already reviewed this person for this shift
         if ShiftReview.objects.filter(
-            reviewer=self.context['request'].user,
+            reviewer=user,
             reviewed_user=attrs['reviewed_user'],
             shift=attrs['shift']
         ).exists():
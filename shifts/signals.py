@@ -0,0 +1,102 @@
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.dispatch import receiver
+
+from accounts.models import HospitalProfile
+from .availability import sync_busy, reschedule_busy, retime_shifts
+from .earnings import refresh_earnings
+from .feed import invalidate_applied
+from .market import hospital_country, mark_stale_groups
+from .models import Shift, Application, ShiftReview
+from .ratings import update_rating
+
+
+@receiver(post_save, sender=ShiftReview)
+def review_saved(sender, instance, created, **kwargs):
+    previous = instance.loaded_rating
+    instance.loaded_rating = instance.rating
+    if created:
+        update_rating(instance.reviewed_user_id, added=instance.rating)
+    elif previous != instance.rating:
+        update_rating(instance.reviewed_user_id, added=instance.rating, removed=previous)
+
+
+@receiver(post_delete, sender=ShiftReview)
+def review_deleted(sender, instance, **kwargs):
+    if instance.loaded_rating is not None:
+        update_rating(instance.reviewed_user_id, removed=instance.loaded_rating)
+
+
+@receiver(post_save, sender=Application)
+def application_saved(sender, instance, created, **kwargs):
+    previous = instance.loaded_status
+    instance.loaded_status = instance.status
+    if created:
+        worker_id = instance.worker_id
+        transaction.on_commit(lambda: invalidate_applied(worker_id))
+    if created or previous != instance.status:
+        sync_busy(instance)
+    if 'approved' in (previous, instance.status):
+        refresh_earnings([(instance.worker_id, instance.shift.date)])
+
+
+@receiver(post_delete, sender=Application)
+def application_deleted(sender, instance, **kwargs):
+    worker_id = instance.worker_id
+    transaction.on_commit(lambda: invalidate_applied(worker_id))
+    if instance.loaded_status == 'approved':
+        pair = (instance.worker_id, instance.shift.date)
+        # After commit, and only if the worker still exists: a cascade from
+        # deleting the worker would otherwise re-create their ledger rows.
+        transaction.on_commit(lambda: refresh_earnings([pair], existing_only=True))
+        shift_id = instance.shift_id
+        # If the shift went too, its own deletion already marked the group.
+        transaction.on_commit(lambda: mark_stale_groups(
+            Shift.objects.filter(pk=shift_id).values_list(
+                'role', 'department', Coalesce('hospital__hospital_profile__country', Value('')), 'urgency',
+            )
+        ))
+
+
+@receiver(post_save, sender=Shift)
+def shift_saved(sender, instance, created, **kwargs):
+    if not created:
+        reschedule_busy(instance)
+        workers = instance.applications.filter(status='approved').values_list('worker_id', flat=True)
+        refresh_earnings((worker_id, day) for worker_id in workers
+                         for day in (instance.date, instance.loaded_date))
+    previous = instance.loaded_group
+    if previous is not None and previous != instance.benchmark_group():
+        role, department, urgency = previous
+        mark_stale_groups([(role, department, hospital_country(instance.hospital_id), urgency)])
+
+
+# Before the delete, while a cascade from the hospital has not yet removed
+# the profile its country comes from.
+@receiver(pre_delete, sender=Shift)
+def shift_deleting(sender, instance, **kwargs):
+    group = instance.loaded_group or instance.benchmark_group()
+    if group is not None:
+        role, department, urgency = group
+        mark_stale_groups([(role, department, hospital_country(instance.hospital_id), urgency)])
+
+
+@receiver(post_save, sender=HospitalProfile)
+def hospital_timezone_saved(sender, instance, **kwargs):
+    previous = instance.loaded_timezone
+    instance.loaded_timezone = instance.timezone
+    if previous != instance.timezone:
+        retime_shifts(Shift.objects.filter(hospital_id=instance.user_id))
+
+
+@receiver(post_save, sender=HospitalProfile)
+def hospital_country_saved(sender, instance, **kwargs):
+    previous = instance.loaded_country
+    instance.loaded_country = instance.country
+    if previous != instance.country:
+        groups = Shift.objects.filter(hospital_id=instance.user_id).values_list('role', 'department', 'urgency')
+        mark_stale_groups((role, department, country, urgency)
+                          for role, department, urgency in groups.distinct()
+                          for country in (previous or '', instance.country))
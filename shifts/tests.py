@@ -1,3 +1,744 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import json
+import random
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+import numpy as np
+from rest_framework.test import APIClient
+
+from accounts.availability import parse_availability
+from accounts.models import User, WorkerProfile, HospitalProfile
+from notifications.models import Notification
+from .availability import free_workers, check_candidates, application_conflicts
+from .feed import exclude_applied, applied_shift_ids
+from .intervals import IntervalTree
+from .market import group_percentiles, refresh_benchmarks
+from .models import Shift, Application, ShiftReview, MonthlyEarnings, PayBenchmark, StaleBenchmarkGroup
+from .ratings import recompute_ratings
+
+
+# Seeded dates default to the current week; tests pin them to a fixed day.
+SEED_START = datetime.date(2025, 1, 1)
+
+
+def seed(**options):
+    options.setdefault('start_date', SEED_START)
+    call_command('seed_marketplace', prefix='test', stdout=StringIO(), **options)
+
+
+class SeedMarketplaceTests(TestCase):
+    def test_seeds_requested_counts(self):
+        seed(hospitals=3, workers=20, shifts=50)
+        self.assertEqual(HospitalProfile.objects.filter(user__username__startswith='test_').count(), 3)
+        self.assertEqual(WorkerProfile.objects.filter(user__username__startswith='test_').count(), 20)
+        shifts = Shift.objects.filter(hospital__username__startswith='test_')
+        self.assertEqual(shifts.count(), 50)
+        # Every filled shift has exactly one approved application.
+        for shift in shifts.filter(status='filled'):
+            self.assertEqual(shift.applications.filter(status='approved').count(), 1)
+
+    def test_same_seed_same_data(self):
+        def snapshot():
+            return list(Shift.objects.filter(hospital__username__startswith='test_')
+                        .order_by('id').values_list('role', 'date', 'status', 'pay_per_hour'))
+
+        seed(hospitals=2, workers=5, shifts=10, seed=7)
+        first = snapshot()
+        User.objects.filter(username__startswith='test_').delete()
+        seed(hospitals=2, workers=5, shifts=10, seed=7)
+        self.assertEqual(first, snapshot())
+        # Dates come from the start date, not from the day the command runs.
+        self.assertTrue(all(SEED_START <= date < datetime.date(2025, 3, 2) for _, date, _, _ in first))
+
+    def test_default_start_date_centres_on_this_week(self):
+        from .seeding import as_of, default_start_date
+
+        monday = timezone.localdate() - datetime.timedelta(days=timezone.localdate().weekday())
+        self.assertEqual(as_of(default_start_date()), monday)
+        call_command('seed_marketplace', prefix='test', hospitals=2, workers=5, shifts=30, stdout=StringIO())
+        upcoming = Shift.objects.filter(hospital__username__startswith='test_', date__gte=monday)
+        self.assertTrue(upcoming.filter(status='active').exists())
+
+    def test_start_date_moves_the_dataset(self):
+        start = datetime.date(2030, 6, 1)
+        seed(hospitals=2, workers=5, shifts=30, seed=7, start_date=start)
+        shifts = Shift.objects.filter(hospital__username__startswith='test_')
+        self.assertTrue(all(start <= shift.date < start + datetime.timedelta(days=60) for shift in shifts))
+        # Shifts after the middle of the span count as upcoming.
+        upcoming = {shift.status for shift in shifts if shift.date >= start + datetime.timedelta(days=30)}
+        self.assertLessEqual(upcoming, {'active', 'filled'})
+
+
+class SeedDatasetTests(TestCase):
+    def test_generates_reviews_and_notifications(self):
+        call_command('seed_dataset', hospitals=2, workers=10, shifts=40, chunk_size=15,
+                     prefix='test', stdout=StringIO())
+        shifts = Shift.objects.filter(hospital__username__startswith='test_')
+        self.assertEqual(shifts.count(), 40)
+        self.assertTrue(ShiftReview.objects.filter(shift__in=shifts).exists())
+        self.assertTrue(Notification.objects.filter(related_shift__in=shifts).exists())
+        # One password hash is shared by every generated user.
+        hashes = User.objects.filter(username__startswith='test_').values_list('password', flat=True)
+        self.assertEqual(len(set(hashes)), 1)
+
+
+class ReviewRatingTests(TestCase):
+    def setUp(self):
+        self.hospital = User.objects.create_user('hosp', password='x', user_type='hospital')
+        self.worker = User.objects.create_user('work', password='x', user_type='worker')
+        self.profile = WorkerProfile.objects.create(user=self.worker, license_number='RN1')
+        self.shifts = [
+            Shift.objects.create(
+                hospital=self.hospital, department='ER', role='Nurse', date=f'2025-01-0{day}',
+                start_time='07:00', end_time='19:00', pay_per_hour=50,
+                requirements='RN', location='ER',
+            )
+            for day in (1, 2, 3)
+        ]
+        for shift in self.shifts:
+            Application.objects.create(shift=shift, worker=self.worker, status='approved')
+        self.api = APIClient()
+        self.api.force_authenticate(self.hospital)
+
+    def review(self, shift, rating):
+        response = self.api.post('/api/shifts/reviews/', {
+            'shift': shift.id, 'reviewed_user': self.worker.id, 'rating': rating, 'comment': 'ok',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return ShiftReview.objects.get(shift=shift, reviewer=self.hospital)
+
+    def test_running_average_on_create_edit_delete(self):
+        self.review(self.shifts[0], 5)
+        second = self.review(self.shifts[1], 4)
+        self.review(self.shifts[2], 3)
+        self.profile.refresh_from_db()
+        self.assertEqual((self.profile.rating, self.profile.total_reviews), (Decimal('4.00'), 3))
+        self.assertEqual(self.profile.rating_histogram, {'5': 1, '4': 1, '3': 1})
+
+        response = self.api.patch(f'/api/shifts/reviews/{second.id}/', {'rating': 1}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.rating, Decimal('3.00'))
+        self.assertEqual(self.profile.rating_histogram, {'5': 1, '3': 1, '1': 1})
+
+        self.api.delete(f'/api/shifts/reviews/{second.id}/')
+        self.profile.refresh_from_db()
+        self.assertEqual((self.profile.rating, self.profile.total_reviews), (Decimal('4.00'), 2))
+
+    def test_only_the_other_party_of_a_worked_shift_can_review(self):
+        stranger = User.objects.create_user('stranger', password='x', user_type='hospital')
+        upcoming = Shift.objects.create(
+            hospital=self.hospital, department='ER', role='Nurse',
+            date=timezone.localdate() + datetime.timedelta(days=7), start_time='07:00', end_time='19:00', pay_per_hour=50, requirements='RN', location='ER',
+        )
+        Application.objects.create(shift=upcoming, worker=self.worker, status='approved')
+        cases = [
+            (stranger, self.shifts[0], self.worker),          # took no part in the shift
+            (self.hospital, self.shifts[0], stranger),        # not the shift's worker
+            (self.worker, self.shifts[0], self.worker),       # the worker reviewing themselves
+            (self.hospital, upcoming, self.worker),           # not worked yet
+        ]
+        for reviewer, shift, reviewed in cases:
+            with self.subTest(reviewer=reviewer.username, reviewed=reviewed.username, shift=shift.date):
+                self.api.force_authenticate(reviewer)
+                response = self.api.post('/api/shifts/reviews/', {
+                    'shift': shift.id, 'reviewed_user': reviewed.id, 'rating': 1, 'comment': 'bad',
+                }, format='json')
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(ShiftReview.objects.exists())
+        self.profile.refresh_from_db()
+        self.assertEqual((self.profile.rating, self.profile.total_reviews), (Decimal('0.00'), 0))
+
+        # The worker may review the hospital they worked for.
+        self.api.force_authenticate(self.worker)
+        response = self.api.post('/api/shifts/reviews/', {
+            'shift': self.shifts[0].id, 'reviewed_user': self.hospital.id, 'rating': 5, 'comment': 'good',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def test_recompute_fixes_drift(self):
+        self.review(self.shifts[0], 5)
+        self.review(self.shifts[1], 2)
+        WorkerProfile.objects.filter(pk=self.profile.pk).update(rating=1, total_reviews=9, rating_histogram={})
+        call_command('recompute_ratings', stdout=StringIO())
+        self.profile.refresh_from_db()
+        self.assertEqual((self.profile.rating, self.profile.total_reviews), (Decimal('3.50'), 2))
+        self.assertEqual(self.profile.rating_histogram, {'5': 1, '2': 1})
+
+    def test_incremental_updates_match_recompute(self):
+        rng = random.Random(3)
+        shifts = self.shifts + [Shift.objects.create(
+            hospital=self.hospital, department='ER', role='Nurse', date='2025-01-02', start_time='07:00',
+            end_time='19:00', pay_per_hour=50, requirements='RN', location='ER',
+        ) for _ in range(5)]
+        reviewers = [User.objects.create(username=f'h{i}', user_type='hospital') for i in range(25)]
+        reviews = []
+        for _ in range(300):
+            if reviews and rng.random() < 0.3:
+                review = reviews.pop(rng.randrange(len(reviews)))
+                if rng.random() < 0.5:
+                    review.delete()
+                    continue
+                review.rating = rng.randint(1, 5)
+                review.save()
+                reviews.append(review)
+            elif len(reviews) < len(shifts) * len(reviewers):
+                shift, reviewer = rng.choice(shifts), rng.choice(reviewers)
+                if not ShiftReview.objects.filter(shift=shift, reviewer=reviewer).exists():
+                    reviews.append(ShiftReview.objects.create(
+                        shift=shift, reviewer=reviewer, reviewed_user=self.worker, rating=rng.randint(1, 5),
+                        comment='ok',
+                    ))
+        self.profile.refresh_from_db()
+        incremental = (self.profile.rating, self.profile.total_reviews, self.profile.rating_histogram)
+        self.assertEqual(recompute_ratings(), 0)
+        self.profile.refresh_from_db()
+        self.assertEqual((self.profile.rating, self.profile.total_reviews, self.profile.rating_histogram), incremental)
+        self.assertEqual(self.profile.total_reviews, len(reviews))
+
+
+class AvailabilityTests(TestCase):
+    def setUp(self):
+        self.hospital = User.objects.create_user('hosp', password='x', user_type='hospital')
+        self.day = User.objects.create_user('day', password='x', user_type='worker')
+        self.night = User.objects.create_user('night', password='x', user_type='worker')
+        WorkerProfile.objects.create(user=self.day, license_number='RN1',
+                                     availability={'tuesday': ['07:00-19:00']})
+        WorkerProfile.objects.create(user=self.night, license_number='RN2',
+                                     availability={'Tue': '19:00-07:00', 'wednesday': ['00:00-24:00']})
+        # 2025-07-01 is a Tuesday.
+        self.day_shift = self.make_shift('07:00', '19:00')
+        self.night_shift = self.make_shift('19:00', '07:00')
+        self.api = APIClient()
+        self.api.force_authenticate(self.hospital)
+
+    def make_shift(self, start, end):
+        return Shift.objects.create(
+            hospital=self.hospital, department='ER', role='Nurse', date='2025-07-01',
+            start_time=start, end_time=end, pay_per_hour=50,
+            requirements='RN', location='ER',
+        )
+
+    def free(self, shift):
+        shift.refresh_from_db()
+        return set(free_workers(shift).values_list('user__username', flat=True))
+
+    def test_parse_overnight_windows(self):
+        # Tuesday 19:00 -> Wednesday 07:00 merges with all of Wednesday.
+        self.assertEqual(parse_availability({'tue': '19:00-07:00', 'wed': ['00:00-24:00']}),
+                         [(1 * 1440 + 19 * 60, 3 * 1440)])
+        self.assertEqual(parse_availability({'sunday': ['22:00-06:00']}), [(0, 360), (6 * 1440 + 1320, 7 * 1440)])
+
+    def test_free_workers_by_window(self):
+        self.assertEqual(self.free(self.day_shift), {'day'})
+        self.assertEqual(self.free(self.night_shift), {'night'})
+
+    def test_approved_shift_marks_worker_busy(self):
+        other = self.make_shift('18:00', '23:00')
+        WorkerProfile.objects.filter(user=self.night).update(availability={'tue': '00:00-24:00', 'wed': '00:00-24:00'})
+        WorkerProfile.objects.get(user=self.night).save()
+        application = Application.objects.create(shift=other, worker=self.night)
+        self.assertIn('night', self.free(self.night_shift))
+
+        self.api.patch(f'/api/shifts/applications/{application.id}/status/', {'status': 'approved'}, format='json')
+        self.assertNotIn('night', self.free(self.night_shift))
+        self.assertEqual(check_candidates(self.night_shift, [self.night.id]), {self.night.id: False})
+
+        self.api.patch(f'/api/shifts/applications/{application.id}/status/', {'status': 'rejected'}, format='json')
+        self.assertIn('night', self.free(self.night_shift))
+
+    def test_worker_list_availability_filter(self):
+        response = self.api.get('/api/auth/workers/', {
+            'available_on': '2025-07-01', 'available_from': '08:00', 'available_to': '12:00',
+        })
+        self.assertEqual([w['user']['username'] for w in response.json()['results']], ['day'])
+
+    def test_available_workers_endpoint(self):
+        response = self.api.get(f'/api/shifts/{self.night_shift.id}/available-workers/')
+        self.assertEqual([w['user']['username'] for w in response.json()['results']], ['night'])
+
+
+class IntervalTreeTests(TestCase):
+    def test_matches_brute_force(self):
+        import random
+        rng = random.Random(3)
+        intervals = [(s, s + rng.randint(1, 30), i) for i, s in enumerate(rng.randint(0, 500) for _ in range(300))]
+        tree = IntervalTree(intervals)
+        for _ in range(200):
+            start = rng.randint(0, 520)
+            end = start + rng.randint(1, 40)
+            expected = sorted(item for item in intervals if item[0] < end and item[1] > start)
+            self.assertEqual(sorted(tree.overlapping(start, end)), expected)
+        self.assertEqual(IntervalTree().overlapping(0, 10), [])
+
+
+class DoubleBookingTests(TestCase):
+    def setUp(self):
+        self.first = User.objects.create_user('h1', password='x', user_type='hospital')
+        self.second = User.objects.create_user('h2', password='x', user_type='hospital')
+        self.worker = User.objects.create_user('work', password='x', user_type='worker')
+        WorkerProfile.objects.create(user=self.worker, license_number='RN1')
+        self.day = self.make_shift(self.first, '07:00', '19:00')
+        self.evening = self.make_shift(self.second, '17:00', '23:00')
+        self.night = self.make_shift(self.second, '19:00', '07:00')
+        self.api = APIClient()
+
+    def make_shift(self, hospital, start, end):
+        return Shift.objects.create(
+            hospital=hospital, department='ER', role='Nurse', date='2025-07-01',
+            start_time=start, end_time=end, pay_per_hour=50,
+            requirements='RN', location='ER',
+        )
+
+    def apply(self, shift):
+        self.api.force_authenticate(self.worker)
+        return self.api.post('/api/shifts/applications/', {'shift': shift.id}, format='json')
+
+    def approve(self, hospital, shift):
+        application = Application.objects.get(shift=shift, worker=self.worker)
+        self.api.force_authenticate(hospital)
+        return self.api.post(f'/api/shifts/applications/{application.id}/approve/')
+
+    def test_overlapping_approval_is_refused(self):
+        for shift in (self.day, self.evening, self.night):
+            self.assertEqual(self.apply(shift).status_code, 201)
+        self.assertEqual(self.approve(self.first, self.day).status_code, 200)
+
+        response = self.approve(self.second, self.evening)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['conflicting_shifts'], [self.day.id])
+        self.assertEqual(Application.objects.get(shift=self.evening).status, 'pending')
+        # Back-to-back shifts do not overlap.
+        self.assertEqual(self.approve(self.second, self.night).status_code, 200)
+
+    def test_apply_refused_when_booked(self):
+        self.apply(self.day)
+        self.approve(self.first, self.day)
+        response = self.apply(self.evening)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('overlapping', str(response.json()))
+
+    def test_hospital_list_flags_conflicts_in_bulk(self):
+        for shift in (self.day, self.evening, self.night):
+            self.apply(shift)
+        self.approve(self.first, self.day)
+        applications = list(Application.objects.filter(worker=self.worker).select_related('shift'))
+        conflicts = application_conflicts(applications)
+        self.assertEqual(
+            {a.shift_id: conflicts[a.id] for a in applications},
+            {self.day.id: [], self.evening.id: [self.day.id], self.night.id: []},
+        )
+
+        self.api.force_authenticate(self.second)
+        response = self.api.get('/api/shifts/applications/hospital/')
+        flagged = {a['shift']['id']: a['conflicting_shifts'] for a in response.json()['results']}
+        self.assertEqual(flagged, {self.evening.id: [self.day.id], self.night.id: []})
+
+
+class ShiftIntervalTests(TestCase):
+    def setUp(self):
+        self.hospital = User.objects.create_user('hosp', password='x', user_type='hospital')
+        self.profile = HospitalProfile.objects.create(
+            user=self.hospital, hospital_name='General', license_number='H1', address='1 Main St',
+            city='Boston', state='MA', zip_code='02110', phone='555', timezone='America/New_York',
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.hospital)
+
+    def post_shift(self, date, start, end):
+        response = self.api.post('/api/shifts/', {
+            'department': 'ER', 'role': 'Nurse', 'date': date, 'start_time': start, 'end_time': end,
+            'pay_per_hour': '50.00', 'requirements': 'RN', 'location': 'ER',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return Shift.objects.latest('id')
+
+    def test_overnight_shift_in_hospital_zone(self):
+        shift = self.post_shift('2025-07-01', '19:00', '07:00')
+        utc = datetime.timezone.utc
+        self.assertEqual(shift.starts_at, datetime.datetime(2025, 7, 1, 23, 0, tzinfo=utc))
+        self.assertEqual(shift.ends_at, datetime.datetime(2025, 7, 2, 11, 0, tzinfo=utc))
+        self.assertEqual((shift.duration_hours, shift.total_pay), (Decimal('12.00'), Decimal('600.00')))
+        # The clocks go back during this night.
+        self.assertEqual(self.post_shift('2025-11-01', '19:00', '07:00').duration_hours, Decimal('13.00'))
+
+    def test_feed_range_filters(self):
+        early = self.post_shift('2025-07-01', '07:00', '15:00')
+        late = self.post_shift('2025-07-01', '19:00', '07:00')
+
+        def feed(**params):
+            response = self.api.get('/api/shifts/', params)
+            return {shift['id'] for shift in response.json()['results']}
+
+        self.assertEqual(feed(starts_after='2025-07-01T18:00:00Z'), {late.id})
+        self.assertEqual(feed(ends_before='2025-07-01T20:00:00Z'), {early.id})
+        self.assertEqual(feed(duration_gte='10'), {late.id})
+
+    def test_timezone_change_retimes_shifts_and_bookings(self):
+        worker = User.objects.create_user('work', password='x', user_type='worker')
+        shift = self.post_shift('2025-07-01', '07:00', '19:00')
+        Application.objects.create(shift=shift, worker=worker, status='approved')
+        self.profile.timezone = 'Europe/London'
+        self.profile.save()
+        shift.refresh_from_db()
+        expected = datetime.datetime(2025, 7, 1, 6, 0, tzinfo=datetime.timezone.utc)
+        self.assertEqual(shift.starts_at, expected)
+        self.assertEqual(worker.busy_intervals.get().starts_at, expected)
+
+
+class EarningsTests(TestCase):
+    def setUp(self):
+        self.hospital = User.objects.create_user('hosp', password='x', user_type='hospital')
+        self.worker = User.objects.create_user('work', password='x', user_type='worker')
+        self.july = self.make_shift('2025-07-01', '07:00', '19:00')
+        self.late_july = self.make_shift('2025-07-20', '07:00', '15:00')
+        self.api = APIClient()
+
+    def make_shift(self, date, start, end):
+        return Shift.objects.create(
+            hospital=self.hospital, department='ER', role='Nurse', date=date,
+            start_time=start, end_time=end, pay_per_hour=50, requirements='RN', location='ER',
+        )
+
+    def book(self, shift, **fields):
+        application = Application.objects.create(shift=shift, worker=self.worker, **fields)
+        self.api.force_authenticate(self.hospital)
+        self.api.patch(f'/api/shifts/applications/{application.id}/status/', {'status': 'approved'}, format='json')
+        return application
+
+    def ledger(self):
+        return {(str(row.month), row.shifts, row.hours, row.gross) for row in MonthlyEarnings.objects.filter(worker=self.worker)}
+
+    def test_ledger_follows_approvals_and_shift_changes(self):
+        self.book(self.july)
+        self.book(self.late_july, proposed_rate=60)
+        self.assertEqual(self.ledger(), {('2025-07-01', 2, Decimal('20.00'), Decimal('1080.00'))})
+
+        self.late_july.date = '2025-08-02'
+        self.late_july.save()
+        self.assertEqual(self.ledger(), {('2025-07-01', 1, Decimal('12.00'), Decimal('600.00')),
+                                         ('2025-08-01', 1, Decimal('8.00'), Decimal('480.00'))})
+
+        self.july.status = 'cancelled'
+        self.july.save()
+        self.assertEqual(self.ledger(), {('2025-08-01', 1, Decimal('8.00'), Decimal('480.00'))})
+
+        MonthlyEarnings.objects.all().delete()
+        call_command('recompute_earnings', stdout=StringIO())
+        self.assertEqual(self.ledger(), {('2025-08-01', 1, Decimal('8.00'), Decimal('480.00'))})
+
+    def test_endpoint_converts_with_cached_rate_table(self):
+        self.book(self.july)
+        self.book(self.late_july)
+        cache.set('currency:rates:USD', {'base': 'USD', 'rates': {'USD': 1, 'EUR': 0.5}, 'source': 'test'})
+        self.api.force_authenticate(self.worker)
+        try:
+            response = self.api.get('/api/auth/worker-profile/earnings/', {'currency': 'eur'})
+        finally:
+            cache.delete('currency:rates:USD')
+        data = response.json()
+        self.assertEqual((data['currency'], data['rate_source']), ('EUR', 'test'))
+        self.assertEqual(Decimal(data['totals']['gross']), Decimal('500.00'))
+        self.assertEqual([(m['month'], m['shifts']) for m in data['months']], [('2025-07', 2)])
+
+    def test_endpoint_rejects_invalid_currency(self):
+        self.api.force_authenticate(self.worker)
+        response = self.api.get('/api/auth/worker-profile/earnings/', {'currency': 'e:r'})
+        self.assertEqual(response.status_code, 400)
+
+        self.api.force_authenticate(self.hospital)
+        self.assertEqual(self.api.get('/api/auth/worker-profile/earnings/').status_code, 403)
+
+
+class PayBenchmarkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.hospital = User.objects.create_user('hosp', password='x', user_type='hospital')
+        HospitalProfile.objects.create(
+            user=self.hospital, hospital_name='General', license_number='L1', address='1 Road',
+            city='Lagos', state='LA', zip_code='100001', phone='1', country='NG',
+        )
+        self.day = timezone.localdate() + datetime.timedelta(days=7)
+
+    def make_shifts(self, role, rates):
+        return [Shift.objects.create(
+            hospital=self.hospital, department='ER', role=role, date=self.day, start_time='07:00',
+            end_time='15:00', pay_per_hour=rate, requirements='RN', location='ER',
+        ) for rate in rates]
+
+    def age_rows(self):
+        # Out of the overlap re-read by the next incremental refresh.
+        hour_ago = timezone.now() - datetime.timedelta(hours=1)
+        Shift.objects.update(updated_at=hour_ago)
+        Application.objects.update(updated_at=hour_ago)
+
+    def test_group_percentiles_matches_numpy(self):
+        rng = np.random.default_rng(7)
+        keys = rng.integers(0, 5, 400).tolist()
+        values = rng.uniform(10, 90, 400).tolist()
+        table = group_percentiles(keys, values)
+        for key in set(keys):
+            group = [value for k, value in zip(keys, values) if k == key]
+            count, percentiles = table[key]
+            self.assertEqual(count, len(group))
+            np.testing.assert_allclose(percentiles, np.percentile(group, [25, 50, 75, 90]))
+
+    def test_incremental_refresh_and_endpoint(self):
+        self.make_shifts('Nurse', [10, 20, 30, 40, 50])
+        self.make_shifts('Doctor', [100] * 5)
+        self.make_shifts('Porter', [15] * 4)  # below the minimum sample size
+        self.assertEqual(refresh_benchmarks(), 2)
+        nurse = PayBenchmark.objects.get(source='posted', role='Nurse')
+        self.assertEqual((nurse.country, nurse.sample_size, nurse.p25, nurse.p50, nurse.p90),
+                         ('NG', 5, Decimal('20.00'), Decimal('30.00'), Decimal('46.00')))
+
+        # Only the Nurse group changed, so the Doctor row is left as it was.
+        self.age_rows()
+        doctor_computed = PayBenchmark.objects.get(role='Doctor').computed_at
+        self.make_shifts('Nurse', [60])
+        self.assertEqual(refresh_benchmarks(), 1)
+        self.assertEqual(PayBenchmark.objects.get(role='Nurse').p50, Decimal('35.00'))
+        self.assertEqual(PayBenchmark.objects.get(role='Doctor').computed_at, doctor_computed)
+
+        api = APIClient()
+        api.force_authenticate(self.hospital)
+        data = api.get('/api/shifts/pay-benchmarks/', {'role': 'Nurse', 'source': 'posted'}).json()
+        self.assertEqual(data['count'], 1)
+        self.assertEqual((data['results'][0]['sample_size'], Decimal(data['results'][0]['p50'])), (6, Decimal('35.00')))
+        self.assertEqual(api.get('/api/shifts/pay-benchmarks/', {'role': 'Porter'}).json()['count'], 0)
+
+    def test_change_committed_after_a_run_read_the_tables(self):
+        self.make_shifts('Doctor', [100] * 5)
+        refresh_benchmarks()
+        self.age_rows()
+        # Stamped before the run started, but only visible once it had read.
+        late = self.make_shifts('Doctor', [200])[0]
+        computed_at = PayBenchmark.objects.get(role='Doctor').computed_at
+        Shift.objects.filter(pk=late.pk).update(updated_at=computed_at - datetime.timedelta(seconds=5))
+        self.assertEqual(refresh_benchmarks(), 1)
+        self.assertEqual(PayBenchmark.objects.get(role='Doctor').sample_size, 6)
+
+    def test_groups_left_behind_are_refreshed(self):
+        nurses = self.make_shifts('Nurse', [10, 20, 30, 40, 50, 60])
+        self.make_shifts('Doctor', [100] * 5)
+        refresh_benchmarks()
+
+        moved = Shift.objects.get(pk=nurses[-1].pk)
+        moved.department = 'ICU'
+        moved.save()
+        refresh_benchmarks()
+        self.assertEqual(PayBenchmark.objects.get(role='Nurse', department='ER').p50, Decimal('30.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Shift.objects.get(pk=nurses[0].pk).delete()
+        refresh_benchmarks()
+        self.assertFalse(PayBenchmark.objects.filter(role='Nurse').exists())
+
+        profile = HospitalProfile.objects.get(user=self.hospital)
+        profile.country = 'GH'
+        profile.save()
+        refresh_benchmarks()
+        self.assertEqual(list(PayBenchmark.objects.values_list('country', flat=True).distinct()), ['GH'])
+        self.assertFalse(StaleBenchmarkGroup.objects.exists())
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.hospital = User.objects.create_user('hosp', password='x', user_type='hospital')
+        self.worker = User.objects.create_user('work', password='x', user_type='worker')
+        other = User.objects.create_user('other', password='x', user_type='hospital')
+        self.shifts = [self.make_shift(self.hospital, f'2025-07-0{day}') for day in (1, 2, 3)]
+        self.make_shift(other, '2025-07-01')
+        Application.objects.create(shift=self.shifts[0], worker=self.worker, status='approved', proposed_rate=60)
+        Application.objects.create(shift=self.shifts[1], worker=self.worker, status='approved')
+        Application.objects.create(shift=self.shifts[2], worker=self.worker)
+        self.api = APIClient()
+        self.api.force_authenticate(self.hospital)
+
+    def make_shift(self, hospital, date):
+        return Shift.objects.create(
+            hospital=hospital, department='ER', role='Nurse', date=date, start_time='07:00',
+            end_time='15:00', pay_per_hour=50, requirements='RN', location='ER',
+        )
+
+    def export(self, dataset, **params):
+        return self.api.get(f'/api/shifts/hospital/export/{dataset}/', params)
+
+    def test_csv_text_cells_cannot_start_formulas(self):
+        Shift.objects.filter(pk=self.shifts[0].pk).update(location='=HYPERLINK("http://x")', department='@ER')
+        rows = list(csv.DictReader(self.export('shifts').getvalue().decode().splitlines()))
+        self.assertEqual((rows[0]['location'], rows[0]['department']), ('\'=HYPERLINK("http://x")', "'@ER"))
+        self.assertEqual(rows[1]['location'], 'ER')
+        line = json.loads(self.export('shifts', output='jsonl').getvalue().decode().splitlines()[0])
+        self.assertEqual(line['location'], '=HYPERLINK("http://x")')
+
+    def test_invalid_dates_are_rejected(self):
+        for params in ({'start': '07/01/2025'}, {'end': '2025-02-30'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.export('shifts', **params).status_code, 400)
+
+    def test_csv_export_is_streamed_and_filtered(self):
+        response = self.export('shifts', start='2025-07-02', status='active')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(response.getvalue().decode().splitlines()))
+        self.assertEqual([row['date'] for row in rows], ['2025-07-02', '2025-07-03'])
+        self.assertEqual(rows[0]['duration_hours'], '8.00')
+
+    def test_gzipped_jsonl_payroll(self):
+        response = self.export('payroll', output='jsonl', gzip='1')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="payroll.jsonl.gz"')
+        lines = gzip.decompress(response.getvalue()).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([(row['shift_date'], row['rate'], row['amount']) for row in rows],
+                         [('2025-07-01', '60.00', '480.00'), ('2025-07-02', '50.00', '400.00')])
+
+    def test_rejects_bad_requests(self):
+        self.assertEqual(self.export('applications', output='xml').status_code, 400)
+        self.assertEqual(self.export('applications', start='July').status_code, 400)
+        self.assertEqual(self.export('reviews').status_code, 404)
+        self.api.force_authenticate(self.worker)
+        self.assertEqual(self.export('shifts').status_code, 403)
+
+
+class BulkApplicationTests(TestCase):
+    def setUp(self):
+        self.hospital = User.objects.create_user('hosp', password='x', user_type='hospital')
+        self.worker = User.objects.create_user('work', password='x', user_type='worker')
+        self.api = APIClient()
+        self.api.force_authenticate(self.worker)
+
+    def make_shift(self, date, start='07:00', end='15:00', **fields):
+        return Shift.objects.create(
+            hospital=self.hospital, department='ER', role='Nurse', date=date, start_time=start,
+            end_time=end, pay_per_hour=50, requirements='RN', location='ER', **fields,
+        )
+
+    def apply(self, items):
+        return self.api.post('/api/shifts/applications/bulk/', items, format='json')
+
+    def test_cart_checks_every_item(self):
+        week = [self.make_shift(f'2025-07-0{day}') for day in range(1, 6)]
+        booked = self.make_shift('2025-07-06')
+        Application.objects.create(shift=booked, worker=self.worker, status='approved')
+        overlaps_booking = self.make_shift('2025-07-06', '10:00', '18:00')
+        cancelled = self.make_shift('2025-07-07', status='cancelled')
+        full = self.make_shift('2025-07-08', max_applicants=1)
+        Application.objects.create(shift=full, worker=User.objects.create_user('other', password='x'))
+        overlaps_cart = self.make_shift('2025-07-01', '14:00', '20:00')
+
+        items = [{'shift': shift.id} for shift in week]
+        items[0]['proposed_rate'] = '55.00'
+        items += [{'shift': shift.id} for shift in (booked, overlaps_booking, cancelled, full, overlaps_cart)]
+        items += [{'shift': week[1].id}, {'shift': 999999}]
+        response = self.apply(items)
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual((data['created'], data['rejected']), (5, 7))
+        self.assertEqual([result['status'] for result in data['results']], ['created'] * 5 + ['rejected'] * 7)
+        errors = [result['errors'][0] for result in data['results'][5:]]
+        self.assertEqual(errors, [
+            'You have already applied to this shift',
+            'You are already booked for an overlapping shift',
+            'Shift is cancelled',
+            'Shift has no applicant places left',
+            f'Overlaps shift {week[0].id} earlier in this request',
+            'You have already applied to this shift',
+            'Shift does not exist',
+        ])
+        self.assertEqual(Application.objects.get(id=data['results'][0]['id']).proposed_rate, Decimal('55.00'))
+
+        self.assertEqual(self.apply([{'shift': week[0].id}]).status_code, 400)
+        self.assertEqual(self.apply({'shift': week[0].id}).status_code, 400)
+        self.api.force_authenticate(self.hospital)
+        self.assertEqual(self.apply([{'shift': week[0].id}]).status_code, 403)
+
+    def test_single_apply_follows_the_cart_rules(self):
+        full = self.make_shift('2025-07-08', max_applicants=1)
+        Application.objects.create(shift=full, worker=User.objects.create_user('other', password='x'))
+        cancelled = self.make_shift('2025-07-09', status='cancelled')
+        for shift, error in ((full, 'Shift has no applicant places left'), (cancelled, 'Shift is cancelled')):
+            with self.subTest(error=error):
+                response = self.api.post('/api/shifts/applications/', {'shift': shift.id}, format='json')
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['shift'], [error])
+        self.assertFalse(Application.objects.filter(worker=self.worker).exists())
+
+    def test_query_count_does_not_grow_with_the_cart(self):
+        shifts = [self.make_shift(f'2025-08-{day:02d}') for day in range(1, 11)]
+
+        def queries(cart):
+            with CaptureQueriesContext(connection) as captured:
+                self.assertEqual(self.apply([{'shift': shift.id} for shift in cart]).status_code, 201)
+            return len(captured)
+
+        self.assertEqual(queries(shifts[:2]), queries(shifts[2:]))
+
+
+class WorkerFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.hospital = User.objects.create_user('hosp', password='x', user_type='hospital')
+        self.worker = User.objects.create_user('work', password='x', user_type='worker')
+        self.shifts = [Shift.objects.create(
+            hospital=self.hospital, department='ER', role='Nurse', date=f'2025-07-0{day}',
+            start_time='07:00', end_time='15:00', pay_per_hour=50, requirements='RN', location='ER',
+        ) for day in (1, 2, 3)]
+        self.api = APIClient()
+        self.api.force_authenticate(self.worker)
+
+    def feed(self):
+        return [shift['id'] for shift in self.api.get('/api/shifts/worker/').json()['results']]
+
+    def apply(self, shift):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.api.post('/api/shifts/applications/', {'shift': shift.id}, format='json')
+
+    def test_exclusion_is_a_not_exists_anti_join(self):
+        Application.objects.create(shift=self.shifts[0], worker=self.worker)
+        queryset = exclude_applied(Shift.objects.filter(status='active'), self.worker.id)
+        self.assertIn('NOT EXISTS', str(queryset.query).upper())
+        self.assertEqual(set(queryset.values_list('id', flat=True)), {self.shifts[1].id, self.shifts[2].id})
+
+    @override_settings(WORKER_FEED_CACHE_TTL=60)
+    def test_cached_feed_tracks_applications(self):
+        newest_first = [shift.id for shift in reversed(self.shifts)]
+        self.assertEqual(self.feed(), newest_first)
+        self.assertEqual(self.apply(self.shifts[2]).status_code, 201)
+        self.assertEqual(applied_shift_ids(self.worker.id), {self.shifts[2].id})
+
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(self.feed(), newest_first[1:])
+        # Neither the active list nor the reloaded applied set was re-read; only the page's rows were.
+        self.assertEqual(sum('FROM "shifts_shift"' in query['sql'] for query in captured), 1)
+        self.assertFalse(any('"worker_id"' in query['sql'] for query in captured))
+
+        application = Application.objects.get(worker=self.worker)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.api.delete(f'/api/shifts/applications/{application.id}/')
+        self.assertEqual(self.feed(), newest_first)
+        # A shift filled since the list was cached is dropped when its page loads.
+        Shift.objects.filter(pk=self.shifts[0].id).update(status='filled')
+        self.assertEqual(self.feed(), newest_first[:2])
+
+    def test_cold_load_racing_a_commit_is_not_served(self):
+        def load_then_commit(**lookups):
+            stale = list(Application.objects.filter(**lookups).values_list('shift_id', flat=True))
+            with self.captureOnCommitCallbacks(execute=True):
+                Application.objects.create(shift=self.shifts[0], worker=self.worker)
+            return mock.Mock(values_list=mock.Mock(return_value=stale))
+
+        with mock.patch('shifts.feed.Application') as model:
+            model.objects.filter.side_effect = load_then_commit
+            self.assertEqual(applied_shift_ids(self.worker.id), set())
+        self.assertEqual(applied_shift_ids(self.worker.id), {self.shifts[0].id})
@@ -2,7 +2,9 @@ from django.urls import path
 from .views import (
     ShiftListView, ShiftDetailView, ApplicationListView, ApplicationDetailView,
     ShiftApplicationListView, ApplicationStatusUpdateView, WorkerShiftListView,
-    HospitalShiftListView, HospitalApplicationListView
+    HospitalShiftListView, HospitalApplicationListView, ShiftReviewListView,
+    ShiftReviewDetailView, ShiftAvailableWorkersView, approve_application, reject_application,
+    pay_benchmarks, export_hospital_data, apply_bulk
 )
 
 urlpatterns = [
@@ -10,12 +12,22 @@ urlpatterns = [
     path('', ShiftListView.as_view(), name='shift_list'),
     path('worker/', WorkerShiftListView.as_view(), name='worker_shift_list'),
     path('hospital/', HospitalShiftListView.as_view(), name='hospital_shift_list'),
+    path('hospital/export/<str:dataset>/', export_hospital_data, name='hospital_export'),
     path('<int:pk>/', ShiftDetailView.as_view(), name='shift_detail'),
+    path('pay-benchmarks/', pay_benchmarks, name='pay_benchmarks'),
+    path('<int:shift_id>/available-workers/', ShiftAvailableWorkersView.as_view(), name='shift_available_workers'),
     
     # Applications
     path('applications/', ApplicationListView.as_view(), name='application_list'),
+    path('applications/bulk/', apply_bulk, name='application_bulk'),
     path('applications/hospital/', HospitalApplicationListView.as_view(), name='hospital_application_list'),
     path('applications/<int:pk>/', ApplicationDetailView.as_view(), name='application_detail'),
     path('<int:shift_id>/applications/', ShiftApplicationListView.as_view(), name='shift_applications'),
     path('applications/<int:pk>/status/', ApplicationStatusUpdateView.as_view(), name='application_status'),
+    path('applications/<int:application_id>/approve/', approve_application, name='application_approve'),
+    path('applications/<int:application_id>/reject/', reject_application, name='application_reject'),
+    
+    # Reviews
+    path('reviews/', ShiftReviewListView.as_view(), name='review_list'),
+    path('reviews/<int:pk>/', ShiftReviewDetailView.as_view(), name='review_detail'),
 ] 
\ No newline at end of file
@@ -1,26 +1,63 @@
+from django.conf import settings
 from django.shortcuts import render
+from django.http import StreamingHttpResponse
 from rest_framework import status, generics, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 
+from accounts.serializers import WorkerProfileSerializer
+from medicall.params import date_param
+from medicall.readers import ReadSerializerMixin
+from .filters import ShiftFilter
+from .market import GROUP_FIELDS, benchmark_table
+from .exports import DATASETS, FORMATS, export_queryset, stream_export
+from .cart import apply_to_shifts
+from .feed import exclude_applied, cached_feed_ids, load_page
+from .availability import free_workers, application_conflicts, approve, BookingConflict
 from .models import Shift, Application, ShiftReview
 from .serializers import (
     ShiftSerializer, ShiftCreateSerializer, ApplicationSerializer,
-    ApplicationCreateSerializer, ShiftReviewSerializer, ShiftReviewCreateSerializer
+    ApplicationCreateSerializer, ShiftReviewSerializer, ShiftReviewCreateSerializer,
+    HospitalApplicationSerializer, BulkApplicationItemSerializer
 )
 
 
-class ShiftListView(generics.ListCreateAPIView):
-    queryset = Shift.objects.all()
+# Most shifts one bulk application request may cover.
+MAX_CART_ITEMS = 50
+
+
+def conflict_response(conflict):
+    return Response({'detail': 'Worker is already booked for an overlapping shift',
+                     'conflicting_shifts': conflict.shift_ids},
+                    status=status.HTTP_409_CONFLICT)
+
+
+class BookingConflictsMixin:
+    """Flag applicants booked elsewhere during the shift, for the current page in bulk."""
+    
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        self.conflicts = application_conflicts(page if page is not None else queryset)
+        return page
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['conflicts'] = getattr(self, 'conflicts', {})
+        return context
+
+
+class ShiftListView(ReadSerializerMixin, generics.ListCreateAPIView):
+    queryset = Shift.objects.select_related('hospital')
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['status', 'department', 'urgency', 'date']
+    filterset_class = ShiftFilter
     search_fields = ['role', 'department', 'requirements']
-    ordering_fields = ['date', 'pay_per_hour', 'created_at']
+    ordering_fields = ['date', 'starts_at', 'pay_per_hour', 'created_at']
     ordering = ['-created_at']
     
     def get_serializer_class(self):
@@ -35,7 +72,7 @@ class ShiftDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
 
-class ApplicationListView(generics.ListCreateAPIView):
+class ApplicationListView(ReadSerializerMixin, generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['status', 'shift']
@@ -43,7 +80,7 @@ class ApplicationListView(generics.ListCreateAPIView):
     ordering = ['-created_at']
     
     def get_queryset(self):
-        return Application.objects.filter(worker=self.request.user)
+        return Application.objects.filter(worker=self.request.user).select_related('shift__hospital', 'worker')
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -51,6 +88,26 @@ class ApplicationListView(generics.ListCreateAPIView):
         return ApplicationSerializer
 
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def apply_bulk(request):
+    """
+    Apply to several shifts at once. Takes a list of ``{shift, cover_letter,
+    proposed_rate}`` and returns a result per item; items that fail their
+    checks are reported without stopping the rest.
+    """
+    if request.user.user_type != 'worker':
+        return Response({'detail': 'Only workers can apply to shifts'},
+                       status=status.HTTP_403_FORBIDDEN)
+    serializer = BulkApplicationItemSerializer(data=request.data, many=True,
+                                               allow_empty=False, max_length=MAX_CART_ITEMS)
+    serializer.is_valid(raise_exception=True)
+    results = apply_to_shifts(request.user, serializer.validated_data)
+    created = sum(result['status'] == 'created' for result in results)
+    return Response({'created': created, 'rejected': len(results) - created, 'results': results},
+                    status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
+
+
 class ApplicationDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Application.objects.all()
     serializer_class = ApplicationSerializer
@@ -60,17 +117,29 @@ class ApplicationDetailView(generics.RetrieveUpdateDestroyAPIView):
         return Application.objects.filter(worker=self.request.user)
 
 
-class ShiftApplicationListView(generics.ListAPIView):
-    serializer_class = ApplicationSerializer
+class ShiftApplicationListView(ReadSerializerMixin, BookingConflictsMixin, generics.ListAPIView):
+    serializer_class = HospitalApplicationSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
         shift_id = self.kwargs['shift_id']
-        return Application.objects.filter(shift_id=shift_id, shift__hospital=self.request.user)
+        return Application.objects.filter(
+            shift_id=shift_id, shift__hospital=self.request.user
+        ).select_related('shift__hospital', 'worker')
 
 
-class HospitalApplicationListView(generics.ListAPIView):
-    serializer_class = ApplicationSerializer
+class ShiftAvailableWorkersView(generics.ListAPIView):
+    """Workers whose availability covers the shift and who are not booked during it."""
+    serializer_class = WorkerProfileSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        shift = get_object_or_404(Shift, id=self.kwargs['shift_id'], hospital=self.request.user)
+        return free_workers(shift).select_related('user').order_by('-rating', 'id')
+
+
+class HospitalApplicationListView(ReadSerializerMixin, BookingConflictsMixin, generics.ListAPIView):
+    serializer_class = HospitalApplicationSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['status', 'shift']
@@ -81,7 +150,9 @@ class HospitalApplicationListView(generics.ListAPIView):
         # Only hospitals can access this view
         if self.request.user.user_type != 'hospital':
             return Application.objects.none()
-        return Application.objects.filter(shift__hospital=self.request.user)
+        return Application.objects.filter(
+            shift__hospital=self.request.user
+        ).select_related('shift__hospital', 'worker')
 
 
 class ApplicationStatusUpdateView(generics.UpdateAPIView):
@@ -96,7 +167,13 @@ class ApplicationStatusUpdateView(generics.UpdateAPIView):
         application = self.get_object()
         new_status = request.data.get('status')
         
-        if new_status in ['approved', 'rejected']:
+        if new_status == 'approved':
+            try:
+                approve(application)
+            except BookingConflict as conflict:
+                return conflict_response(conflict)
+            return Response({'status': 'updated'})
+        if new_status == 'rejected':
             application.status = new_status
             application.save()
             return Response({'status': 'updated'})
@@ -112,8 +189,10 @@ def approve_application(request, application_id):
                        status=status.HTTP_403_FORBIDDEN)
     
     application = get_object_or_404(Application, id=application_id, shift__hospital=request.user)
-    application.status = 'approved'
-    application.save()
+    try:
+        approve(application)
+    except BookingConflict as conflict:
+        return conflict_response(conflict)
     
     # Update shift status if needed
     if application.shift.applications.filter(status='approved').count() >= 1:
@@ -137,6 +216,58 @@ def reject_application(request, application_id):
     return Response({'detail': 'Application rejected successfully'})
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def pay_benchmarks(request):
+    """
+    p25/p50/p75/p90 hourly pay per role, department, country and urgency.
+    Narrow with ``?role=``, ``?department=``, ``?country=``, ``?urgency=``
+    and ``?source=posted|agreed``.
+    """
+    filters = {
+        field: request.query_params[field]
+        for field in ('source', *GROUP_FIELDS) if request.query_params.get(field)
+    }
+    rows = [row for row in benchmark_table() if all(row[f] == value for f, value in filters.items())]
+    return Response({'count': len(rows), 'results': rows})
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def export_hospital_data(request, dataset):
+    """
+    Stream the hospital's shifts, applications or payroll as a file.
+    ``?output=csv|jsonl`` (default csv), ``?gzip=1`` to compress, and
+    ``?start=``/``?end=`` (shift date, YYYY-MM-DD) and ``?status=`` to filter.
+    """
+    if request.user.user_type != 'hospital':
+        return Response({'detail': 'Only hospitals can export data'},
+                       status=status.HTTP_403_FORBIDDEN)
+    if dataset not in DATASETS:
+        return Response({'detail': f'Unknown export; choose one of {", ".join(DATASETS)}'},
+                       status=status.HTTP_404_NOT_FOUND)
+    fmt = request.query_params.get('output', 'csv')
+    if fmt not in FORMATS:
+        return Response({'detail': f'output must be one of {", ".join(FORMATS)}'},
+                       status=status.HTTP_400_BAD_REQUEST)
+    try:
+        start, end = (date_param(request, name) for name in ('start', 'end'))
+    except ValueError:
+        return Response({'detail': 'start and end must be YYYY-MM-DD dates'},
+                       status=status.HTTP_400_BAD_REQUEST)
+    
+    gzip = request.query_params.get('gzip') in ('1', 'true')
+    queryset, headers = export_queryset(dataset, request.user, start=start, end=end,
+                                        status=request.query_params.get('status'))
+    filename = f'{dataset}.{fmt}' + ('.gz' if gzip else '')
+    response = StreamingHttpResponse(
+        stream_export(queryset, headers, fmt=fmt, gzip=gzip),
+        content_type='application/gzip' if gzip else f'{FORMATS[fmt]}; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 class ShiftReviewListView(generics.ListCreateAPIView):
     serializer_class = ShiftReviewSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -152,6 +283,11 @@ class ShiftReviewListView(generics.ListCreateAPIView):
         if self.request.method == 'POST':
             return ShiftReviewCreateSerializer
         return ShiftReviewSerializer
+    
+    def perform_create(self, serializer):
+        # The review and the reviewed worker's rating are saved together
+        with transaction.atomic():
+            serializer.save()
 
 
 class ShiftReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -161,31 +297,48 @@ class ShiftReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
     
     def get_queryset(self):
         return ShiftReview.objects.filter(reviewer=self.request.user)
+    
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
 
 
-class WorkerShiftListView(generics.ListAPIView):
+class WorkerShiftListView(ReadSerializerMixin, generics.ListAPIView):
     serializer_class = ShiftSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['department', 'urgency', 'date', 'location']
+    filterset_class = ShiftFilter
     search_fields = ['role', 'department', 'requirements']
-    ordering_fields = ['date', 'pay_per_hour', 'created_at']
+    ordering_fields = ['date', 'starts_at', 'pay_per_hour', 'created_at']
     ordering = ['-created_at']
     
     def get_queryset(self):
-        return Shift.objects.filter(status='active').exclude(
-            applications__worker=self.request.user
-        )
+        return exclude_applied(Shift.objects.filter(status='active'), self.request.user.id).select_related('hospital')
+    
+    def list(self, request, *args, **kwargs):
+        # Plain polls (no filters, search or ordering) can come from the cached feed.
+        if settings.WORKER_FEED_CACHE_TTL and set(request.query_params) <= {'page'}:
+            page = self.paginate_queryset(cached_feed_ids(request.user.id))
+            serializer = self.get_serializer(load_page(page), many=True)
+            response = self.get_paginated_response(serializer.data)
+            # Workers with the same applied set share these bodies; compress each once.
+            response.cache_compressed = True
+            return response
+        return super().list(request, *args, **kwargs)
 
 
-class HospitalShiftListView(generics.ListAPIView):
+class HospitalShiftListView(ReadSerializerMixin, generics.ListAPIView):
     serializer_class = ShiftSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['status', 'department', 'urgency', 'date']
+    filterset_class = ShiftFilter
     search_fields = ['role', 'department', 'requirements']
-    ordering_fields = ['date', 'created_at']
+    ordering_fields = ['date', 'starts_at', 'created_at']
     ordering = ['-created_at']
     
     def get_queryset(self):
-        return Shift.objects.filter(hospital=self.request.user)
+        return Shift.objects.filter(hospital=self.request.user).select_related('hospital')